@@ -0,0 +1,77 @@
+"""
+JWT authentication with a short-lived cache of resolved users.
+
+``JWTAuthentication`` loads the user row on every request just to populate
+``request.user``. ``CachedJWTAuthentication`` keeps the loaded user in the
+cache for ``AUTH_USER_CACHE_SECONDS`` under a key that includes a per-user
+auth version. Every committed save or delete of a user calls
+``invalidate_cached_user`` (see ``accounts.signals``), which bumps the
+version so the next request reloads the row; queryset ``update()`` calls
+send no signal and are picked up once the entry expires.
+
+A cached user can be up to ``AUTH_USER_CACHE_SECONDS`` old, so views must
+not save ``request.user`` whole: refetch the row or pass ``update_fields``.
+
+With the default per-process cache, an invalidation only reaches the worker
+that made it and other workers notice within the TTL; configure
+``REDIS_URL`` to share invalidations across workers.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+
+def _version_key(user_id):
+    return f'auth:user-version:{user_id}'
+
+
+def _user_key(user_id, version):
+    return f'auth:user:{user_id}:{version}'
+
+
+def invalidate_cached_user(user_id):
+    """Make the next request for ``user_id`` reload the user row."""
+    key = _version_key(user_id)
+    cache.add(key, 0, timeout=None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Evicted between add() and incr(); any fresh version works
+        cache.set(key, 1, timeout=None)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """``JWTAuthentication`` that resolves users through the cache."""
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        version = cache.get(_version_key(user_id), 0)
+        key = _user_key(user_id, version)
+        user = cache.get(key)
+        if user is None:
+            try:
+                user = self.user_model.objects.get(**{api_settings.USER_ID_FIELD: user_id})
+            except self.user_model.DoesNotExist:
+                raise AuthenticationFailed(_("User not found"), code="user_not_found")
+            # Stored under the version read above, so a concurrent
+            # invalidation leaves this entry unreachable
+            cache.set(key, user, getattr(settings, 'AUTH_USER_CACHE_SECONDS', 30))
+
+        if not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(
+                    _("The user's password has been changed."), code="password_changed"
+                )
+
+        return user
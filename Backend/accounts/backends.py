@@ -0,0 +1,66 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.db.models import Value
+from django.db.models.functions import Lower
+from rest_framework.request import Request
+
+from .hashing import PasswordHashingBusy, hash_password, verify_password
+
+UserModel = get_user_model()
+
+
+class UsernameOrEmailBackend(ModelBackend):
+    """
+    Authenticate by username or email, case-insensitively, with one query
+    on the ``Lower()`` indexes, checking the password on the hashing pool
+    (see accounts.hashing).
+    """
+
+    def get_login_user(self, login):
+        """Return the user whose username or email matches ``login``, or None."""
+        # Usernames cannot contain '@', so each login needs only one index
+        field = 'email' if '@' in login else 'username'
+        matches = list(
+            UserModel._default_manager
+            .alias(login_key=Lower(field))
+            .filter(login_key=Lower(Value(login)))
+            .order_by()[:10]
+        )
+        if len(matches) == 1:
+            return matches[0]
+        # Accounts that differ only in case: accept the exact spelling only
+        exact = [user for user in matches if getattr(user, field) == login]
+        return exact[0] if len(exact) == 1 else None
+
+    def hash(self, request, fn, *args):
+        """
+        Run ``fn`` from accounts.hashing on the pool. API views turn a full
+        pool into a 503; other callers of ``authenticate()``, such as the
+        admin login, would fail with a 500, so they hash inline instead.
+        """
+        try:
+            return fn(*args)
+        except PasswordHashingBusy:
+            if isinstance(request, Request):
+                raise
+            return fn(*args, inline=True)
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return
+        user = self.get_login_user(username)
+        if user is None:
+            # Hash once anyway so unknown logins take as long as known ones
+            self.hash(request, hash_password, password)
+            return
+
+        valid, rehashed = self.hash(request, verify_password, password, user.password)
+        if not valid:
+            return
+        if rehashed:
+            user.password = rehashed
+            user.save(update_fields=['password'])
+        if self.user_can_authenticate(user):
+            return user
@@ -0,0 +1,34 @@
+"""
+Batched profile counters for lists of users.
+
+``User.followers_count``, ``following_count`` and ``posts_count`` each run a
+COUNT query, which is fine for one profile but costs three queries per row
+in a list. These helpers compute the same numbers for a whole page with one
+grouped query per counter.
+"""
+from django.db.models import Count
+
+
+def get_user_counts(user_ids):
+    """Return ``{user_id: {'followers_count', 'following_count', 'posts_count'}}``."""
+    from posts.models import Post
+    from social.models import Follow
+
+    user_ids = list(set(user_ids))
+    counts = {
+        user_id: {'followers_count': 0, 'following_count': 0, 'posts_count': 0}
+        for user_id in user_ids
+    }
+    if not user_ids:
+        return counts
+
+    grouped = (
+        ('followers_count', Follow.objects.filter(following_id__in=user_ids), 'following_id'),
+        ('following_count', Follow.objects.filter(follower_id__in=user_ids), 'follower_id'),
+        ('posts_count', Post.objects.filter(author_id__in=user_ids, is_active=True), 'author_id'),
+    )
+    for name, queryset, column in grouped:
+        rows = queryset.values(column).annotate(total=Count('id')).values_list(column, 'total')
+        for user_id, total in rows:
+            counts[user_id][name] = total
+    return counts
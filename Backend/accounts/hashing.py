@@ -0,0 +1,162 @@
+"""
+Password hashing on a bounded process pool.
+
+PBKDF2 keeps a CPU busy for the whole hash while holding the GIL, so a burst
+of logins on the request threads starves every other request served by the
+same process. Login and registration hand their hashing to a small pool of
+worker processes instead, and the request thread only waits for the result.
+
+Admission is bounded: at most ``PASSWORD_HASHING_WORKERS`` hashes run and
+``PASSWORD_HASHING_MAX_PENDING`` more wait per web process. Anything beyond
+that raises ``PasswordHashingBusy`` straight away, which the views turn into
+a 503 with ``Retry-After`` instead of queueing without limit.
+
+Workers are spawned rather than forked, since forking a threaded server
+process can copy held locks, and are created on first use in each process.
+Every web process gets its own pool, so ``PASSWORD_HASHING_WORKERS`` is kept
+small; set it to 0 to hash on the request threads instead. Where worker
+processes cannot be started at all (serverless hosts, no ``/dev/shm``) the
+pool logs a warning and hashes inline from then on.
+"""
+import logging
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import get_context
+
+from django.conf import settings
+from django.contrib.auth.hashers import identify_hasher, make_password
+
+logger = logging.getLogger('socialconnect')
+
+
+class PasswordHashingBusy(Exception):
+    """The hashing pool is at capacity; retry after ``retry_after`` seconds."""
+
+    def __init__(self, retry_after):
+        super().__init__('Password hashing is at capacity.')
+        self.retry_after = retry_after
+
+
+def _setup_worker():
+    import django
+    django.setup()
+
+
+def _hash(password):
+    return make_password(password)
+
+
+def _verify(password, encoded):
+    """Return ``(valid, rehashed)``; ``rehashed`` is set when the hasher's parameters changed."""
+    hasher = identify_hasher(encoded)
+    if not hasher.verify(password, encoded):
+        return False, None
+    return True, make_password(password) if hasher.must_update(encoded) else None
+
+
+class HashingPool:
+    """Process pool with a fixed number of slots, shared by request threads."""
+
+    def __init__(self, workers=None, max_pending=None, timeout=None, retry_after=None):
+        if workers is None:
+            workers = getattr(settings, 'PASSWORD_HASHING_WORKERS', 2)
+        self.workers = workers
+        # No pool: hash on the calling thread
+        self.inline = workers == 0
+        if max_pending is None:
+            max_pending = getattr(settings, 'PASSWORD_HASHING_MAX_PENDING', self.workers * 2)
+        self.capacity = self.workers + max_pending
+        self.timeout = timeout or getattr(settings, 'PASSWORD_HASHING_TIMEOUT_SECONDS', 10)
+        self.retry_after = retry_after or getattr(settings, 'PASSWORD_HASHING_RETRY_AFTER_SECONDS', 2)
+        self._slots = threading.BoundedSemaphore(self.capacity)
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pid = os.getpid()
+
+    def _get_executor(self):
+        if self._pid != os.getpid():
+            # Forked web worker: the parent's processes are not ours
+            self._executor, self._lock, self._pid = None, threading.Lock(), os.getpid()
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=get_context('spawn'),
+                        initializer=_setup_worker,
+                    )
+                    logger.info(f"Started password hashing pool with {self.workers} workers")
+        return self._executor
+
+    def run(self, fn, *args):
+        """Run ``fn(*args)`` in the pool, or raise ``PasswordHashingBusy`` if it is full."""
+        if self.inline:
+            return fn(*args)
+        if not self._slots.acquire(blocking=False):
+            raise PasswordHashingBusy(self.retry_after)
+        try:
+            try:
+                future = self._get_executor().submit(fn, *args)
+            except BrokenProcessPool:
+                logger.warning('Password hashing pool broke; restarting it')
+                self.shutdown(wait=False)
+                future = self._get_executor().submit(fn, *args)
+        except (OSError, ImportError, NotImplementedError) as exc:
+            # Worker processes cannot be started here
+            self._slots.release()
+            logger.warning(f"Password hashing pool could not start ({exc}); hashing inline")
+            self.inline = True
+            self.shutdown(wait=False)
+            return fn(*args)
+        except BaseException:
+            self._slots.release()
+            raise
+        # The slot stays taken until the hash finishes, even if we stop waiting
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except TimeoutError:
+            raise PasswordHashingBusy(self.retry_after)
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_hashing_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = HashingPool()
+    return _pool
+
+
+def hash_password(password, inline=False):
+    """Hash ``password`` with the default hasher, off the request thread unless ``inline``."""
+    if inline:
+        return _hash(password)
+    return get_hashing_pool().run(_hash, password)
+
+
+def verify_password(password, encoded, inline=False):
+    """
+    Check ``password`` against ``encoded``, off the request thread unless
+    ``inline``. Returns ``(valid, rehashed)`` like ``_verify``.
+    """
+    try:
+        identify_hasher(encoded)
+    except ValueError:
+        # Unusable or unknown hash; nothing to compute
+        return False, None
+    if inline:
+        return _verify(password, encoded)
+    return get_hashing_pool().run(_verify, password, encoded)
@@ -0,0 +1,99 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth.hashers import check_password, make_password
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.hashing import HashingPool, PasswordHashingBusy, _verify
+
+PASSWORD = 'benchmark-Passw0rd'
+
+
+class Command(BaseCommand):
+    help = 'Measure password-check throughput on the hashing pool for several worker counts'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--logins',
+            type=int,
+            default=40,
+            help='Password checks per run'
+        )
+        parser.add_argument(
+            '--workers',
+            default=None,
+            help='Comma-separated worker counts (default: powers of two up to the CPU count)'
+        )
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=None,
+            help='Simultaneous requests (default: twice the worker count)'
+        )
+        parser.add_argument(
+            '--max-pending',
+            type=int,
+            default=None,
+            help='Pool queue depth; lower it to see requests rejected (default: room for every request)'
+        )
+
+    def handle(self, *args, **options):
+        cpus = os.cpu_count() or 1
+        if options['workers']:
+            try:
+                counts = [int(count) for count in options['workers'].split(',')]
+            except ValueError:
+                raise CommandError('--workers must be a comma-separated list of integers')
+        else:
+            counts = [1]
+            while counts[-1] * 2 <= cpus:
+                counts.append(counts[-1] * 2)
+            if counts[-1] != cpus:
+                counts.append(cpus)
+
+        encoded = make_password(PASSWORD)
+        self.stdout.write(f'{cpus} CPUs, {options["logins"]} logins per run')
+
+        # Hashing on request threads, as without the pool
+        rate, rejected = self.run(
+            lambda: check_password(PASSWORD, encoded), options['logins'], options['concurrency'] or cpus * 2
+        )
+        self.stdout.write(f'{"threads":>8}: {rate:8.1f} logins/s')
+
+        baseline = None
+        for workers in counts:
+            concurrency = options['concurrency'] or workers * 2
+            max_pending = options['max_pending']
+            pool = HashingPool(
+                workers=workers,
+                max_pending=concurrency if max_pending is None else max_pending,
+                timeout=3600,
+            )
+            try:
+                # Start every worker process before timing
+                self.run(lambda: pool.run(_verify, PASSWORD, encoded), workers, workers)
+                rate, rejected = self.run(
+                    lambda: pool.run(_verify, PASSWORD, encoded), options['logins'], concurrency
+                )
+            finally:
+                pool.shutdown()
+            baseline = baseline or rate
+            self.stdout.write(
+                f'{workers:>8}: {rate:8.1f} logins/s  x{rate / baseline:.2f}  {rejected} rejected'
+            )
+
+    def run(self, check, logins, concurrency):
+        """Return (accepted logins per second, rejected count)."""
+        def attempt(_):
+            try:
+                check()
+            except PasswordHashingBusy:
+                return False
+            return True
+
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=concurrency) as threads:
+            accepted = sum(threads.map(attempt, range(logins)))
+        elapsed = time.monotonic() - started
+        return accepted / elapsed if elapsed else 0.0, logins - accepted
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+
+from accounts.tokens import prune_expired_tokens
+
+
+class Command(BaseCommand):
+    help = 'Delete expired refresh tokens from the outstanding and blacklist tables'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=1000,
+            help='Tokens deleted per query'
+        )
+        parser.add_argument(
+            '--sleep',
+            type=float,
+            default=0,
+            help='Seconds to pause between chunks'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Count expired tokens without deleting them'
+        )
+
+    def handle(self, *args, **options):
+        outstanding, blacklisted = prune_expired_tokens(
+            chunk_size=options['chunk_size'],
+            pause=options['sleep'],
+            dry_run=options['dry_run'],
+        )
+        verb = 'Would delete' if options['dry_run'] else 'Deleted'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} {outstanding} expired tokens ({blacklisted} blacklisted)'
+        ))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from accounts.search import rebuild_search_keys, uses_trigram_indexes
+
+
+class Command(BaseCommand):
+    help = 'Recreate the user search keys (not needed on PostgreSQL, which uses trigram indexes)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Users re-indexed per transaction'
+        )
+
+    def handle(self, *args, **options):
+        if uses_trigram_indexes():
+            self.stdout.write('User search uses trigram indexes on this database; nothing to rebuild')
+            return
+        indexed = rebuild_search_keys(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Indexed {indexed} users for search'))
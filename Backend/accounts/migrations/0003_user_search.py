@@ -0,0 +1,80 @@
+# Generated by Django 5.2.3 on 2026-10-19 11:54
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+TRIGRAM_INDEXES = {
+    'users_username_trgm_idx': 'username',
+    'users_first_name_trgm_idx': 'first_name',
+    'users_last_name_trgm_idx': 'last_name',
+}
+
+
+def create_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for name, column in TRIGRAM_INDEXES.items():
+        # Must match the Lower() expressions in accounts.search
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {name} ON users USING gin ((LOWER({column})) gin_trgm_ops)'
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name in TRIGRAM_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+# Frozen copy of accounts.search.build_search_keys as of this migration
+KEY_LENGTH = 32
+
+
+def keys_for(user):
+    keys = {}
+    for field in ('username', 'first_name', 'last_name'):
+        for word in (getattr(user, field) or '').lower().split():
+            for start in range(len(word)):
+                key = word[start:start + KEY_LENGTH]
+                keys[key] = keys.get(key, False) or start == 0
+    return keys
+
+
+def build_search_keys(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        return
+    User = apps.get_model('accounts', 'User')
+    UserSearchKey = apps.get_model('accounts', 'UserSearchKey')
+    for user in User.objects.only('id', 'username', 'first_name', 'last_name').iterator():
+        UserSearchKey.objects.bulk_create([
+            UserSearchKey(user_id=user.id, key=key, is_prefix=is_prefix)
+            for key, is_prefix in keys_for(user).items()
+        ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_lower_login_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserSearchKey',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=32)),
+                ('is_prefix', models.BooleanField(default=False)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_keys', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'user_search_keys',
+                'unique_together': {('key', 'user')},
+            },
+        ),
+        migrations.RunPython(build_search_keys, migrations.RunPython.noop),
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
@@ -1,6 +1,8 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.db.models.functions import Lower
 from django.core.validators import RegexValidator
+from django.utils import timezone
 
 
 class User(AbstractUser):
@@ -66,6 +68,11 @@ class User(AbstractUser):
         verbose_name = 'User'
         verbose_name_plural = 'Users'
         ordering = ['-created_at']
+        indexes = [
+            # Case-insensitive login lookups (see accounts.backends)
+            models.Index(Lower('username'), name='users_username_lower_idx'),
+            models.Index(Lower('email'), name='users_email_lower_idx'),
+        ]
 
     def __str__(self):
         return f"@{self.username}"
@@ -90,16 +97,69 @@ class User(AbstractUser):
         """Return the number of posts created by this user."""
         return self.posts.filter(is_active=True).count()
 
+    def record_login(self, now=None):
+        """
+        Set ``last_login``, truncated to the minute, writing only when the
+        minute has changed so bursts of logins cost one UPDATE.
+        """
+        minute = (now or timezone.now()).replace(second=0, microsecond=0)
+        if self.last_login is not None and self.last_login >= minute:
+            return False
+        User.objects.filter(pk=self.pk).update(last_login=minute)
+        self.last_login = minute
+        return True
+
     def is_admin(self):
         """Check if user has admin role."""
         return self.role == 'admin'
 
     def can_view_profile(self, viewer):
         """Check if a viewer can see this user's profile based on privacy settings."""
-        if self.privacy_setting == 'public':
+        is_owner = viewer == self
+        viewer_follows = False
+        if self.privacy_setting == 'followers_only' and not is_owner and viewer.is_authenticated:
+            # Always from the database: the in-process follow graph may lag an unfollow
+            from social.models import Follow
+            viewer_follows = Follow.objects.filter(follower=viewer, following=self).exists()
+        return self.privacy_allows(self.privacy_setting, is_owner, viewer_follows)
+
+    @staticmethod
+    def privacy_allows(privacy_setting, is_owner, viewer_follows):
+        """Apply the profile privacy rules to an already resolved relationship."""
+        if privacy_setting == 'public':
             return True
-        elif self.privacy_setting == 'private':
-            return viewer == self
-        elif self.privacy_setting == 'followers_only':
-            return viewer == self or self.followers_set.filter(follower=viewer).exists()
+        elif privacy_setting == 'private':
+            return is_owner
+        elif privacy_setting == 'followers_only':
+            return is_owner or viewer_follows
         return False
+
+    @classmethod
+    def visible_to(cls, viewer):
+        """Filter for the users whose profile ``viewer`` may see, as ``can_view_profile`` decides."""
+        from social.models import Follow
+        followed = Follow.objects.filter(follower_id=viewer.pk).values('following_id')
+        return (
+            models.Q(privacy_setting='public')
+            | models.Q(pk=viewer.pk)
+            | models.Q(privacy_setting='followers_only', pk__in=followed)
+        )
+
+
+class UserSearchKey(models.Model):
+    """
+    Lower-cased suffixes of each word in a user's username and names, so
+    substring search is a prefix range scan on ``key`` (see accounts.search).
+    Maintained only on databases without trigram indexes.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='search_keys')
+    key = models.CharField(max_length=32)
+    # The suffix starts a word, so it also serves prefix matching
+    is_prefix = models.BooleanField(default=False)
+
+    class Meta:
+        db_table = 'user_search_keys'
+        unique_together = ('key', 'user')
+
+    def __str__(self):
+        return f"{self.key} -> {self.user_id}"
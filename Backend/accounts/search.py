@@ -0,0 +1,122 @@
+"""
+Indexed user search by username, first name and last name.
+
+Each word of the query must occur in one of the three fields, case
+insensitively; words shorter than ``MIN_CONTAINS_LENGTH`` only match at the
+start of a word. Results are ranked exact match first, then prefix match,
+then any other match.
+
+On PostgreSQL the substring tests run on ``pg_trgm`` GIN indexes over the
+lower-cased columns (created by migration ``0003_user_search``). Other
+databases have no such index, so ``UserSearchKey`` stores every suffix of
+every word and a substring test becomes a range scan on its ``key`` index;
+the keys are rewritten whenever a user's name fields change.
+"""
+from django.db import connection, transaction
+from django.db.models import Case, IntegerField, Q, Value, When
+from django.db.models.functions import Concat, Lower
+
+from .models import User, UserSearchKey
+
+SEARCH_FIELDS = ('username', 'first_name', 'last_name')
+KEY_LENGTH = UserSearchKey._meta.get_field('key').max_length
+# Shorter words match prefixes only; trigram indexes need three characters
+MIN_CONTAINS_LENGTH = 3
+# Any character sorts before this one, so [word, word + RANGE_END) is a prefix range
+RANGE_END = '\U0010ffff'
+
+
+def uses_trigram_indexes():
+    return connection.vendor == 'postgresql'
+
+
+def normalize_query(query):
+    """Lower-cased words of ``query``, at most five."""
+    return query.lower().split()[:5]
+
+
+def build_search_keys(user):
+    """``{key: is_prefix}`` for every word suffix in the user's searchable fields."""
+    keys = {}
+    for field in SEARCH_FIELDS:
+        for word in (getattr(user, field) or '').lower().split():
+            for start in range(len(word)):
+                key = word[start:start + KEY_LENGTH]
+                keys[key] = keys.get(key, False) or start == 0
+    return keys
+
+
+def index_user(user):
+    """Rewrite the user's search keys; a no-op where trigram indexes are used."""
+    if uses_trigram_indexes():
+        return
+    with transaction.atomic():
+        UserSearchKey.objects.filter(user_id=user.pk).delete()
+        UserSearchKey.objects.bulk_create([
+            UserSearchKey(user_id=user.pk, key=key, is_prefix=is_prefix)
+            for key, is_prefix in build_search_keys(user).items()
+        ])
+
+
+def rebuild_search_keys(batch_size=500):
+    """Recreate every user's search keys. Returns the number of users indexed."""
+    if uses_trigram_indexes():
+        return 0
+    indexed = 0
+    last_id = 0
+    users = User.objects.order_by('id').only('id', *SEARCH_FIELDS)
+    while True:
+        batch = list(users.filter(id__gt=last_id)[:batch_size])
+        if not batch:
+            return indexed
+        last_id = batch[-1].id
+        with transaction.atomic():
+            UserSearchKey.objects.filter(user_id__in=[user.id for user in batch]).delete()
+            UserSearchKey.objects.bulk_create([
+                UserSearchKey(user_id=user.id, key=key, is_prefix=is_prefix)
+                for user in batch
+                for key, is_prefix in build_search_keys(user).items()
+            ], batch_size=1000)
+        indexed += len(batch)
+
+
+def _word_filter(word):
+    short = len(word) < MIN_CONTAINS_LENGTH
+    if uses_trigram_indexes():
+        lookup = 'startswith' if short else 'contains'
+        return Q(*[(f'search_{field}__{lookup}', word) for field in SEARCH_FIELDS], _connector=Q.OR)
+
+    word = word[:KEY_LENGTH]
+    keys = UserSearchKey.objects.filter(key__gte=word, key__lt=word + RANGE_END)
+    if short:
+        keys = keys.filter(is_prefix=True)
+    return Q(id__in=keys.values('user_id'))
+
+
+def search_users(queryset, query):
+    """
+    Filter ``queryset`` to users matching ``query`` and annotate
+    ``search_rank``: 0 for an exact match, 1 for a prefix, 2 otherwise.
+    """
+    words = normalize_query(query)
+    if not words:
+        return queryset.none()
+
+    phrase = ' '.join(words)
+    full_name = Lower(Concat('first_name', Value(' '), 'last_name'))
+    queryset = queryset.alias(**{f'search_{field}': Lower(field) for field in SEARCH_FIELDS})
+    for word in words:
+        queryset = queryset.filter(_word_filter(word))
+
+    exact = Q(search_username=phrase) | Q(search_first_name=phrase) | Q(search_last_name=phrase)
+    prefix = (
+        Q(search_username__startswith=phrase)
+        | Q(search_first_name__startswith=phrase)
+        | Q(search_last_name__startswith=phrase)
+    )
+    return queryset.alias(search_full_name=full_name).annotate(search_rank=Case(
+        When(exact | Q(search_full_name=phrase), then=Value(0)),
+        When(prefix | Q(search_full_name__startswith=phrase), then=Value(1)),
+        default=Value(2),
+        output_field=IntegerField(),
+    ))
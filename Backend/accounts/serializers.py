@@ -2,6 +2,7 @@ from rest_framework import serializers
 from django.contrib.auth import authenticate
 from django.contrib.auth.password_validation import validate_password
 from django.core.exceptions import ValidationError
+from .hashing import hash_password
 from .models import User
 
 
@@ -24,7 +25,13 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
 
     def create(self, validated_data):
         validated_data.pop('password_confirm')
-        user = User.objects.create_user(**validated_data)
+        password = validated_data.pop('password')
+        # create_user() would hash on the request thread
+        user = User(**validated_data)
+        user.username = User.normalize_username(user.username)
+        user.email = User.objects.normalize_email(user.email)
+        user.password = hash_password(password)
+        user.save()
         return user
 
 
@@ -38,23 +45,12 @@ class UserLoginSerializer(serializers.Serializer):
         password = attrs.get('password')
 
         if username_or_email and password:
-            # Try to find user by email first, then by username
-            user = None
-            if '@' in username_or_email:
-                try:
-                    user = User.objects.get(email=username_or_email)
-                    username = user.username
-                except User.DoesNotExist:
-                    pass
-            else:
-                username = username_or_email
-
-            if user or username:
-                user = authenticate(
-                    request=self.context.get('request'),
-                    username=username if not user else user.username,
-                    password=password
-                )
+            # The backend resolves either form in one query
+            user = authenticate(
+                request=self.context.get('request'),
+                username=username_or_email,
+                password=password
+            )
 
             if not user:
                 raise serializers.ValidationError(
@@ -90,6 +86,16 @@ class UserProfileSerializer(serializers.ModelSerializer):
         read_only_fields = ('id', 'username', 'email', 'created_at', 'is_verified')
 
 
+class UserCardSerializer(serializers.ModelSerializer):
+    """Compact user representation for lists; carries no per-row counters."""
+    full_name = serializers.ReadOnlyField()
+
+    class Meta:
+        model = User
+        fields = ('id', 'username', 'full_name', 'avatar_url', 'is_verified')
+        read_only_fields = fields
+
+
 class UserProfileUpdateSerializer(serializers.ModelSerializer):
     """Serializer for updating user profile."""
     
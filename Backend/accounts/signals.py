@@ -0,0 +1,33 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+from .authentication import invalidate_cached_user
+from .models import User
+from .search import SEARCH_FIELDS, index_user
+from .tokens import blacklist_changed
+
+
+@receiver(post_save, sender=BlacklistedToken)
+def publish_blacklisted_token(sender, instance, created, **kwargs):
+    """Tell the blacklist filters about a token once its row is committed."""
+    if created:
+        jti = instance.token.jti
+        transaction.on_commit(lambda: blacklist_changed(jti))
+
+
+@receiver(post_save, sender=User)
+def update_user_search_keys(sender, instance, update_fields=None, **kwargs):
+    """Keep the user's search keys in step with their name fields."""
+    if update_fields is not None and not set(update_fields) & set(SEARCH_FIELDS):
+        return
+    index_user(instance)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_auth_cache(sender, instance, **kwargs):
+    """Drop the cached user behind every token once a change to its row is committed."""
+    user_id = instance.pk
+    transaction.on_commit(lambda: invalidate_cached_user(user_id))
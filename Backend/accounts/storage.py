@@ -11,6 +11,8 @@ from django.core.files.base import ContentFile
 import base64
 import logging
 
+from utils.clients import supabase_client
+
 logger = logging.getLogger(__name__)
 
 class AvatarStorageManager:
@@ -18,19 +20,13 @@ class AvatarStorageManager:
     
     def __init__(self):
         self.use_supabase = bool(settings.SUPABASE_URL and settings.SUPABASE_KEY)
-        if self.use_supabase:
-            try:
-                from supabase import create_client, Client
-                self.supabase: Client = create_client(
-                    settings.SUPABASE_URL, 
-                    settings.SUPABASE_SERVICE_KEY or settings.SUPABASE_KEY
-                )
-                logger.info("Supabase storage initialized")
-            except ImportError:
-                logger.warning("Supabase client not available, falling back to local storage")
-                self.use_supabase = False
-        else:
+        if not self.use_supabase:
             logger.info("Using local media storage")
+
+    @property
+    def supabase(self):
+        """Shared pooled Supabase client, created on first use."""
+        return supabase_client(service=True)
     
     def save_avatar(self, file_data, user_id):
         """
@@ -91,22 +87,15 @@ class AvatarStorageManager:
         """Save image to Supabase storage."""
         try:
             # Upload to Supabase storage
-            result = self.supabase.storage.from_(settings.SUPABASE_STORAGE_BUCKET).upload(
-                filename, 
+            public_url = self.supabase.upload(
+                settings.SUPABASE_STORAGE_BUCKET,
+                filename,
                 image_file.getvalue(),
-                {
-                    "content-type": "image/jpeg",
-                    "cache-control": "3600"
-                }
+                content_type="image/jpeg",
+                cache_control="3600"
             )
-            
-            if result.status_code == 200:
-                # Get public URL
-                public_url = self.supabase.storage.from_(settings.SUPABASE_STORAGE_BUCKET).get_public_url(filename)
-                logger.info(f"Avatar uploaded to Supabase: {filename}")
-                return public_url
-            else:
-                raise Exception(f"Supabase upload failed: {result.status_code}")
+            logger.info(f"Avatar uploaded to Supabase: {filename}")
+            return public_url
                 
         except Exception as e:
             logger.error(f"Supabase upload error: {e}")
@@ -145,7 +134,7 @@ class AvatarStorageManager:
             if self.use_supabase and settings.SUPABASE_URL in avatar_url:
                 # Extract filename from Supabase URL
                 filename = avatar_url.split('/')[-1]
-                self.supabase.storage.from_(settings.SUPABASE_STORAGE_BUCKET).remove([filename])
+                self.supabase.remove(settings.SUPABASE_STORAGE_BUCKET, [filename])
                 logger.info(f"Avatar deleted from Supabase: {filename}")
             elif avatar_url.startswith(settings.MEDIA_URL):
                 # Local file deletion
@@ -1,3 +1,327 @@
-from django.test import TestCase
+from datetime import datetime, timedelta, timezone as dt_timezone
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import authenticate
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.utils import aware_utcnow
+
+from social.models import Follow
+from . import hashing
+from .models import User
+from .tokens import BloomFilter, RefreshToken, blacklist_filter
+
+
+class CachedJWTAuthenticationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='reader', email='reader@example.com', password='old-pass-123'
+        )
+        self.admin = User.objects.create_user(
+            username='moderator', email='moderator@example.com', password='pass', role='admin'
+        )
+        self.client = APIClient()
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.user).access_token}'
+        )
+
+    def user_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('accounts:current_user'))
+        self.assertEqual(response.status_code, 200)
+        return [query for query in queries if 'FROM "users"' in query['sql']]
+
+    def test_repeat_requests_resolve_the_user_from_cache(self):
+        self.assertEqual(len(self.user_queries()), 1)
+        self.assertEqual(self.user_queries(), [])
+
+    def test_deactivation_takes_effect_on_the_next_request(self):
+        self.user_queries()
+
+        admin = APIClient()
+        admin.force_authenticate(self.admin)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = admin.post(reverse('accounts:deactivate_user', args=[self.user.id]))
+        self.assertEqual(response.status_code, 200)
+
+        response = self.client.get(reverse('accounts:current_user'))
+        self.assertEqual(response.status_code, 401)
+
+    def test_profile_and_password_changes_reload_the_user(self):
+        self.user_queries()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(reverse('accounts:update_profile'), {'bio': 'Updated bio'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.get(reverse('accounts:current_user')).data['bio'], 'Updated bio')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('accounts:change_password'), {
+                'old_password': 'old-pass-123',
+                'new_password': 'n3w-Passphrase!',
+                'new_password_confirm': 'n3w-Passphrase!',
+            }, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(self.user_queries()), 1)
+
+    def test_saves_outside_the_api_invalidate_the_cached_user(self):
+        self.user_queries()
+
+        # As the Django admin or a management command would
+        user = User.objects.get(pk=self.user.pk)
+        user.first_name = 'Renamed'
+        with self.captureOnCommitCallbacks(execute=True):
+            user.save()
+        self.assertEqual(self.client.get(reverse('accounts:current_user')).data['first_name'], 'Renamed')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            user.delete()
+        self.assertEqual(self.client.get(reverse('accounts:current_user')).status_code, 401)
+
+    def test_writes_do_not_persist_the_cached_user(self):
+        self.user_queries()
+        # Changed behind the cache's back, e.g. in another worker before its invalidation lands
+        User.objects.filter(pk=self.user.pk).update(role='admin', first_name='Concurrent')
+
+        response = self.client.patch(reverse('accounts:update_profile'), {'bio': 'Updated bio'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        response = self.client.post(reverse('accounts:change_password'), {
+            'old_password': 'old-pass-123',
+            'new_password': 'n3w-Passphrase!',
+            'new_password_confirm': 'n3w-Passphrase!',
+        }, format='json')
+        self.assertEqual(response.status_code, 200)
+
+        self.user.refresh_from_db()
+        self.assertEqual((self.user.role, self.user.first_name, self.user.bio), ('admin', 'Concurrent', 'Updated bio'))
+        self.assertTrue(self.user.check_password('n3w-Passphrase!'))
+
+
+class PooledPasswordHashingTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='reader', email='reader@example.com', password='old-pass-123'
+        )
+
+    def login(self, password):
+        return self.client.post(reverse('accounts:login'), {
+            'username_or_email': 'reader@example.com', 'password': password
+        }, format='json')
+
+    def test_login_and_registration_hash_on_the_pool(self):
+        self.assertEqual(self.login('wrong-pass').status_code, 400)
+        self.assertEqual(self.login('old-pass-123').status_code, 200)
+
+        response = self.client.post(reverse('accounts:register'), {
+            'username': 'Newcomer',
+            'email': 'newcomer@EXAMPLE.com',
+            'password': 'n3w-Passphrase!',
+            'password_confirm': 'n3w-Passphrase!',
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        user = User.objects.get(username='Newcomer')
+        self.assertEqual(user.email, 'newcomer@example.com')
+        self.assertTrue(user.check_password('n3w-Passphrase!'))
+
+    def test_requests_over_capacity_get_a_fast_503(self):
+        pool = hashing.HashingPool(workers=1, max_pending=0, retry_after=5)
+        pool._slots.acquire()
+        with mock.patch.object(hashing, '_pool', pool):
+            response = self.login('old-pass-123')
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '5')
+        self.assertIsNone(pool._executor)
+
+    def test_admin_logins_hash_inline_when_the_pool_is_full(self):
+        pool = hashing.HashingPool(workers=1, max_pending=0)
+        pool._slots.acquire()
+        with mock.patch.object(hashing, '_pool', pool):
+            user = authenticate(RequestFactory().post('/admin/login/'), username='reader', password='old-pass-123')
+        self.assertEqual(user, self.user)
+
+    def test_hashes_inline_when_disabled_or_processes_cannot_start(self):
+        with override_settings(PASSWORD_HASHING_WORKERS=0):
+            pool = hashing.HashingPool()
+        with mock.patch.object(hashing, '_pool', pool):
+            self.assertEqual(self.login('old-pass-123').status_code, 200)
+        self.assertIsNone(pool._executor)
+
+        pool = hashing.HashingPool(workers=1)
+        with mock.patch.object(hashing, '_pool', pool), \
+                mock.patch.object(hashing, 'ProcessPoolExecutor', side_effect=OSError('no /dev/shm')):
+            self.assertEqual(self.login('old-pass-123').status_code, 200)
+            self.assertEqual(self.login('old-pass-123').status_code, 200)
+        self.assertTrue(pool.inline)
+
+    def test_login_resolves_either_form_in_one_query_and_coalesces_last_login(self):
+        now = datetime(2025, 6, 1, 12, 30, 15, tzinfo=dt_timezone.utc)
+        with mock.patch('accounts.models.timezone.now', return_value=now):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.post(reverse('accounts:login'), {
+                    'username_or_email': 'Reader@Example.com', 'password': 'old-pass-123'
+                }, format='json')
+            self.assertEqual(response.status_code, 200)
+            lookups = [q['sql'] for q in queries if q['sql'].startswith('SELECT') and 'FROM "users"' in q['sql']]
+            self.assertEqual(len(lookups), 1)
+            self.assertIn('LOWER', lookups[0])
+            self.assertEqual(len([q for q in queries if q['sql'].startswith('UPDATE "users"')]), 1)
+
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.post(reverse('accounts:login'), {
+                    'username_or_email': 'READER', 'password': 'old-pass-123'
+                }, format='json')
+            self.assertEqual(response.status_code, 200)
+            self.assertFalse([q for q in queries if q['sql'].startswith('UPDATE')])
+
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.last_login, now.replace(second=0))
+
+
+class TokenBlacklistTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        blacklist_filter.reset()
+        self.user = User.objects.create_user(
+            username='reader', email='reader@example.com', password='pass'
+        )
+        self.client = APIClient()
+
+    def refresh(self, token):
+        with CaptureQueriesContext(connection) as queries:
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post(reverse('accounts:token_refresh'), {'refresh': str(token)}, format='json')
+        checks = [q for q in queries if 'SELECT 1 AS "a" FROM "token_blacklist_blacklistedtoken"' in q['sql']]
+        return response, checks
+
+    def test_refresh_skips_the_blacklist_query_for_unlisted_tokens(self):
+        token = RefreshToken.for_user(self.user)
+        blacklist_filter.sync()
+        response, checks = self.refresh(token)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(checks, [])
+
+        # Rotation blacklisted the old token: it now reaches the database check
+        response, checks = self.refresh(token)
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(len(checks), 1)
+
+        # Another process: its filter is rebuilt from the table
+        blacklist_filter.reset()
+        cache.clear()
+        self.assertEqual(self.refresh(token)[0].status_code, 401)
+
+    def test_blacklistings_the_filter_has_not_loaded_are_still_rejected(self):
+        token = RefreshToken.for_user(self.user)
+        blacklist_filter.sync()
+        # Rotated in another process: this process's filter does not know yet
+        BlacklistedToken.objects.create(token=OutstandingToken.objects.get(jti=token['jti']))
+        response, checks = self.refresh(token)
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(checks, [])
+
+    def test_refresh_without_rotation_always_checks_the_table(self):
+        token = RefreshToken.for_user(self.user)
+        blacklist_filter.sync()
+        with mock.patch.object(api_settings, 'BLACKLIST_AFTER_ROTATION', False):
+            response, checks = self.refresh(token)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(checks), 1)
+
+    def test_logout_blacklists_the_refresh_token(self):
+        token = RefreshToken.for_user(self.user)
+        self.client.force_authenticate(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('accounts:logout'), {'refresh_token': str(token)}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(BlacklistedToken.objects.filter(token__jti=token['jti']).exists())
+        self.assertEqual(self.refresh(token)[0].status_code, 401)
+
+    def test_prune_deletes_only_expired_tokens(self):
+        now = aware_utcnow()
+        for jti, expires_at in (('old', now - timedelta(days=1)), ('live', now + timedelta(days=1))):
+            BlacklistedToken.objects.create(token=OutstandingToken.objects.create(
+                user=self.user, jti=jti, token=jti, expires_at=expires_at
+            ))
+
+        out = StringIO()
+        call_command('prune_tokens', chunk_size=1, stdout=out)
+        self.assertIn('Deleted 1 expired tokens (1 blacklisted)', out.getvalue())
+        self.assertEqual(list(OutstandingToken.objects.values_list('jti', flat=True)), ['live'])
+
+    def test_bloom_filter_has_no_false_negatives(self):
+        bloom = BloomFilter(1000)
+        for i in range(1000):
+            bloom.add(f'listed-{i}')
+        self.assertTrue(all(f'listed-{i}' in bloom for i in range(1000)))
+        false_positives = sum(f'other-{i}' in bloom for i in range(10000))
+        self.assertLess(false_positives, 50)
+
+
+class UserSearchTests(TestCase):
+    def setUp(self):
+        self.viewer = User.objects.create_user(username='viewer', email='viewer@example.com', password='pass')
+        for username, first_name, last_name in (
+            ('john', 'Plain', 'User'),
+            ('bigjohnny', 'Big', 'Jay'),
+            ('alicej', 'Alice', 'Johnson'),
+            ('johanna_k', 'Jo', 'K'),
+        ):
+            User.objects.create_user(
+                username=username, email=f'{username}@example.com', password='pass',
+                first_name=first_name, last_name=last_name
+            )
+        User.objects.create_user(username='johnold', email='old@example.com', password='pass', is_active=False)
+        self.client = APIClient()
+        self.client.force_authenticate(self.viewer)
+
+    def search(self, query, **params):
+        response = self.client.get(reverse('accounts:search_users'), {'q': query, **params})
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def usernames(self, query):
+        return [user['username'] for user in self.search(query).data['results']]
+
+    def test_ranks_exact_then_prefix_then_substring_matches(self):
+        self.assertEqual(self.usernames('JOHN'), ['john', 'alicej', 'bigjohnny'])
+        self.assertEqual(self.usernames('alice john'), ['alicej'])
+        # Short words only match word prefixes
+        self.assertEqual(self.usernames('jo'), ['johanna_k', 'alicej', 'john'])
+
+    def test_leaves_out_profiles_the_viewer_may_not_see(self):
+        User.objects.filter(username='john').update(privacy_setting='private')
+        User.objects.filter(username='alicej').update(privacy_setting='followers_only')
+        self.assertEqual(self.usernames('john'), ['bigjohnny'])
+
+        Follow.objects.create(follower=self.viewer, following=User.objects.get(username='alicej'))
+        self.assertEqual(self.usernames('john'), ['alicej', 'bigjohnny'])
+
+    def test_pages_by_cursor(self):
+        seen = []
+        response = self.search('john', page_size=1)
+        while True:
+            seen += [user['username'] for user in response.data['results']]
+            if not response.data['next']:
+                break
+            response = self.client.get(response.data['next'])
+        self.assertEqual(seen, ['john', 'alicej', 'bigjohnny'])
+
+    def test_renames_are_searchable_and_blank_queries_rejected(self):
+        user = User.objects.get(username='bigjohnny')
+        user.username = 'zed_big'
+        user.save()
+        self.assertEqual(self.usernames('zed'), ['zed_big'])
+        self.assertEqual(self.usernames('johnny'), [])
+
+        response = self.client.get(reverse('accounts:search_users'), {'q': '  '})
+        self.assertEqual(response.status_code, 400)
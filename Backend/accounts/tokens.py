@@ -0,0 +1,192 @@
+"""
+Refresh tokens with an in-process Bloom filter in front of the blacklist.
+
+simplejwt checks ``BlacklistedToken`` on every refresh. Almost every token
+presented was never blacklisted, so each process keeps a Bloom filter of
+blacklisted JTIs and only asks the database when the filter says "maybe".
+A Bloom filter has no false negatives, so a token the filter has loaded
+always reaches the database check.
+
+Each process reloads new blacklist rows every
+``TOKEN_BLACKLIST_FILTER_MAX_AGE_SECONDS``, so its filter can miss a token
+another process blacklisted since. That is safe because a refresh with
+rotation blacklists the token it was given: ``BlacklistedToken`` is
+one-to-one with its token, so inserting the row for a token that is already
+blacklisted finds the existing row, and ``RefreshToken.blacklist`` rejects
+the refresh. The filter only has to over-report, and no shared cache is
+needed. Without ``BLACKLIST_AFTER_ROTATION`` nothing re-checks the token,
+so every refresh queries the table as stock simplejwt does.
+"""
+import hashlib
+import logging
+import math
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer as BaseTokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import RefreshToken as BaseRefreshToken
+from rest_framework_simplejwt.utils import aware_utcnow
+
+logger = logging.getLogger('socialconnect')
+
+# Rows are re-read for this long after a sync in case ids commit out of order
+SYNC_OVERLAP_SECONDS = 60
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings."""
+
+    def __init__(self, capacity, error_rate=0.001):
+        self.capacity = capacity
+        self.size = max(64, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key):
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        step = int.from_bytes(digest[8:], 'little') | 1
+        return [(first + i * step) % self.size for i in range(self.hashes)]
+
+    def __contains__(self, key):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+    def add(self, key):
+        """Add ``key``; returns False if it (probably) was already present."""
+        if key in self:
+            return False
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+        return True
+
+
+class BlacklistFilter:
+    """The process's view of the blacklist, reloaded incrementally by id."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._filter = None
+        self._checked_at = 0.0
+        # (monotonic time, highest id seen) per sync, for the overlap window
+        self._marks = deque()
+
+    def might_contain(self, jti):
+        self.sync()
+        return jti in self._filter
+
+    def add(self, jti):
+        with self._lock:
+            if self._filter is not None:
+                self._filter.add(jti)
+
+    def reset(self):
+        with self._lock:
+            self._filter = None
+            self._marks.clear()
+
+    def sync(self):
+        if self._filter is not None and time.monotonic() - self._checked_at < filter_max_age():
+            return
+        with self._lock:
+            now = time.monotonic()
+            if self._filter is not None and now - self._checked_at < filter_max_age():
+                return
+            if self._filter is None or self._filter.count > self._filter.capacity:
+                self._rebuild()
+            else:
+                self._load_since(now)
+            self._checked_at = now
+
+    def _rebuild(self):
+        rows = list(
+            BlacklistedToken.objects.filter(token__expires_at__gt=aware_utcnow())
+            .values_list('id', 'token__jti')
+        )
+        capacity = max(getattr(settings, 'TOKEN_BLACKLIST_FILTER_CAPACITY', 100000), len(rows) * 2)
+        self._filter = BloomFilter(capacity)
+        for _, jti in rows:
+            self._filter.add(jti)
+        self._marks.clear()
+        self._marks.append((time.monotonic(), max((row_id for row_id, _ in rows), default=0)))
+        logger.info(f"Built token blacklist filter with {len(rows)} entries")
+
+    def _load_since(self, now):
+        while len(self._marks) > 1 and now - self._marks[1][0] > SYNC_OVERLAP_SECONDS:
+            self._marks.popleft()
+        after_id = self._marks[0][1]
+        rows = BlacklistedToken.objects.filter(id__gt=after_id).values_list('id', 'token__jti')
+        highest = self._marks[-1][1]
+        for row_id, jti in rows:
+            self._filter.add(jti)
+            highest = max(highest, row_id)
+        if highest != self._marks[-1][1]:
+            self._marks.append((now, highest))
+
+
+blacklist_filter = BlacklistFilter()
+
+
+def filter_max_age():
+    return getattr(settings, 'TOKEN_BLACKLIST_FILTER_MAX_AGE_SECONDS', 5)
+
+
+def blacklist_changed(jti):
+    """Record a committed blacklisting in this process's filter."""
+    blacklist_filter.add(jti)
+
+
+def rotation_blacklists():
+    """Whether every refresh blacklists the token it was given."""
+    return api_settings.ROTATE_REFRESH_TOKENS and api_settings.BLACKLIST_AFTER_ROTATION
+
+
+def prune_expired_tokens(chunk_size=1000, pause=0, dry_run=False):
+    """
+    Delete expired outstanding tokens, and with them their blacklist rows,
+    one chunk per query. Returns ``(outstanding, blacklisted)`` row counts.
+    """
+    expired = OutstandingToken.objects.filter(expires_at__lte=aware_utcnow()).order_by('id')
+    outstanding = blacklisted = 0
+    last_id = 0
+    while True:
+        ids = list(expired.filter(id__gt=last_id).values_list('id', flat=True)[:chunk_size])
+        if not ids:
+            break
+        last_id = ids[-1]
+        if dry_run:
+            blacklisted += BlacklistedToken.objects.filter(token_id__in=ids).count()
+        else:
+            _, deleted = OutstandingToken.objects.filter(id__in=ids).delete()
+            blacklisted += deleted.get(BlacklistedToken._meta.label, 0)
+        outstanding += len(ids)
+        if pause:
+            time.sleep(pause)
+    return outstanding, blacklisted
+
+
+class RefreshToken(BaseRefreshToken):
+    """Refresh token whose blacklist check goes through ``blacklist_filter``."""
+
+    def check_blacklist(self):
+        # With rotation, blacklist() catches whatever the filter has not loaded yet
+        if not rotation_blacklists() or blacklist_filter.might_contain(self.payload[api_settings.JTI_CLAIM]):
+            super().check_blacklist()
+
+    def blacklist(self):
+        blacklisted, created = super().blacklist()
+        if not created:
+            # Blacklisted before, possibly by another process since this one's filter synced
+            raise TokenError(_("Token is blacklisted"))
+        return blacklisted, created
+
+
+class TokenRefreshSerializer(BaseTokenRefreshSerializer):
+    token_class = RefreshToken
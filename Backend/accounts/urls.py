@@ -19,6 +19,7 @@ urlpatterns = [
     path('users/me/', views.current_user_profile, name='current_user'),
     path('users/me/update/', views.UserProfileUpdateView.as_view(), name='update_profile'),
     path('users/me/avatar/', views.AvatarUploadView.as_view(), name='upload_avatar'),
+    path('users/search/', views.UserSearchView.as_view(), name='search_users'),
     path('users/<int:pk>/', views.UserProfileView.as_view(), name='user_profile'),
     
     # Admin User Management
@@ -2,7 +2,6 @@ from rest_framework import status, generics, permissions
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework_simplejwt.views import TokenRefreshView
 from rest_framework_simplejwt.exceptions import TokenError, InvalidToken
 from django.contrib.auth import update_session_auth_hash
@@ -14,16 +13,26 @@ from django.utils.encoding import force_bytes, force_str
 from django.template.loader import render_to_string
 from django.utils import timezone
 
+from utils.pagination import KeysetPagination
+from .hashing import PasswordHashingBusy
 from .models import User
+from .search import search_users
+from .tokens import RefreshToken
 from .serializers import (
     UserRegistrationSerializer, UserLoginSerializer, UserProfileSerializer,
     UserProfileUpdateSerializer, PasswordChangeSerializer, PasswordResetSerializer,
-    UserListSerializer
+    UserListSerializer, UserCardSerializer
 )
 from .permissions import IsAdminOrOwner, IsAdminUser
 from .storage import avatar_storage
 
 
+def hashing_busy_response(exc):
+    return Response({
+        'error': 'Too many sign-ins right now. Please try again shortly.'
+    }, status=status.HTTP_503_SERVICE_UNAVAILABLE, headers={'Retry-After': str(exc.retry_after)})
+
+
 class UserRegistrationView(APIView):
     """User registration endpoint."""
     permission_classes = [permissions.AllowAny]
@@ -31,7 +40,10 @@ class UserRegistrationView(APIView):
     def post(self, request):
         serializer = UserRegistrationSerializer(data=request.data)
         if serializer.is_valid():
-            user = serializer.save()
+            try:
+                user = serializer.save()
+            except PasswordHashingBusy as exc:
+                return hashing_busy_response(exc)
             # Generate tokens
             refresh = RefreshToken.for_user(user)
             access_token = refresh.access_token
@@ -59,12 +71,15 @@ class UserLoginView(APIView):
             data=request.data,
             context={'request': request}
         )
-        if serializer.is_valid():
+        try:
+            valid = serializer.is_valid()
+        except PasswordHashingBusy as exc:
+            return hashing_busy_response(exc)
+        if valid:
             user = serializer.validated_data['user']
             
-            # Update last login
-            user.last_login = timezone.now()
-            user.save(update_fields=['last_login'])
+            # At most one write per user per minute
+            user.record_login()
             
             # Generate tokens
             refresh = RefreshToken.for_user(user)
@@ -123,7 +138,9 @@ class UserProfileUpdateView(generics.UpdateAPIView):
     permission_classes = [permissions.IsAuthenticated]
     
     def get_object(self):
-        return self.request.user
+        # request.user may come from the auth cache; saving it would write
+        # back stale columns over concurrent changes
+        return User.objects.get(pk=self.request.user.pk)
 
 
 class AvatarUploadView(APIView):
@@ -184,7 +201,7 @@ class PasswordChangeView(APIView):
         if serializer.is_valid():
             user = request.user
             user.set_password(serializer.validated_data['new_password'])
-            user.save()
+            user.save(update_fields=['password'])
             
             # Update session to prevent logout
             update_session_auth_hash(request, user)
@@ -244,16 +261,38 @@ class UserListView(generics.ListAPIView):
         queryset = super().get_queryset()
         search = self.request.query_params.get('search', None)
         if search:
-            queryset = queryset.filter(
-                username__icontains=search
-            ) | queryset.filter(
-                first_name__icontains=search
-            ) | queryset.filter(
-                last_name__icontains=search
-            )
+            return search_users(queryset, search).order_by('search_rank', '-created_at')
         return queryset.order_by('-created_at')
 
 
+class UserSearchPagination(KeysetPagination):
+    ordering = ('search_rank', 'username', 'id')
+
+
+class UserSearchView(generics.ListAPIView):
+    """Search active users whose profile the requester may see, best matches first."""
+    serializer_class = UserCardSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = UserSearchPagination
+    max_query_length = 100
+
+    def list(self, request, *args, **kwargs):
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response({
+                'error': 'Search query "q" is required.'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        if len(query) > self.max_query_length:
+            return Response({
+                'error': f'Search query must be at most {self.max_query_length} characters.'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        users = User.objects.filter(User.visible_to(request.user), is_active=True)
+        page = self.paginate_queryset(search_users(users, query))
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+
 class UserDeactivateView(APIView):
     """Deactivate user (admin only)."""
     permission_classes = [IsAdminUser]
@@ -262,7 +301,7 @@ class UserDeactivateView(APIView):
         try:
             user = User.objects.get(id=user_id)
             user.is_active = False
-            user.save()
+            user.save(update_fields=['is_active'])
             return Response({
                 'message': f'User @{user.username} has been deactivated.'
             }, status=status.HTTP_200_OK)
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Notification
+from .models import BroadcastNotification, Notification, NotificationOutbox
 
 
 @admin.register(Notification)
@@ -34,3 +34,23 @@ class NotificationAdmin(admin.ModelAdmin):
     def message_preview(self, obj):
         return obj.message[:50] + '...' if len(obj.message) > 50 else obj.message
     message_preview.short_description = 'Message Preview'
+
+
+@admin.register(NotificationOutbox)
+class NotificationOutboxAdmin(admin.ModelAdmin):
+    """Admin configuration for pending realtime deliveries."""
+
+    list_display = ('notification', 'attempts', 'next_attempt_at', 'failed', 'created_at')
+    list_filter = ('failed',)
+    readonly_fields = ('notification', 'payload', 'created_at')
+    ordering = ('id',)
+
+
+@admin.register(BroadcastNotification)
+class BroadcastNotificationAdmin(admin.ModelAdmin):
+    """Admin configuration for broadcast notifications."""
+
+    list_display = ('sender', 'notification_type', 'message', 'created_at')
+    list_filter = ('notification_type', 'created_at')
+    search_fields = ('message',)
+    ordering = ('-created_at',)
@@ -0,0 +1,192 @@
+"""
+Pub/sub bus for live notification delivery.
+
+The notification write path publishes each committed notification to the
+bus, and async consumers (the SSE stream and long-poll endpoints) subscribe
+per recipient. Subscribers are ``asyncio.Queue`` objects owned by the
+server's event loop, so an idle connection costs a queue and a coroutine,
+not a thread.
+
+``InProcessBus`` only reaches subscribers in the publishing process, which
+is enough for a single ASGI worker and for tests. ``RedisBus`` publishes
+through Redis so every worker receives every event; each process holds one
+pattern subscription and fans events out to its local queues.
+"""
+import asyncio
+import json
+import logging
+import threading
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger('socialconnect')
+
+QUEUE_SIZE = 100
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+MICROSECOND = timedelta(microseconds=1)
+
+
+def notification_event(notification):
+    """Event published for a saved notification."""
+    from .models import NotificationOutbox
+
+    event = NotificationOutbox.build_payload(notification)
+    event.update({
+        'id': notification.id,
+        'actor_count': notification.actor_count,
+        'recent_actors': notification.recent_actors,
+        'cursor': event_cursor(notification.created_at, notification.id),
+    })
+    return event
+
+
+def event_cursor(created_at, notification_id):
+    """
+    Resume position of a notification. Grouped notifications move forward
+    in time when updated in place, so the cursor is (created_at, id) rather
+    than the id alone.
+    """
+    return f"{(created_at - EPOCH) // MICROSECOND}-{notification_id}"
+
+
+def parse_cursor(value):
+    """
+    Return ``(created_at, id)`` for a cursor, ``(None, id)`` for a bare
+    notification id, or None if it cannot be parsed.
+    """
+    try:
+        if '-' in value:
+            timestamp, notification_id = value.split('-', 1)
+            return EPOCH + int(timestamp) * MICROSECOND, int(notification_id)
+        return None, int(value)
+    except (TypeError, ValueError, OverflowError):
+        return None
+
+
+class InProcessBus:
+    """Deliver events to subscribers in this process."""
+
+    def __init__(self):
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def publish(self, recipient_id, event):
+        """Publish from any thread; never blocks the caller."""
+        self._deliver(recipient_id, event)
+
+    def _deliver(self, recipient_id, event):
+        with self._lock:
+            subscribers = list(self._subscribers.get(recipient_id, ()))
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(self._offer, queue, event)
+            except RuntimeError:
+                # The subscriber's loop has shut down
+                pass
+
+    @staticmethod
+    def _offer(queue, event):
+        if queue.full():
+            # A stalled consumer loses the oldest event, never the newest
+            queue.get_nowait()
+        queue.put_nowait(event)
+
+    def subscribe(self, recipient_id):
+        """
+        Return a queue receiving the recipient's events. Call from the
+        consuming event loop and pair with ``unsubscribe``.
+        """
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+        with self._lock:
+            self._subscribers[recipient_id].add((loop, queue))
+        self._on_subscribe(loop)
+        return queue
+
+    def unsubscribe(self, recipient_id, queue):
+        with self._lock:
+            entries = self._subscribers.get(recipient_id, set())
+            entries.difference_update({entry for entry in entries if entry[1] is queue})
+            if not entries:
+                self._subscribers.pop(recipient_id, None)
+
+    def _on_subscribe(self, loop):
+        pass
+
+    def subscriber_count(self):
+        with self._lock:
+            return sum(len(entries) for entries in self._subscribers.values())
+
+
+class RedisBus(InProcessBus):
+    """Fan events out to every worker process through Redis pub/sub."""
+
+    prefix = 'notifications:'
+
+    def __init__(self, url=None):
+        super().__init__()
+        # Imported here so Redis is only required when this bus is selected
+        import redis
+        import redis.asyncio
+
+        self.url = url or settings.REDIS_URL
+        self._client = redis.Redis.from_url(self.url)
+        self._async_redis = redis.asyncio
+        self._listeners = {}
+
+    def publish(self, recipient_id, event):
+        try:
+            self._client.publish(f'{self.prefix}{recipient_id}', json.dumps(event))
+        except Exception as e:
+            logger.error(f"Error publishing notification event: {e}")
+
+    def _on_subscribe(self, loop):
+        # One pattern subscription per event loop serves all local subscribers
+        task = self._listeners.get(loop)
+        if task is None or task.done():
+            self._listeners[loop] = loop.create_task(self._listen())
+
+    async def _listen(self):
+        client = self._async_redis.Redis.from_url(self.url)
+        pubsub = client.pubsub()
+        await pubsub.psubscribe(f'{self.prefix}*')
+        try:
+            async for message in pubsub.listen():
+                if message['type'] != 'pmessage':
+                    continue
+                channel = message['channel'].decode()
+                recipient_id = int(channel[len(self.prefix):])
+                self._deliver(recipient_id, json.loads(message['data']))
+        finally:
+            await pubsub.aclose()
+            await client.aclose()
+
+
+_buses = {}
+_bus_lock = threading.Lock()
+
+
+def get_bus():
+    """Return the process-wide bus selected by ``NOTIFICATION_BUS``."""
+    path = getattr(settings, 'NOTIFICATION_BUS', None)
+    if not path:
+        path = (
+            'notifications.bus.RedisBus'
+            if getattr(settings, 'REDIS_URL', None)
+            else 'notifications.bus.InProcessBus'
+        )
+    if path not in _buses:
+        with _bus_lock:
+            if path not in _buses:
+                _buses[path] = import_string(path)()
+    return _buses[path]
+
+
+def publish_notifications(notifications):
+    """Publish committed notifications to their recipients' subscribers."""
+    bus = get_bus()
+    for notification in notifications:
+        bus.publish(notification.recipient_id, notification_event(notification))
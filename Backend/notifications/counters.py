@@ -0,0 +1,116 @@
+"""
+Incrementally maintained unread notification counts.
+
+Each user's unread count lives in ``UnreadNotificationCounter`` and is
+adjusted in the same transaction as the notification write or read-marking
+that changes it, so the unread-count endpoint is a primary-key lookup.
+
+Admin broadcasts are stored once; a user's unread broadcasts are those after
+the ``broadcast_read_id`` watermark kept on the same row.
+
+Counters are created lazily: the first read for a user falls back to a
+COUNT over the ``(recipient, is_read)`` index and stores the result.
+Adjustments only touch existing counters, and the ``reconcile_unread_counts``
+command periodically recomputes them to correct any drift (for example from
+notifications removed by cascading deletes).
+"""
+from collections import Counter, defaultdict
+
+from django.db import transaction
+from django.db.models import Count, F, Func, Max, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import BroadcastNotification, Notification, UnreadNotificationCounter
+from .stats import StatDeltas, adjust_notification_stats
+
+
+def adjust_unread_counts(deltas):
+    """Apply ``{user_id: delta}``; one UPDATE per distinct delta."""
+    by_delta = defaultdict(list)
+    for user_id, delta in deltas.items():
+        if delta:
+            by_delta[delta].append(user_id)
+    for delta, user_ids in by_delta.items():
+        UnreadNotificationCounter.objects.filter(user_id__in=user_ids).update(
+            unread_count=Greatest(F('unread_count') + delta, Value(0))
+        )
+
+
+def mark_notifications_read(notifications):
+    """
+    Mark the unread notifications in a queryset read, adjusting unread
+    counters and admin statistics. Returns how many were marked.
+    """
+    with transaction.atomic():
+        rows = list(
+            notifications.filter(is_read=False).select_for_update()
+            .values_list('id', 'recipient_id', 'created_at', 'notification_type')
+        )
+        if not rows:
+            return 0
+        Notification.objects.filter(id__in=[row[0] for row in rows]).update(is_read=True)
+
+        unread_deltas = Counter()
+        stat_deltas = StatDeltas()
+        for _, recipient_id, created_at, notification_type in rows:
+            unread_deltas[recipient_id] -= 1
+            stat_deltas.add(created_at, notification_type, unread=-1)
+        adjust_unread_counts(unread_deltas)
+        adjust_notification_stats(stat_deltas)
+    return len(rows)
+
+
+def get_unread_count(user):
+    """
+    Return the user's unread count, including unread broadcasts, in one
+    query. The counter is created on first use.
+    """
+    unread_broadcasts = (
+        BroadcastNotification.visible_to(user)
+        .filter(id__gt=OuterRef('broadcast_read_id'))
+        .order_by().annotate(total=Func(F('id'), function='COUNT')).values('total')
+    )
+    row = (
+        UnreadNotificationCounter.objects.filter(user_id=user.id)
+        .annotate(broadcasts=Subquery(unread_broadcasts))
+        .values_list('unread_count', 'broadcasts').first()
+    )
+    if row is not None:
+        return row[0] + (row[1] or 0)
+
+    count = Notification.objects.filter(recipient_id=user.id, is_read=False).count()
+    UnreadNotificationCounter.objects.bulk_create(
+        [UnreadNotificationCounter(user_id=user.id, unread_count=count)],
+        ignore_conflicts=True
+    )
+    return count + BroadcastNotification.visible_to(user).count()
+
+
+def mark_broadcasts_read(user, up_to_id=None):
+    """
+    Advance the user's broadcast watermark to ``up_to_id`` (default: the
+    latest broadcast). Watermarks never move backwards.
+    """
+    if up_to_id is None:
+        up_to_id = BroadcastNotification.objects.aggregate(latest=Max('id'))['latest']
+        if up_to_id is None:
+            return
+    counters = UnreadNotificationCounter.objects.filter(user_id=user.id)
+    if not counters.update(broadcast_read_id=Greatest(F('broadcast_read_id'), Value(up_to_id))):
+        get_unread_count(user)
+        counters.update(broadcast_read_id=Greatest(F('broadcast_read_id'), Value(up_to_id)))
+
+
+def reconcile_unread_counts(user_ids=None):
+    """
+    Recompute stored counters from the notifications table in a single
+    UPDATE, so concurrent adjustments are never overwritten by a stale read.
+    """
+    unread = (
+        Notification.objects.filter(recipient_id=OuterRef('user_id'), is_read=False)
+        .order_by().values('recipient_id').annotate(total=Count('id')).values('total')
+    )
+    counters = UnreadNotificationCounter.objects.all()
+    if user_ids is not None:
+        counters = counters.filter(user_id__in=user_ids)
+    return counters.update(unread_count=Coalesce(Subquery(unread), 0))
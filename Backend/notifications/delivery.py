@@ -0,0 +1,160 @@
+"""
+Realtime notification delivery.
+
+Notifications are never pushed from the request thread. Each one gets a
+``NotificationOutbox`` row in the same transaction that writes it, and the
+``deliver_notifications`` worker drains the outbox in batches through a
+transport: the process-wide pooled Supabase client in production, or the in-memory stub
+when Supabase is not configured (local development and tests).
+
+Failed batches are retried with exponential backoff and jitter; entries are
+marked failed after ``NOTIFICATION_DELIVERY_MAX_ATTEMPTS``. Delivering or
+rescheduling an entry only touches it if its revision is unchanged, so a
+notification re-queued while its entry was claimed is sent again.
+"""
+import logging
+import random
+import threading
+from collections import deque
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from utils.clients import supabase_client
+
+from .models import NotificationOutbox
+
+logger = logging.getLogger('socialconnect')
+
+
+class SupabaseTransport:
+    """Insert realtime rows into a Supabase table over the shared pooled client."""
+
+    table = 'realtime_notifications'
+
+    def send(self, payloads):
+        supabase_client().insert(self.table, payloads)
+
+
+class StubTransport:
+    """Keep delivered payloads in memory instead of calling a remote service."""
+
+    def __init__(self, maxlen=1000):
+        self.sent = deque(maxlen=maxlen)
+        self.fail_next = 0
+
+    def send(self, payloads):
+        if self.fail_next:
+            self.fail_next -= 1
+            raise ConnectionError('Stub transport failure')
+        self.sent.extend(payloads)
+
+
+_transports = {}
+_transport_lock = threading.Lock()
+
+
+def get_transport():
+    """Return the process-wide transport, created on first use."""
+    path = getattr(settings, 'NOTIFICATION_REALTIME_TRANSPORT', None)
+    if not path:
+        path = (
+            'notifications.delivery.SupabaseTransport'
+            if getattr(settings, 'SUPABASE_URL', '')
+            else 'notifications.delivery.StubTransport'
+        )
+    if path not in _transports:
+        with _transport_lock:
+            if path not in _transports:
+                _transports[path] = import_string(path)()
+    return _transports[path]
+
+
+def backoff_delay(attempts):
+    """Exponential backoff with full jitter, capped."""
+    base = getattr(settings, 'NOTIFICATION_DELIVERY_BACKOFF_SECONDS', 2)
+    cap = getattr(settings, 'NOTIFICATION_DELIVERY_MAX_BACKOFF_SECONDS', 600)
+    return timedelta(seconds=random.uniform(0, min(cap, base * 2 ** attempts)))
+
+
+def claim_batch(batch_size, lease_seconds=60):
+    """
+    Claim up to ``batch_size`` due outbox entries.
+
+    Claimed entries are pushed ``lease_seconds`` into the future, so a worker
+    that dies mid-batch only delays them; rows locked by another worker are
+    skipped where the database supports it.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        entries = list(
+            NotificationOutbox.objects
+            .select_for_update(skip_locked=True)
+            .filter(failed=False, next_attempt_at__lte=now)
+            .order_by('id')[:batch_size]
+        )
+        if entries:
+            NotificationOutbox.objects.filter(id__in=[entry.id for entry in entries]).update(
+                next_attempt_at=now + timedelta(seconds=lease_seconds)
+            )
+    return entries
+
+
+def unchanged(entries):
+    """
+    Outbox rows still at the revision they were claimed at. An entry
+    re-queued meanwhile carries a newer payload and must stay queued.
+    """
+    query = Q()
+    for entry in entries:
+        query |= Q(id=entry.id, revision=entry.revision)
+    return NotificationOutbox.objects.filter(query)
+
+
+def deliver_batch(entries, transport):
+    """Send one batch; delete it on success, reschedule it on failure."""
+    try:
+        transport.send([entry.payload for entry in entries])
+    except Exception as e:
+        max_attempts = getattr(settings, 'NOTIFICATION_DELIVERY_MAX_ATTEMPTS', 8)
+        now = timezone.now()
+        for entry in entries:
+            entry.attempts += 1
+            entry.last_error = str(e)[:1000]
+            entry.failed = entry.attempts >= max_attempts
+            entry.next_attempt_at = now + backoff_delay(entry.attempts)
+        unchanged(entries).bulk_update(
+            entries, ['attempts', 'last_error', 'failed', 'next_attempt_at']
+        )
+        logger.warning(f"Realtime delivery of {len(entries)} notification(s) failed: {e}")
+        return 0
+
+    unchanged(entries).delete()
+    return len(entries)
+
+
+def drain_outbox(transport=None, batch_size=None, max_batches=None):
+    """
+    Deliver due outbox entries until none are left (or ``max_batches``).
+    Returns ``(delivered, failed_batches)``.
+    """
+    transport = transport or get_transport()
+    batch_size = batch_size or getattr(settings, 'NOTIFICATION_DELIVERY_BATCH_SIZE', 100)
+
+    delivered = failed_batches = batches = 0
+    while max_batches is None or batches < max_batches:
+        entries = claim_batch(batch_size)
+        if not entries:
+            break
+        batches += 1
+        sent = deliver_batch(entries, transport)
+        delivered += sent
+        if not sent:
+            failed_batches += 1
+            # The entries are backed off; leave the rest for the next pass
+            break
+    return delivered, failed_batches
@@ -0,0 +1,249 @@
+"""
+Notification dispatch pipeline.
+
+Domain events (follow, like, comment) are emitted exactly once, from the
+``post_save`` receivers in ``notifications.signals`` or from bulk write paths
+that bypass signals. Events are held until the surrounding transaction
+commits, de-duplicated, grouped, and written in bulk once per transaction
+(once per savepoint that emitted events, so that rolling one back drops only
+its events). Outside a transaction an event is written immediately. Realtime delivery is
+queued in the outbox alongside the rows (see ``notifications.delivery``) and
+live streams are notified through the bus once they commit.
+"""
+import logging
+import threading
+import weakref
+from collections import Counter, namedtuple
+from functools import partial
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+logger = logging.getLogger('socialconnect')
+
+NotificationEvent = namedtuple(
+    'NotificationEvent',
+    ['notification_type', 'sender_id', 'sender_username', 'recipient_id', 'post_id']
+)
+
+_state = threading.local()
+
+
+def follow_event(follower, following_id):
+    return NotificationEvent('follow', follower.id, follower.username, following_id, None)
+
+
+def like_event(user, post):
+    return NotificationEvent('like', user.id, user.username, post.author_id, post.id)
+
+
+def comment_event(user, post):
+    return NotificationEvent('comment', user.id, user.username, post.author_id, post.id)
+
+
+def event_key(event):
+    """Events with the same key describe the same notification."""
+    return event.notification_type, event.sender_id, event.recipient_id, event.post_id
+
+
+class _Batch:
+    """Events emitted at one savepoint level of a transaction, written when it commits."""
+
+    def __init__(self, savepoints):
+        self.savepoints = savepoints
+        self.events = {}
+        self.flushed = False
+
+    def add(self, event):
+        self.events.setdefault(event_key(event), event)
+
+    def flush(self):
+        self.flushed = True
+        batches = _pending_batches()
+        if batches.get(self.savepoints) is self:
+            del batches[self.savepoints]
+        try:
+            write_events(list(self.events.values()))
+        except Exception:
+            # The action that emitted these has already committed; failing
+            # here would only turn its response into a 500
+            logger.exception(f"Error writing {len(self.events)} notification event(s)")
+
+
+def _pending_batches():
+    """
+    This thread's unflushed batches by savepoint stack.
+
+    Only the batch's on_commit callback holds it, so a rolled-back
+    transaction or savepoint, which discards the callback, also drops the
+    batch from here.
+    """
+    batches = getattr(_state, 'batches', None)
+    if batches is None:
+        batches = _state.batches = weakref.WeakValueDictionary()
+    return batches
+
+
+def emit(event):
+    """Queue a notification event for delivery after commit."""
+    if event.recipient_id is None or event.sender_id == event.recipient_id:
+        # Users are never notified about their own actions
+        return
+
+    connection = transaction.get_connection()
+    if not connection.in_atomic_block:
+        write_events([event])
+        return
+
+    savepoints = tuple(connection.savepoint_ids)
+    batches = _pending_batches()
+    batch = batches.get(savepoints)
+    if batch is None or batch.flushed:
+        batch = batches[savepoints] = _Batch(savepoints)
+        transaction.on_commit(batch.flush)
+    batch.add(event)
+
+
+def group_key(event):
+    return event.notification_type, event.recipient_id, event.post_id
+
+
+def open_groups(keys, recipient_ids=()):
+    """
+    Latest grouped notification per key still inside the grouping window,
+    locked, and which of ``recipient_ids`` already have any notification.
+    Both come from one query: the group lookup also fetches each recipient's
+    latest notification.
+    """
+    from .models import Notification
+
+    window_start = timezone.now() - timedelta(hours=getattr(settings, 'NOTIFICATION_GROUP_WINDOW_HOURS', 24))
+    query = Q()
+    for notification_type, recipient_id, post_id in keys:
+        query |= Q(
+            notification_type=notification_type, recipient_id=recipient_id, post_id=post_id,
+            created_at__gte=window_start
+        )
+    for recipient_id in recipient_ids:
+        query |= Q(id__in=(
+            Notification.objects.filter(recipient_id=recipient_id)
+            .order_by('-created_at').values('id')[:1]
+        ))
+    if not query:
+        return {}, set()
+
+    groups = {}
+    recipients = set()
+    for row in Notification.objects.select_for_update().filter(query).order_by('created_at'):
+        recipients.add(row.recipient_id)
+        key = (row.notification_type, row.recipient_id, row.post_id)
+        if key in keys and row.created_at >= window_start:
+            groups[key] = row
+    return groups, recipients
+
+
+def add_actors(notification, events):
+    """Fold events, oldest first, into a grouped notification in place."""
+    from .models import Notification
+
+    for event in events:
+        actors = notification.recent_actors
+        if not any(actor['id'] == event.sender_id for actor in actors):
+            notification.actor_count += 1
+        notification.recent_actors = [
+            {'id': event.sender_id, 'username': event.sender_username}
+        ] + [actor for actor in actors if actor['id'] != event.sender_id]
+        notification.recent_actors = notification.recent_actors[:Notification.MAX_RECENT_ACTORS]
+        notification.sender_id = event.sender_id
+
+    notification.message = Notification.group_message(
+        notification.notification_type,
+        notification.recent_actors[0]['username'],
+        notification.actor_count
+    )
+
+
+def write_events(events):
+    """
+    Persist de-duplicated events, queueing their realtime delivery in the
+    same transaction.
+
+    Like and comment events are folded into the open group for their
+    (recipient, post, type) when one exists, so a popular post keeps a
+    single row that is updated in place rather than one row per actor.
+    """
+    from .bus import publish_notifications
+    from .counters import adjust_unread_counts
+    from .models import Notification, NotificationOutbox
+    from .stats import StatDeltas, adjust_notification_stats, adjust_recipient_count
+
+    unique = {}
+    for event in events:
+        unique.setdefault(event_key(event), event)
+    if not unique:
+        return []
+
+    grouped = {}
+    new_rows = []
+    for event in unique.values():
+        if event.notification_type in Notification.GROUPED_TYPES and event.post_id:
+            grouped.setdefault(group_key(event), []).append(event)
+        else:
+            new_rows.append(Notification(
+                recipient_id=event.recipient_id,
+                sender_id=event.sender_id,
+                notification_type=event.notification_type,
+                post_id=event.post_id,
+                message=f"@{event.sender_username} started following you",
+                recent_actors=[{'id': event.sender_id, 'username': event.sender_username}],
+            ))
+
+    with transaction.atomic():
+        existing, known_recipients = open_groups(grouped, {event.recipient_id for event in unique.values()})
+        updated = []
+        unread_deltas = Counter()
+        stat_deltas = StatDeltas()
+        for key, group_events in grouped.items():
+            notification = existing.get(key)
+            if notification is None:
+                notification = Notification(
+                    recipient_id=key[1],
+                    notification_type=key[0],
+                    post_id=key[2],
+                    actor_count=0,
+                )
+                new_rows.append(notification)
+            else:
+                # Resurface the group as the newest, unread activity
+                if notification.is_read:
+                    unread_deltas[notification.recipient_id] += 1
+                # The group moves out of the hour it was counted in
+                stat_deltas.add(
+                    notification.created_at, notification.notification_type,
+                    total=-1, unread=-(not notification.is_read)
+                )
+                notification.created_at = timezone.now()
+                notification.is_read = False
+                updated.append(notification)
+            add_actors(notification, group_events)
+
+        if updated:
+            Notification.objects.bulk_update(updated, [
+                'sender', 'message', 'actor_count', 'recent_actors', 'is_read', 'created_at'
+            ])
+        created = Notification.objects.bulk_create(new_rows)
+        for notification in created:
+            unread_deltas[notification.recipient_id] += 1
+        for notification in created + updated:
+            stat_deltas.add(notification.created_at, notification.notification_type, total=1, unread=1)
+        adjust_unread_counts(unread_deltas)
+        adjust_notification_stats(stat_deltas)
+        adjust_recipient_count(len({notification.recipient_id for notification in created} - known_recipients))
+        NotificationOutbox.enqueue(created + updated)
+        transaction.on_commit(partial(publish_notifications, created + updated))
+
+    return created + updated
@@ -0,0 +1,74 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from notifications.delivery import drain_outbox, get_transport
+
+
+class Command(BaseCommand):
+    help = 'Deliver queued realtime notifications from the outbox'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=None,
+            help='Outbox entries sent per transport call'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Threads draining the outbox concurrently (sharing one transport)'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=1.0,
+            help='Seconds to sleep when the outbox is empty'
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Drain what is due and exit instead of polling'
+        )
+
+    def handle(self, *args, **options):
+        transport = get_transport()
+        workers = max(1, options['workers'])
+        self.stdout.write(
+            f'Delivering with {type(transport).__name__} ({workers} worker(s))'
+        )
+
+        def drain():
+            try:
+                return drain_outbox(transport, options['batch_size'])
+            finally:
+                if workers > 1:
+                    # Worker threads open their own connections
+                    connection.close()
+
+        try:
+            while True:
+                if workers == 1:
+                    results = [drain()]
+                else:
+                    with ThreadPoolExecutor(max_workers=workers) as pool:
+                        results = list(pool.map(lambda _: drain(), range(workers)))
+
+                delivered = sum(sent for sent, _ in results)
+                failed = sum(failures for _, failures in results)
+                if delivered or failed:
+                    self.stdout.write(
+                        f'Delivered {delivered} notification(s), {failed} failed batch(es)'
+                    )
+                if options['once']:
+                    break
+                if not delivered:
+                    time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
+
+        self.stdout.write(self.style.SUCCESS('Delivery worker stopped'))
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from notifications import partitions
+
+
+class Command(BaseCommand):
+    help = 'Partition the notifications table by month (PostgreSQL only)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--convert',
+            action='store_true',
+            help='Rebuild the existing table as a partitioned table (run in a maintenance window)'
+        )
+        parser.add_argument(
+            '--months-ahead',
+            type=int,
+            default=3,
+            help='Future monthly partitions to keep created'
+        )
+
+    def handle(self, *args, **options):
+        if not partitions.is_supported():
+            raise CommandError('Notification partitioning requires PostgreSQL')
+
+        if options['convert'] and not partitions.is_partitioned():
+            copied = partitions.convert_to_partitioned(options['months_ahead'])
+            self.stdout.write(f'Converted notifications table ({copied} rows copied)')
+        elif not partitions.is_partitioned():
+            raise CommandError('The notifications table is not partitioned; run with --convert')
+
+        created = partitions.ensure_partitions(options['months_ahead'])
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(partitions.list_partitions())} monthly partitions, up to {created[-1]}'
+        ))
@@ -0,0 +1,90 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from notifications import partitions
+from notifications.retention import NotificationArchive, prune_notifications, retention_days
+
+
+class Command(BaseCommand):
+    help = 'Delete read notifications past their retention period, archiving them first'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--archive-dir',
+            default=None,
+            help='Directory for compressed NDJSON archives (defaults to NOTIFICATION_ARCHIVE_DIR)'
+        )
+        parser.add_argument(
+            '--no-archive',
+            action='store_true',
+            help='Delete without archiving'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=1000,
+            help='Rows deleted per transaction'
+        )
+        parser.add_argument(
+            '--sleep',
+            type=float,
+            default=0,
+            help='Seconds to pause between chunks'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Count expired notifications without deleting them'
+        )
+        parser.add_argument(
+            '--drop-partitions',
+            type=int,
+            default=None,
+            metavar='DAYS',
+            help='PostgreSQL only: also drop monthly partitions older than DAYS, read or not'
+        )
+
+    def handle(self, *args, **options):
+        if options['drop_partitions'] is not None and not partitions.is_partitioned():
+            raise CommandError('The notifications table is not partitioned')
+
+        for notification_type, days in retention_days().items():
+            self.stdout.write(f'{notification_type}: keeping read notifications for {days} days')
+
+        archive = None
+        if not options['no_archive'] and not options['dry_run']:
+            archive = NotificationArchive(options['archive_dir'] or settings.NOTIFICATION_ARCHIVE_DIR)
+
+        def progress(notification_type, rows, rate):
+            self.stdout.write(f'[{notification_type}] {rows} rows ({rate:.0f} rows/s)')
+
+        started = time.monotonic()
+        try:
+            moved = prune_notifications(
+                archive=archive,
+                chunk_size=options['chunk_size'],
+                dry_run=options['dry_run'],
+                pause=options['sleep'],
+                progress=progress,
+            )
+            if options['drop_partitions'] is not None and not options['dry_run']:
+                cutoff = timezone.now() - timedelta(days=options['drop_partitions'])
+                for name, rows in partitions.drop_partitions_before(cutoff, archive).items():
+                    self.stdout.write(f'Dropped partition {name} ({rows} rows)')
+                    moved[name] = rows
+        finally:
+            if archive is not None:
+                archive.close()
+
+        total = sum(moved.values())
+        elapsed = max(time.monotonic() - started, 1e-6)
+        verb = 'Would prune' if options['dry_run'] else 'Pruned'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} {total} notifications in {elapsed:.1f}s ({total / elapsed:.0f} rows/s)'
+        ))
+        if archive is not None and archive.rows:
+            self.stdout.write(f'Archived {archive.rows} rows to {archive.path}')
@@ -0,0 +1,26 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from notifications.stats import rebuild_notification_stats
+
+
+class Command(BaseCommand):
+    help = 'Recompute the hourly notification statistics rollup from the notifications table'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--hours',
+            type=int,
+            default=None,
+            help='Only rebuild the most recent HOURS (default: everything)'
+        )
+
+    def handle(self, *args, **options):
+        since = None
+        if options['hours'] is not None:
+            since = timezone.now() - timedelta(hours=options['hours'])
+
+        rows = rebuild_notification_stats(since)
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {rows} hourly statistics rows'))
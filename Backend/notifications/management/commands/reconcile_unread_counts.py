@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from notifications.counters import reconcile_unread_counts
+from notifications.models import UnreadNotificationCounter
+
+
+class Command(BaseCommand):
+    help = 'Recompute stored unread notification counters from the notifications table'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=1000,
+            help='Number of counters recomputed per UPDATE'
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        user_ids = list(
+            UnreadNotificationCounter.objects.order_by('user_id').values_list('user_id', flat=True)
+        )
+
+        reconciled = 0
+        for offset in range(0, len(user_ids), chunk_size):
+            reconciled += reconcile_unread_counts(user_ids[offset:offset + chunk_size])
+            self.stdout.write(f'[{reconciled}/{len(user_ids)}] counters reconciled')
+
+        self.stdout.write(self.style.SUCCESS(f'Reconciled {reconciled} unread counters'))
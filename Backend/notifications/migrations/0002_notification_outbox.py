@@ -0,0 +1,33 @@
+# Generated by Django 5.2.3 on 2026-10-19 10:41
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationOutbox',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('payload', models.JSONField()),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('last_error', models.TextField(blank=True)),
+                ('failed', models.BooleanField(default=False, help_text='Gave up after the maximum number of attempts')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('notification', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='outbox_entry', to='notifications.notification')),
+            ],
+            options={
+                'db_table': 'notification_outbox',
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['failed', 'next_attempt_at'], name='notificatio_failed_5750c9_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.3 on 2026-10-19 10:44
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_recent_actors(apps, schema_editor):
+    Notification = apps.get_model('notifications', 'Notification')
+    batch = []
+    for notification in Notification.objects.select_related('sender').iterator(chunk_size=2000):
+        notification.recent_actors = [
+            {'id': notification.sender_id, 'username': notification.sender.username}
+        ]
+        batch.append(notification)
+        if len(batch) >= 2000:
+            Notification.objects.bulk_update(batch, ['recent_actors'])
+            batch = []
+    Notification.objects.bulk_update(batch, ['recent_actors'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0002_notification_outbox'),
+        ('posts', '0002_alter_post_image_url'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='actor_count',
+            field=models.PositiveIntegerField(default=1, help_text='Number of interactions grouped into this notification'),
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='recent_actors',
+            field=models.JSONField(blank=True, default=list, help_text='Most recent actors as {id, username}, newest first'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['recipient', 'post', 'notification_type', '-created_at'], name='notificatio_recipie_5bd444_idx'),
+        ),
+        migrations.RunPython(backfill_recent_actors, migrations.RunPython.noop),
+    ]
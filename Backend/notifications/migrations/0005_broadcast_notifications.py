@@ -0,0 +1,36 @@
+# Generated by Django 5.2.3 on 2026-10-19 10:52
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0004_unread_counters'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='unreadnotificationcounter',
+            name='broadcast_read_id',
+            field=models.BigIntegerField(default=0, help_text='Broadcasts with an id up to this watermark are read'),
+        ),
+        migrations.CreateModel(
+            name='BroadcastNotification',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('notification_type', models.CharField(choices=[('announcement', 'Announcement'), ('system', 'System'), ('update', 'Update'), ('warning', 'Warning'), ('info', 'Info')], default='announcement', max_length=20)),
+                ('message', models.CharField(max_length=500)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('sender', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='broadcasts_sent', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'broadcast_notifications',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['-created_at'], name='broadcast_n_created_89106a_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 5.2.3 on 2026-10-19 11:18
+
+from datetime import timezone
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+from django.db.models.functions import TruncHour
+
+
+def backfill_hourly_stats(apps, schema_editor):
+    Notification = apps.get_model('notifications', 'Notification')
+    NotificationHourlyStat = apps.get_model('notifications', 'NotificationHourlyStat')
+    rows = (
+        Notification.objects.order_by()
+        .annotate(stat_hour=TruncHour('created_at', tzinfo=timezone.utc))
+        .values('stat_hour', 'notification_type')
+        .annotate(total=Count('id'), unread=Count('id', filter=Q(is_read=False)))
+    )
+    NotificationHourlyStat.objects.bulk_create([
+        NotificationHourlyStat(
+            hour=row['stat_hour'],
+            notification_type=row['notification_type'],
+            total=row['total'],
+            unread=row['unread'],
+        )
+        for row in rows
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0006_outbox_without_fk_constraint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationHourlyStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hour', models.DateTimeField()),
+                ('notification_type', models.CharField(max_length=10)),
+                ('total', models.BigIntegerField(default=0)),
+                ('unread', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'notification_hourly_stats',
+                'ordering': ['-hour'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['-created_at'], name='notificatio_created_8fa075_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='notificationhourlystat',
+            constraint=models.UniqueConstraint(fields=('hour', 'notification_type'), name='unique_notification_stat_hour_type'),
+        ),
+        migrations.RunPython(backfill_hourly_stats, migrations.RunPython.noop),
+    ]
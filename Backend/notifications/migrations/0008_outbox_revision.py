@@ -0,0 +1,19 @@
+# Generated by Django 5.2.3 on 2026-10-19 12:28
+
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0007_hourly_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notificationoutbox',
+            name='revision',
+            field=models.UUIDField(default=uuid.uuid4, help_text='Replaced whenever the entry is re-queued, so a sender holding an older payload keeps it queued'),
+        ),
+    ]
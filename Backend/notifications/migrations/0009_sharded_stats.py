@@ -0,0 +1,46 @@
+# Generated by Django 5.2.3 on 2026-10-19 12:38
+
+from django.db import migrations, models
+
+
+def count_recipients(apps, schema_editor):
+    Notification = apps.get_model('notifications', 'Notification')
+    NotificationRecipientStat = apps.get_model('notifications', 'NotificationRecipientStat')
+    NotificationRecipientStat.objects.create(
+        shard=0,
+        recipients=Notification.objects.order_by().values('recipient_id').distinct().count()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0008_outbox_revision'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationRecipientStat',
+            fields=[
+                ('shard', models.PositiveSmallIntegerField(primary_key=True, serialize=False)),
+                ('recipients', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'notification_recipient_stats',
+            },
+        ),
+        migrations.RemoveConstraint(
+            model_name='notificationhourlystat',
+            name='unique_notification_stat_hour_type',
+        ),
+        migrations.AddField(
+            model_name='notificationhourlystat',
+            name='shard',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddConstraint(
+            model_name='notificationhourlystat',
+            constraint=models.UniqueConstraint(fields=('hour', 'notification_type', 'shard'), name='unique_notification_stat_hour_type_shard'),
+        ),
+        migrations.RunPython(count_recipients, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,8 @@
+import uuid
+
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
 
 
 class Notification(models.Model):
@@ -34,14 +37,31 @@ class Notification(models.Model):
         help_text="Related post for post-specific notifications"
     )
     message = models.CharField(max_length=200)
+    actor_count = models.PositiveIntegerField(
+        default=1,
+        help_text="Number of interactions grouped into this notification"
+    )
+    recent_actors = models.JSONField(
+        default=list,
+        blank=True,
+        help_text="Most recent actors as {id, username}, newest first"
+    )
     is_read = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    # Like and comment notifications on the same post are grouped
+    GROUPED_TYPES = ('like', 'comment')
+    MAX_RECENT_ACTORS = 3
+    is_broadcast = False
+
     class Meta:
         db_table = 'notifications'
         ordering = ['-created_at']
         indexes = [
+            models.Index(fields=['-created_at']),
             models.Index(fields=['recipient', '-created_at']),
+            models.Index(fields=['recipient', 'post', 'notification_type', '-created_at']),
+            models.Index(fields=['recipient', 'is_read']),
             models.Index(fields=['is_read']),
             models.Index(fields=['notification_type']),
         ]
@@ -49,39 +69,191 @@ class Notification(models.Model):
     def __str__(self):
         return f"Notification for @{self.recipient.username}: {self.message}"
 
-    @classmethod
-    def create_follow_notification(cls, follower, following):
-        """Create a notification when someone follows a user."""
-        message = f"@{follower.username} started following you"
-        return cls.objects.create(
-            recipient=following,
-            sender=follower,
-            notification_type='follow',
-            message=message
-        )
+    @staticmethod
+    def group_message(notification_type, username, actor_count):
+        verb = 'liked' if notification_type == 'like' else 'commented on'
+        if actor_count <= 1:
+            return f"@{username} {verb} your post"
+        others = actor_count - 1
+        return f"@{username} and {others} other{'s' if others > 1 else ''} {verb} your post"
+
+
+class BroadcastNotification(models.Model):
+    """
+    Admin notification addressed to every user, stored once. Users see
+    broadcasts sent after they joined; read state is a per-user watermark
+    on ``UnreadNotificationCounter``.
+    """
+    BROADCAST_TYPES = [
+        ('announcement', 'Announcement'),
+        ('system', 'System'),
+        ('update', 'Update'),
+        ('warning', 'Warning'),
+        ('info', 'Info'),
+    ]
+
+    sender = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='broadcasts_sent'
+    )
+    notification_type = models.CharField(
+        max_length=20,
+        choices=BROADCAST_TYPES,
+        default='announcement'
+    )
+    message = models.CharField(max_length=500)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    is_broadcast = True
+
+    class Meta:
+        db_table = 'broadcast_notifications'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at']),
+        ]
+
+    def __str__(self):
+        return f"Broadcast by @{self.sender.username}: {self.message[:50]}"
 
     @classmethod
-    def create_like_notification(cls, user, post):
-        """Create a notification when someone likes a post."""
-        if user != post.author:  # Don't notify if user likes their own post
-            message = f"@{user.username} liked your post"
-            return cls.objects.create(
-                recipient=post.author,
-                sender=user,
-                notification_type='like',
-                post=post,
-                message=message
-            )
+    def visible_to(cls, user):
+        return cls.objects.filter(created_at__gte=user.date_joined)
+
+
+class UnreadNotificationCounter(models.Model):
+    """
+    Per-user unread notification count, maintained incrementally so the
+    unread badge is a primary-key lookup instead of a COUNT(*)
+    """
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='unread_notification_counter'
+    )
+    unread_count = models.IntegerField(default=0)
+    broadcast_read_id = models.BigIntegerField(
+        default=0,
+        help_text="Broadcasts with an id up to this watermark are read"
+    )
+
+    class Meta:
+        db_table = 'notification_unread_counters'
+
+    def __str__(self):
+        return f"{self.unread_count} unread for user {self.user_id}"
+
+
+class NotificationHourlyStat(models.Model):
+    """
+    Notification totals per creation hour (UTC) and type, maintained
+    incrementally so admin statistics never scan the notifications table.
+    Each (hour, type) is split over several shard rows, summed when read,
+    so concurrent writers rarely update the same row
+    """
+    hour = models.DateTimeField()
+    notification_type = models.CharField(max_length=10)
+    shard = models.PositiveSmallIntegerField(default=0)
+    total = models.BigIntegerField(default=0)
+    unread = models.BigIntegerField(default=0)
+
+    class Meta:
+        db_table = 'notification_hourly_stats'
+        ordering = ['-hour']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['hour', 'notification_type', 'shard'],
+                name='unique_notification_stat_hour_type_shard'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.total} {self.notification_type} notifications at {self.hour:%Y-%m-%d %H:00}"
+
+
+class NotificationRecipientStat(models.Model):
+    """
+    Number of users with at least one notification, sharded like
+    ``NotificationHourlyStat`` and summed when read
+    """
+    shard = models.PositiveSmallIntegerField(primary_key=True)
+    recipients = models.BigIntegerField(default=0)
+
+    class Meta:
+        db_table = 'notification_recipient_stats'
+
+    def __str__(self):
+        return f"{self.recipients} recipients in shard {self.shard}"
+
+
+class NotificationOutbox(models.Model):
+    """
+    Pending realtime delivery of a notification, written in the same
+    transaction as the notification and drained by the delivery worker
+    """
+    notification = models.OneToOneField(
+        Notification,
+        on_delete=models.CASCADE,
+        related_name='outbox_entry',
+        # No database FK, so the notifications table can be partitioned
+        # (a partitioned table has no unique constraint on id alone)
+        db_constraint=False
+    )
+    payload = models.JSONField()
+    revision = models.UUIDField(
+        default=uuid.uuid4,
+        help_text="Replaced whenever the entry is re-queued, so a sender holding an older payload keeps it queued"
+    )
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    failed = models.BooleanField(
+        default=False,
+        help_text="Gave up after the maximum number of attempts"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'notification_outbox'
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['failed', 'next_attempt_at']),
+        ]
+
+    def __str__(self):
+        return f"Outbox entry for notification {self.notification_id}"
+
+    @staticmethod
+    def build_payload(notification):
+        """Realtime row sent to subscribers, built from FK ids only."""
+        return {
+            'recipient_id': notification.recipient_id,
+            'sender_id': notification.sender_id,
+            'notification_type': notification.notification_type,
+            'message': notification.message,
+            'post_id': notification.post_id,
+            'is_read': notification.is_read,
+            'created_at': notification.created_at.isoformat(),
+        }
 
     @classmethod
-    def create_comment_notification(cls, user, post, comment_content):
-        """Create a notification when someone comments on a post."""
-        if user != post.author:  # Don't notify if user comments on their own post
-            message = f"@{user.username} commented on your post"
-            return cls.objects.create(
-                recipient=post.author,
-                sender=user,
-                notification_type='comment',
-                post=post,
-                message=message
-            )
+    def enqueue(cls, notifications):
+        """
+        Queue realtime delivery for saved notifications. A grouped
+        notification updated while still queued has its pending entry
+        refreshed with the latest payload and a new revision, and is due
+        again at once with its retry state cleared, even if it had failed
+        or is claimed by a sender.
+        """
+        now = timezone.now()
+        return cls.objects.bulk_create(
+            [
+                cls(notification=notification, payload=cls.build_payload(notification), next_attempt_at=now)
+                for notification in notifications
+            ],
+            update_conflicts=True,
+            unique_fields=['notification'],
+            update_fields=['payload', 'revision', 'attempts', 'next_attempt_at', 'last_error', 'failed'],
+        )
@@ -0,0 +1,199 @@
+"""
+Monthly range partitioning of the notifications table (PostgreSQL only).
+
+Once converted, ``notifications`` is partitioned by ``created_at`` into
+``notifications_pYYYYMM`` tables plus a default partition, so retention of a
+whole month is a partition drop instead of millions of row deletes.
+
+Dropping a partition removes every notification in that month, read or not;
+the per-type chunked pruning in ``notifications.retention`` remains the way
+to expire read notifications individually.
+
+Converting an existing table copies every row and briefly holds an
+exclusive lock, so run ``partition_notifications --convert`` in a
+maintenance window.
+"""
+import logging
+from datetime import datetime
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .counters import reconcile_unread_counts
+from .models import Notification, NotificationHourlyStat, NotificationOutbox
+from .retention import ARCHIVE_FIELDS
+from .stats import rebuild_recipient_count
+
+logger = logging.getLogger('socialconnect')
+
+TABLE = 'notifications'
+LEGACY_TABLE = 'notifications_unpartitioned'
+SEQUENCE = 'notifications_partitioned_id_seq'
+
+
+def is_supported():
+    return connection.vendor == 'postgresql'
+
+
+def month_start(value):
+    return value.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def add_months(value, months):
+    month = value.month - 1 + months
+    return value.replace(year=value.year + month // 12, month=month % 12 + 1)
+
+
+def partition_name(start):
+    return f'{TABLE}_p{start:%Y%m}'
+
+
+def is_partitioned():
+    if not is_supported():
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid "
+            "WHERE c.relname = %s AND pg_table_is_visible(c.oid)",
+            [TABLE],
+        )
+        return cursor.fetchone() is not None
+
+
+def list_partitions():
+    """Return ``[(name, start)]`` for the monthly partitions, oldest first."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "JOIN pg_class p ON p.oid = i.inhparent "
+            "WHERE p.relname = %s AND pg_table_is_visible(p.oid)",
+            [TABLE],
+        )
+        names = [row[0] for row in cursor.fetchall()]
+
+    partitions = []
+    for name in names:
+        suffix = name[len(f'{TABLE}_p'):]
+        if not name.startswith(f'{TABLE}_p') or not suffix.isdigit():
+            continue
+        start = datetime.strptime(suffix, '%Y%m').replace(tzinfo=timezone.get_current_timezone())
+        partitions.append((name, start))
+    return sorted(partitions, key=lambda partition: partition[1])
+
+
+def create_partition(cursor, start):
+    name = partition_name(start)
+    cursor.execute(
+        f'CREATE TABLE IF NOT EXISTS "{name}" PARTITION OF "{TABLE}" '
+        f'FOR VALUES FROM (%s) TO (%s)',
+        [start, add_months(start, 1)],
+    )
+    return name
+
+
+def ensure_partitions(months_ahead=3):
+    """Create monthly partitions from the current month ``months_ahead`` forward."""
+    if not is_partitioned():
+        return []
+    current = month_start(timezone.localtime())
+    with connection.cursor() as cursor:
+        return [create_partition(cursor, add_months(current, offset)) for offset in range(months_ahead + 1)]
+
+
+def convert_to_partitioned(months_ahead=3):
+    """
+    Rebuild ``notifications`` as a partitioned table, preserving rows, ids,
+    indexes and foreign keys. Returns the number of rows copied.
+    """
+    if not is_supported():
+        raise RuntimeError('Notification partitioning requires PostgreSQL')
+    if is_partitioned():
+        return 0
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f'LOCK TABLE "{TABLE}" IN ACCESS EXCLUSIVE MODE')
+
+        cursor.execute(
+            "SELECT indexdef FROM pg_indexes WHERE tablename = %s "
+            "AND indexname <> %s",
+            [TABLE, f'{TABLE}_pkey'],
+        )
+        index_definitions = [row[0] for row in cursor.fetchall()]
+        cursor.execute(
+            "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+            "WHERE conrelid = %s::regclass AND contype = 'f'",
+            [TABLE],
+        )
+        foreign_keys = cursor.fetchall()
+        cursor.execute(f'SELECT min(created_at), coalesce(max(id), 0) FROM "{TABLE}"')
+        oldest, max_id = cursor.fetchone()
+
+        cursor.execute(f'ALTER TABLE "{TABLE}" RENAME TO "{LEGACY_TABLE}"')
+        for definition in index_definitions:
+            name = definition.split(' INDEX ', 1)[1].split(' ON ', 1)[0]
+            cursor.execute(f'DROP INDEX IF EXISTS {name}')
+
+        # Identity columns on partitioned tables need PostgreSQL 17, so ids
+        # come from a plain sequence continuing after the existing rows
+        cursor.execute(f'CREATE SEQUENCE IF NOT EXISTS "{SEQUENCE}"')
+        cursor.execute('SELECT setval(%s, %s, %s)', [SEQUENCE, max(max_id, 1), max_id > 0])
+        cursor.execute(
+            f'CREATE TABLE "{TABLE}" (LIKE "{LEGACY_TABLE}" INCLUDING DEFAULTS INCLUDING CONSTRAINTS) '
+            f'PARTITION BY RANGE (created_at)'
+        )
+        cursor.execute(f'''ALTER TABLE "{TABLE}" ALTER COLUMN id SET DEFAULT nextval('"{SEQUENCE}"')''')
+        cursor.execute(f'ALTER SEQUENCE "{SEQUENCE}" OWNED BY "{TABLE}".id')
+        cursor.execute(f'ALTER TABLE "{TABLE}" ADD PRIMARY KEY (id, created_at)')
+
+        current = month_start(timezone.localtime())
+        start = month_start(timezone.localtime(oldest)) if oldest else current
+        while start <= add_months(current, months_ahead):
+            create_partition(cursor, start)
+            start = add_months(start, 1)
+        cursor.execute(f'CREATE TABLE IF NOT EXISTS "{TABLE}_default" PARTITION OF "{TABLE}" DEFAULT')
+
+        cursor.execute(f'INSERT INTO "{TABLE}" SELECT * FROM "{LEGACY_TABLE}"')
+        copied = cursor.rowcount
+
+        for definition in index_definitions:
+            # Indexes on the parent cascade to every partition
+            cursor.execute(definition)
+        for name, definition in foreign_keys:
+            cursor.execute(f'ALTER TABLE "{TABLE}" ADD CONSTRAINT "{name}" {definition}')
+
+        cursor.execute(f'DROP TABLE "{LEGACY_TABLE}"')
+
+    logger.info(f"Partitioned {TABLE} by month ({copied} rows copied)")
+    return copied
+
+
+def drop_partitions_before(cutoff, archive=None):
+    """
+    Drop monthly partitions that end on or before ``cutoff``, archiving their
+    rows first when ``archive`` is given. Returns ``{partition: rows}``.
+    """
+    if not is_partitioned():
+        return {}
+
+    dropped = {}
+    for name, start in list_partitions():
+        end = add_months(start, 1)
+        if end > cutoff:
+            continue
+        rows = Notification.objects.filter(created_at__gte=start, created_at__lt=end)
+        if archive is not None:
+            archive.write(rows.order_by('id').values(*ARCHIVE_FIELDS).iterator(chunk_size=1000))
+        dropped[name] = rows.count()
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f'ALTER TABLE "{TABLE}" DETACH PARTITION "{name}"')
+            cursor.execute(f'DROP TABLE "{name}"')
+            NotificationHourlyStat.objects.filter(hour__gte=start, hour__lt=end).delete()
+
+    if dropped:
+        # Dropped rows bypass ORM cascades and the signals that keep unread
+        # counters in sync
+        NotificationOutbox.objects.exclude(notification_id__in=Notification.objects.values('id')).delete()
+        reconcile_unread_counts()
+        rebuild_recipient_count()
+    return dropped
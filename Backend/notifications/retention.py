@@ -0,0 +1,128 @@
+"""
+Notification retention.
+
+Read notifications older than their type's TTL (``NOTIFICATION_RETENTION_DAYS``)
+are removed in small id-ordered chunks, each deleted in its own short
+transaction so no lock is held for long. When an archive directory is given,
+every chunk is appended to a gzip-compressed NDJSON file and flushed before
+it is deleted.
+
+Unread notifications are never pruned here. On PostgreSQL the table can
+instead be partitioned by month (see ``notifications.partitions``), which
+turns retention of whole months into a partition drop.
+"""
+import gzip
+import json
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Notification
+from .stats import (
+    StatDeltas, adjust_notification_stats, adjust_recipient_count, compact_notification_stats,
+    remaining_recipient_count,
+)
+
+DEFAULT_RETENTION_DAYS = 90
+
+ARCHIVE_FIELDS = [
+    'id', 'recipient_id', 'sender_id', 'notification_type', 'post_id', 'message',
+    'actor_count', 'recent_actors', 'is_read', 'created_at',
+]
+
+
+def retention_days():
+    """``{notification_type: days}`` for every type, falling back to ``default``."""
+    configured = getattr(settings, 'NOTIFICATION_RETENTION_DAYS', {})
+    default = configured.get('default', DEFAULT_RETENTION_DAYS)
+    return {
+        notification_type: configured.get(notification_type, default)
+        for notification_type, _ in Notification.NOTIFICATION_TYPES
+    }
+
+
+class NotificationArchive:
+    """Append notification rows to a gzip-compressed NDJSON file."""
+
+    def __init__(self, directory, name=None):
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        name = name or f"notifications-{timezone.now():%Y%m%dT%H%M%S}.ndjson.gz"
+        self.path = directory / name
+        self.rows = 0
+        self._file = gzip.open(self.path, 'at', encoding='utf-8')
+
+    def write(self, rows):
+        for row in rows:
+            self._file.write(json.dumps(row, cls=DjangoJSONEncoder) + '\n')
+            self.rows += 1
+        # Each chunk must be durable before its rows are deleted
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def prune_notifications(archive=None, chunk_size=1000, dry_run=False, pause=0, progress=None, now=None):
+    """
+    Delete (and optionally archive) expired read notifications.
+
+    Returns ``{notification_type: rows}``. ``progress`` is called after each
+    chunk with ``(notification_type, rows_so_far, rows_per_second)``.
+    """
+    now = now or timezone.now()
+    started = time.monotonic()
+    moved = {}
+    total = 0
+
+    for notification_type, days in retention_days().items():
+        expired = Notification.objects.filter(
+            notification_type=notification_type,
+            is_read=True,
+            created_at__lt=now - timezone.timedelta(days=days),
+        ).order_by('id')
+
+        moved[notification_type] = 0
+        last_id = 0
+        while True:
+            fields = ARCHIVE_FIELDS if archive is not None else ['id', 'recipient_id', 'created_at']
+            rows = list(expired.filter(id__gt=last_id).values(*fields)[:chunk_size])
+            if not rows:
+                break
+            ids = [row['id'] for row in rows]
+            last_id = ids[-1]
+
+            if not dry_run:
+                if archive is not None:
+                    archive.write(rows)
+                stat_deltas = StatDeltas()
+                for row in rows:
+                    stat_deltas.add(row['created_at'], notification_type, total=-1)
+                recipient_ids = {row['recipient_id'] for row in rows}
+                with transaction.atomic():
+                    Notification.objects.filter(id__in=ids).delete()
+                    adjust_notification_stats(stat_deltas)
+                    adjust_recipient_count(remaining_recipient_count(recipient_ids) - len(recipient_ids))
+
+            moved[notification_type] += len(ids)
+            total += len(ids)
+            if progress:
+                elapsed = max(time.monotonic() - started, 1e-6)
+                progress(notification_type, moved[notification_type], total / elapsed)
+            if pause:
+                time.sleep(pause)
+
+    if not dry_run:
+        # Closed hours no longer need their write shards
+        compact_notification_stats(now)
+    return moved
@@ -1,16 +1,89 @@
 from rest_framework import serializers
-from .models import Notification
-from accounts.serializers import UserProfileSerializer
+from .models import BroadcastNotification, Notification
+from accounts.serializers import UserCardSerializer
+from posts.models import Post
 
 
-class NotificationSerializer(serializers.ModelSerializer):
-    """Serializer for notifications."""
-    sender = UserProfileSerializer(read_only=True)
+class NotificationPostSnippetSerializer(serializers.ModelSerializer):
+    """Just enough of a post to render it next to a notification."""
+    content = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Post
+        fields = ('id', 'content', 'image_url')
+        read_only_fields = fields
+
+    def get_content(self, obj):
+        return obj.content[:100] + '...' if len(obj.content) > 100 else obj.content
+
+
+class OptionalPostSnippetMixin:
+    """Drop ``post_snippet`` unless ``context['include_post']`` is set."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if not self.context.get('include_post'):
+            self.fields.pop('post_snippet')
+
+
+class NotificationSerializer(OptionalPostSnippetMixin, serializers.ModelSerializer):
+    """
+    Serializer for notifications. Grouped likes and comments carry the
+    total ``actor_count`` and the newest few ``recent_actors``. The sender
+    is a compact card, and the related post is inlined as ``post_snippet``
+    when requested, so rows need no queries beyond the ``select_related``.
+    """
+    sender = UserCardSerializer(read_only=True)
+    post_snippet = serializers.SerializerMethodField()
+    is_broadcast = serializers.ReadOnlyField()
     
     class Meta:
         model = Notification
         fields = (
-            'id', 'sender', 'notification_type', 'post',
-            'message', 'is_read', 'created_at'
+            'id', 'sender', 'notification_type', 'post', 'post_snippet',
+            'message', 'actor_count', 'recent_actors', 'is_read', 'created_at',
+            'is_broadcast'
         )
-        read_only_fields = fields
\ No newline at end of file
+        read_only_fields = fields
+
+    def get_post_snippet(self, obj):
+        if obj.post is None or not obj.post.is_active:
+            return None
+        return NotificationPostSnippetSerializer(obj.post).data
+
+
+class BroadcastNotificationSerializer(OptionalPostSnippetMixin, serializers.ModelSerializer):
+    """
+    Admin broadcast in the notification list shape. Read state comes from
+    the viewer's watermark in ``context['broadcast_read_id']``.
+    """
+    sender = UserCardSerializer(read_only=True)
+    post = serializers.ReadOnlyField(default=None)
+    post_snippet = serializers.ReadOnlyField(default=None)
+    actor_count = serializers.ReadOnlyField(default=1)
+    recent_actors = serializers.ReadOnlyField(default=list)
+    is_read = serializers.SerializerMethodField()
+    is_broadcast = serializers.ReadOnlyField()
+
+    class Meta:
+        model = BroadcastNotification
+        fields = NotificationSerializer.Meta.fields
+        read_only_fields = fields
+
+    def get_is_read(self, obj):
+        return obj.id <= self.context.get('broadcast_read_id', 0)
+
+
+class MarkNotificationsReadSerializer(serializers.Serializer):
+    """Serializer for batch mark-read requests."""
+    MAX_IDS = 500
+
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), required=False, max_length=MAX_IDS
+    )
+    up_to_id = serializers.IntegerField(min_value=1, required=False)
+
+    def validate(self, attrs):
+        if ('ids' in attrs) == ('up_to_id' in attrs):
+            raise serializers.ValidationError('Provide either "ids" or "up_to_id".')
+        return attrs
@@ -1,92 +1,59 @@
 from django.db.models.signals import post_save, post_delete
+from django.db import transaction
 from django.dispatch import receiver
-from django.conf import settings
 import logging
 
 from social.models import Follow, Like, Comment
-from .models import Notification
+from .bus import publish_notifications
+from .counters import adjust_unread_counts
+from .dispatch import comment_event, emit, follow_event, like_event
+from .models import Notification, NotificationOutbox
+from .stats import StatDeltas, adjust_notification_stats, adjust_recipient_count, new_recipient_count
 
 logger = logging.getLogger('socialconnect')
 
 
 @receiver(post_save, sender=Follow)
 def create_follow_notification(sender, instance, created, **kwargs):
-    """Create notification when someone follows a user."""
+    """Emit a notification event when someone follows a user."""
     if created:
         try:
-            Notification.create_follow_notification(
-                instance.follower, 
-                instance.following
-            )
-            logger.info(f"Follow notification created: {instance.follower} -> {instance.following}")
+            emit(follow_event(instance.follower, instance.following_id))
         except Exception as e:
-            logger.error(f"Error creating follow notification: {e}")
+            logger.error(f"Error emitting follow notification: {e}")
 
 
 @receiver(post_save, sender=Like)
 def create_like_notification(sender, instance, created, **kwargs):
-    """Create notification when someone likes a post."""
+    """Emit a notification event when someone likes a post."""
     if created:
         try:
-            Notification.create_like_notification(
-                instance.user, 
-                instance.post
-            )
-            logger.info(f"Like notification created: {instance.user} liked {instance.post}")
+            emit(like_event(instance.user, instance.post))
         except Exception as e:
-            logger.error(f"Error creating like notification: {e}")
+            logger.error(f"Error emitting like notification: {e}")
 
 
 @receiver(post_save, sender=Comment)
 def create_comment_notification(sender, instance, created, **kwargs):
-    """Create notification when someone comments on a post."""
+    """Emit a notification event when someone comments on a post."""
     if created:
         try:
-            Notification.create_comment_notification(
-                instance.author, 
-                instance.post, 
-                instance.content
-            )
-            logger.info(f"Comment notification created: {instance.author} commented on {instance.post}")
+            emit(comment_event(instance.author, instance.post))
         except Exception as e:
-            logger.error(f"Error creating comment notification: {e}")
-
-
-# Optional: Supabase Real-time integration
-def send_realtime_notification(notification):
-    """
-    Send notification to Supabase Real-time.
-    This function should be called after a notification is created.
-    """
-    try:
-        if hasattr(settings, 'SUPABASE_URL') and settings.SUPABASE_URL:
-            # Import Supabase client here to avoid import errors if not configured
-            from supabase import create_client
-            
-            supabase = create_client(settings.SUPABASE_URL, settings.SUPABASE_KEY)
-            
-            # Insert notification into Supabase table for real-time updates
-            notification_data = {
-                'recipient_id': notification.recipient.id,
-                'sender_id': notification.sender.id,
-                'notification_type': notification.notification_type,
-                'message': notification.message,
-                'post_id': notification.post.id if notification.post else None,
-                'is_read': notification.is_read,
-                'created_at': notification.created_at.isoformat(),
-            }
-            
-            # Insert into Supabase notifications table
-            result = supabase.table('realtime_notifications').insert(notification_data).execute()
-            logger.info(f"Real-time notification sent: {result}")
-            
-    except Exception as e:
-        logger.error(f"Error sending real-time notification: {e}")
+            logger.error(f"Error emitting comment notification: {e}")
 
 
 @receiver(post_save, sender=Notification)
 def handle_notification_created(sender, instance, created, **kwargs):
-    """Handle notification creation for real-time updates."""
+    """Queue realtime delivery and count individually saved notifications."""
+    # Rows written by the dispatch pipeline are queued there in bulk; this
+    # covers notifications saved one at a time, such as admin broadcasts
     if created:
-        # Send to Supabase Real-time (optional)
-        send_realtime_notification(instance)
\ No newline at end of file
+        NotificationOutbox.enqueue([instance])
+        if not instance.is_read:
+            adjust_unread_counts({instance.recipient_id: 1})
+        deltas = StatDeltas()
+        deltas.add(instance.created_at, instance.notification_type, total=1, unread=not instance.is_read)
+        adjust_notification_stats(deltas)
+        adjust_recipient_count(new_recipient_count([instance]))
+        transaction.on_commit(lambda: publish_notifications([instance]))
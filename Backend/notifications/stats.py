@@ -0,0 +1,228 @@
+"""
+Admin notification statistics.
+
+``NotificationHourlyStat`` keeps, for each creation hour (UTC) and type, the
+number of notifications and how many of them are unread. Write paths adjust
+it in the same transaction as the notifications they touch, so the admin
+dashboard aggregates a few thousand rollup rows instead of the whole
+notifications table, and the result is cached for
+``NOTIFICATION_STATS_CACHE_SECONDS``. ``NotificationRecipientStat`` likewise
+counts the users who have any notification.
+
+Each transaction adjusts one of ``NOTIFICATION_STATS_SHARDS`` rows per
+counter, picked at random, so concurrent writers in the same hour seldom
+wait on each other's row locks; readers sum the shards. Once an hour is
+closed its shards are folded back into one row by
+``compact_notification_stats``, which pruning and rebuilds run, so the
+rollup keeps one row per (hour, type) outside the hours still being written.
+
+Rows removed by cascading deletes are not tracked, and two transactions
+that each give a user their first notification both count that user; the
+``rebuild_notification_stats`` command recomputes the rollups from the
+notifications table to correct drift.
+"""
+import random
+from collections import defaultdict
+from datetime import timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncHour
+from django.utils import timezone
+
+from .models import Notification, NotificationHourlyStat, NotificationRecipientStat
+
+STATS_CACHE_KEY = 'notifications:admin-stats'
+
+
+def stat_hour(created_at):
+    return created_at.astimezone(dt_timezone.utc).replace(minute=0, second=0, microsecond=0)
+
+
+class StatDeltas(defaultdict):
+    """``{(hour, notification_type): [total, unread]}`` adjustments."""
+
+    def __init__(self):
+        super().__init__(lambda: [0, 0])
+
+    def add(self, created_at, notification_type, total=0, unread=0):
+        delta = self[(stat_hour(created_at), notification_type)]
+        delta[0] += total
+        delta[1] += unread
+
+
+def stat_shard():
+    return random.randrange(getattr(settings, 'NOTIFICATION_STATS_SHARDS', 16))
+
+
+def adjust_notification_stats(deltas):
+    """Apply ``StatDeltas`` to one shard; one UPDATE per changed (hour, type)."""
+    changed = sorted((key, delta) for key, delta in deltas.items() if any(delta))
+    if not changed:
+        return
+    shard = stat_shard()
+
+    def create_rows(keys):
+        NotificationHourlyStat.objects.bulk_create(
+            [
+                NotificationHourlyStat(hour=hour, notification_type=notification_type, shard=shard)
+                for hour, notification_type in keys
+            ],
+            ignore_conflicts=True
+        )
+
+    create_rows(key for key, _ in changed)
+    # Sorted, so two writers on the same shard lock rows in the same order
+    for (hour, notification_type), (total, unread) in changed:
+        row = NotificationHourlyStat.objects.filter(hour=hour, notification_type=notification_type, shard=shard)
+        while not row.update(total=F('total') + total, unread=F('unread') + unread):
+            # compact_notification_stats folded the row away since it was created
+            create_rows([(hour, notification_type)])
+
+
+def compact_notification_stats(before):
+    """
+    Fold the shards of every hour before ``before`` into a single row and
+    drop hours that sum to zero. Returns the number of rows removed.
+    """
+    cutoff = stat_hour(before)
+    sharded_hours = NotificationHourlyStat.objects.filter(hour__lt=cutoff, shard__gt=0).values('hour')
+    with transaction.atomic():
+        rows = list(
+            NotificationHourlyStat.objects.select_for_update()
+            .filter(hour__lt=cutoff, hour__in=sharded_hours)
+            .order_by('hour', 'notification_type', 'shard')
+        )
+        if not rows:
+            return 0
+        totals = defaultdict(lambda: [0, 0])
+        for row in rows:
+            merged = totals[(row.hour, row.notification_type)]
+            merged[0] += row.total
+            merged[1] += row.unread
+        NotificationHourlyStat.objects.filter(id__in=[row.id for row in rows]).delete()
+        created = NotificationHourlyStat.objects.bulk_create([
+            NotificationHourlyStat(hour=hour, notification_type=notification_type, total=total, unread=unread)
+            for (hour, notification_type), (total, unread) in totals.items()
+            if total or unread
+        ], batch_size=1000)
+    return len(rows) - len(created)
+
+
+def adjust_recipient_count(delta):
+    """Change the number of users with notifications by ``delta``."""
+    if not delta:
+        return
+    shard = stat_shard()
+    NotificationRecipientStat.objects.bulk_create(
+        [NotificationRecipientStat(shard=shard)], ignore_conflicts=True
+    )
+    NotificationRecipientStat.objects.filter(shard=shard).update(recipients=F('recipients') + delta)
+
+
+def new_recipient_count(notifications):
+    """
+    How many recipients of freshly created ``notifications`` have no others.
+    The dispatch pipeline gets this from its group lookup instead.
+    """
+    recipient_ids = {notification.recipient_id for notification in notifications}
+    if not recipient_ids:
+        return 0
+    earlier = (
+        Notification.objects.filter(recipient_id__in=recipient_ids)
+        .exclude(id__in=[notification.id for notification in notifications])
+        .order_by().values_list('recipient_id', flat=True).distinct()
+    )
+    return len(recipient_ids) - len(set(earlier))
+
+
+def remaining_recipient_count(recipient_ids):
+    """How many of ``recipient_ids`` still have a notification."""
+    return len(set(
+        Notification.objects.filter(recipient_id__in=set(recipient_ids))
+        .order_by().values_list('recipient_id', flat=True).distinct()
+    ))
+
+
+def notification_stats():
+    """Dashboard statistics, cached for ``NOTIFICATION_STATS_CACHE_SECONDS``."""
+    stats = cache.get(STATS_CACHE_KEY)
+    if stats is not None:
+        return stats
+
+    recent = Q(hour__gte=stat_hour(timezone.now() - timedelta(hours=24)))
+    aggregates = {
+        'all_total': Sum('total'),
+        'all_unread': Sum('unread'),
+        'recent_total': Sum('total', filter=recent),
+    }
+    for notification_type, _ in Notification.NOTIFICATION_TYPES:
+        aggregates[f'{notification_type}_total'] = Sum('total', filter=Q(notification_type=notification_type))
+    rollup = {key: value or 0 for key, value in NotificationHourlyStat.objects.aggregate(**aggregates).items()}
+
+    recipients = NotificationRecipientStat.objects.aggregate(total=Sum('recipients'))['total'] or 0
+
+    stats = {
+        'total_notifications': rollup['all_total'],
+        'unread_notifications': rollup['all_unread'],
+        'read_notifications': rollup['all_total'] - rollup['all_unread'],
+        'notification_types': {
+            notification_type: rollup[f'{notification_type}_total']
+            for notification_type, _ in Notification.NOTIFICATION_TYPES
+            if rollup[f'{notification_type}_total']
+        },
+        'recent_24h': rollup['recent_total'],
+        'total_users': get_user_model().objects.count(),
+        'active_users_with_notifications': recipients,
+    }
+    cache.set(STATS_CACHE_KEY, stats, getattr(settings, 'NOTIFICATION_STATS_CACHE_SECONDS', 30))
+    return stats
+
+
+def rebuild_notification_stats(since=None):
+    """
+    Recompute the rollup from the notifications table, for hours from
+    ``since`` on (default: all), and the recipient count; earlier hours are
+    compacted. Returns the number of hourly rollup rows written.
+    """
+    notifications = Notification.objects.all()
+    stats = NotificationHourlyStat.objects.all()
+    if since is not None:
+        notifications = notifications.filter(created_at__gte=stat_hour(since))
+        stats = stats.filter(hour__gte=stat_hour(since))
+
+    rows = (
+        notifications.order_by()
+        .annotate(stat_hour=TruncHour('created_at', tzinfo=dt_timezone.utc))
+        .values('stat_hour', 'notification_type')
+        .annotate(total=Count('id'), unread=Count('id', filter=Q(is_read=False)))
+    )
+    with transaction.atomic():
+        stats.delete()
+        created = NotificationHourlyStat.objects.bulk_create([
+            NotificationHourlyStat(
+                hour=row['stat_hour'],
+                notification_type=row['notification_type'],
+                total=row['total'],
+                unread=row['unread'],
+            )
+            for row in rows
+        ], batch_size=1000)
+        rebuild_recipient_count()
+    if since is not None:
+        compact_notification_stats(since)
+    cache.delete(STATS_CACHE_KEY)
+    return len(created)
+
+
+def rebuild_recipient_count():
+    """Recount the users with notifications into a single shard."""
+    with transaction.atomic():
+        NotificationRecipientStat.objects.all().delete()
+        NotificationRecipientStat.objects.create(
+            shard=0,
+            recipients=Notification.objects.order_by().values('recipient_id').distinct().count()
+        )
@@ -0,0 +1,202 @@
+"""
+Live notification endpoints (SSE stream and long-poll), served as async
+views from the ASGI app.
+
+Each open stream is a coroutine waiting on its bus queue, so a worker can
+hold thousands of idle connections without a thread per client. The stream
+needs an ASGI server (e.g. ``uvicorn project.asgi:application``): under WSGI
+Django collects an async streaming response into a list before sending
+anything, and this one never ends, so the stream refuses WSGI requests and
+clients fall back to the long-poll, which returns within its timeout.
+
+Browser ``EventSource`` cannot send an Authorization header, so the stream
+also accepts ``?token=``, but only a ``StreamToken``: it lives for
+``NOTIFICATION_STREAM_TOKEN_SECONDS`` and authenticates nothing else, so
+one copied from an access log or proxy is of little use.
+"""
+import asyncio
+import json
+import math
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import Q
+from django.http import JsonResponse, StreamingHttpResponse
+from django.urls import reverse
+from django.views.decorators.http import require_GET
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.tokens import Token
+
+from accounts.authentication import CachedJWTAuthentication
+from .bus import event_cursor, get_bus, notification_event, parse_cursor
+from .counters import get_unread_count
+from .models import Notification
+
+RETRY_MILLISECONDS = 5000
+
+
+class StreamToken(Token):
+    """Short-lived token that only opens the notification stream."""
+    token_type = 'stream'
+    lifetime = timedelta(seconds=getattr(settings, 'NOTIFICATION_STREAM_TOKEN_SECONDS', 60))
+
+
+def authenticate_token(request, allow_stream_token=False):
+    """
+    Resolve the user from the Authorization header or, where
+    ``allow_stream_token`` is set, from a ``StreamToken`` in the ``token``
+    query parameter.
+    """
+    authentication = CachedJWTAuthentication()
+    try:
+        token = request.GET.get('token') if allow_stream_token else None
+        if token:
+            return authentication.get_user(StreamToken(token))
+        result = authentication.authenticate(request)
+    except (AuthenticationFailed, InvalidToken, TokenError):
+        return None
+    return result[0] if result else None
+
+
+def notifications_after(recipient_id, cursor, limit):
+    """Events for the recipient's notifications after ``cursor``, oldest first."""
+    created_at, notification_id = cursor
+    notifications = Notification.objects.filter(recipient_id=recipient_id)
+    if created_at is None:
+        notifications = notifications.filter(id__gt=notification_id).order_by('id')
+    else:
+        notifications = notifications.filter(
+            Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=notification_id)
+        ).order_by('created_at', 'id')
+    return [notification_event(notification) for notification in notifications[:limit]]
+
+
+def latest_cursor(recipient_id):
+    latest = (
+        Notification.objects.filter(recipient_id=recipient_id)
+        .order_by('-created_at', '-id').values_list('created_at', 'id').first()
+    )
+    return event_cursor(*latest) if latest else None
+
+
+def format_event(event):
+    return f"id: {event['cursor']}\nevent: notification\ndata: {json.dumps(event)}\n\n"
+
+
+async def notification_events(user, cursor):
+    heartbeat = getattr(settings, 'NOTIFICATION_STREAM_HEARTBEAT_SECONDS', 15)
+    limit = getattr(settings, 'NOTIFICATION_STREAM_REPLAY_LIMIT', 100)
+
+    # Subscribe before replaying so nothing committed in between is missed
+    bus = get_bus()
+    queue = bus.subscribe(user.id)
+    try:
+        yield f"retry: {RETRY_MILLISECONDS}\n\n"
+
+        last = None
+        if cursor is not None:
+            for event in await sync_to_async(notifications_after)(user.id, cursor, limit):
+                last = parse_cursor(event['cursor'])
+                yield format_event(event)
+
+        while True:
+            try:
+                event = await asyncio.wait_for(queue.get(), heartbeat)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            if last is not None and parse_cursor(event['cursor']) <= last:
+                # Already sent during replay
+                continue
+            yield format_event(event)
+    finally:
+        bus.unsubscribe(user.id, queue)
+
+
+@require_GET
+async def notification_stream(request):
+    """Stream the authenticated user's notifications as Server-Sent Events."""
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse({
+            'error': 'The notification stream is only served by the ASGI app; use the poll endpoint instead.',
+            'poll_url': reverse('notifications:notification_poll'),
+        }, status=501)
+
+    user = await sync_to_async(authenticate_token)(request, allow_stream_token=True)
+    if user is None:
+        return JsonResponse({
+            'error': 'Authentication credentials were not provided or are invalid.'
+        }, status=401)
+
+    last_event_id = request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')
+    cursor = parse_cursor(last_event_id) if last_event_id else None
+
+    response = StreamingHttpResponse(
+        notification_events(user, cursor),
+        content_type='text/event-stream'
+    )
+    response['Cache-Control'] = 'no-cache'
+    # Stop nginx from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+@require_GET
+async def notification_poll(request):
+    """
+    Long-poll for notifications newer than ``since_id``. Returns at once if
+    any exist, otherwise parks until one is published or ``timeout`` elapses.
+    """
+    user = await sync_to_async(authenticate_token)(request)
+    if user is None:
+        return JsonResponse({
+            'error': 'Authentication credentials were not provided or are invalid.'
+        }, status=401)
+
+    max_timeout = getattr(settings, 'NOTIFICATION_POLL_MAX_TIMEOUT_SECONDS', 30)
+    try:
+        timeout = float(request.GET.get('timeout', 25))
+    except ValueError:
+        timeout = math.nan
+    if not math.isfinite(timeout):
+        return JsonResponse({'error': 'timeout must be a number of seconds.'}, status=400)
+    timeout = min(max(timeout, 0), max_timeout)
+
+    since_id = request.GET.get('since_id')
+    cursor = parse_cursor(since_id) if since_id else None
+    if since_id and cursor is None:
+        return JsonResponse({'error': 'Invalid since_id.'}, status=400)
+
+    # Subscribe before checking the table so nothing committed in between is missed
+    bus = get_bus()
+    queue = bus.subscribe(user.id)
+    try:
+        if cursor is None:
+            # No position yet: only wait for notifications from now on
+            since_id = await sync_to_async(latest_cursor)(user.id)
+            events = []
+        else:
+            limit = getattr(settings, 'NOTIFICATION_STREAM_REPLAY_LIMIT', 100)
+            events = await sync_to_async(notifications_after)(user.id, cursor, limit)
+
+        if not events:
+            try:
+                events.append(await asyncio.wait_for(queue.get(), timeout))
+            except asyncio.TimeoutError:
+                pass
+            # Take anything else that arrived in the same burst
+            while not queue.empty():
+                events.append(queue.get_nowait())
+    finally:
+        bus.unsubscribe(user.id, queue)
+
+    if events:
+        since_id = max(events, key=lambda event: parse_cursor(event['cursor']))['cursor']
+    return JsonResponse({
+        'results': events,
+        'since_id': since_id,
+        'unread_count': await sync_to_async(get_unread_count)(user),
+    })
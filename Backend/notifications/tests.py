@@ -1,3 +1,776 @@
-from django.test import TestCase
+import asyncio
+import gzip
+import json
+import shutil
+import tempfile
+import unittest
+from datetime import timedelta
+from io import StringIO
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import DatabaseError, connection, transaction
+from django.db.models import Sum
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from accounts.models import User
+from posts.models import Post
+from social.models import Follow, Like
+from social.tests import make_user
+from .bus import InProcessBus, event_cursor, get_bus, notification_event
+from . import partitions
+from .delivery import StubTransport, claim_batch, deliver_batch, drain_outbox
+from .dispatch import comment_event, emit, follow_event, like_event
+from .models import (
+    BroadcastNotification, Notification, NotificationHourlyStat, NotificationOutbox,
+    UnreadNotificationCounter
+)
+from .retention import prune_notifications
+from .stats import (
+    StatDeltas, adjust_notification_stats, compact_notification_stats, notification_stats, stat_hour,
+)
+from .streaming import StreamToken
+
+
+class NotificationDispatchTests(TestCase):
+    def setUp(self):
+        self.author = make_user('author')
+        self.fan = make_user('fan')
+        self.post = Post.objects.create(author=self.author, content='Hello')
+        self.client = APIClient()
+        self.client.force_authenticate(self.fan)
+
+    def test_one_notification_per_follow(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('social:follow_user', args=[self.author.id]))
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(
+            Notification.objects.filter(recipient=self.author, notification_type='follow').count(), 1
+        )
+
+    def test_one_notification_per_like(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('social:like_post', args=[self.post.id]))
+        notification = Notification.objects.get(recipient=self.author)
+        self.assertEqual(notification.notification_type, 'like')
+        self.assertEqual(notification.post, self.post)
+
+    def test_one_notification_per_comment(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse('social:post_comments', args=[self.post.id]), {'content': 'Nice'}
+            )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(
+            Notification.objects.filter(recipient=self.author, notification_type='comment').count(), 1
+        )
+
+    def test_no_notification_for_own_post(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Like.objects.create(user=self.author, post=self.post)
+        self.assertFalse(Notification.objects.exists())
+
+    def test_write_errors_after_commit_are_logged_not_raised(self):
+        with mock.patch('notifications.dispatch.write_events', side_effect=DatabaseError('deadlock')):
+            with self.assertLogs('socialconnect', 'ERROR'):
+                with self.captureOnCommitCallbacks(execute=True):
+                    response = self.client.post(reverse('social:like_post', args=[self.post.id]))
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(Like.objects.filter(user=self.fan, post=self.post).exists())
+
+    def test_written_only_after_commit(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            Follow.objects.create(follower=self.fan, following=self.author)
+            self.assertFalse(Notification.objects.exists())
+        for callback in callbacks:
+            callback()
+        self.assertEqual(Notification.objects.count(), 1)
+
+    def test_duplicate_events_deduplicated_and_batched(self):
+        other = make_user('other')
+        with self.captureOnCommitCallbacks() as callbacks:
+            with self.assertNumQueries(0):
+                emit(like_event(self.fan, self.post))
+                emit(like_event(self.fan, self.post))
+                emit(follow_event(self.fan, self.author.id))
+                emit(follow_event(self.fan, other.id))
+        # One bulk insert for the whole transaction, plus its outbox entries,
+        # hourly stats rows and recipient count
+        with CaptureQueriesContext(connection) as queries:
+            for callback in callbacks:
+                callback()
+        inserts = [q['sql'] for q in queries.captured_queries if q['sql'].startswith('INSERT')]
+        self.assertEqual(len(inserts), 4)
+        self.assertEqual(Notification.objects.count(), 3)
+
+    def test_one_commit_callback_per_transaction(self):
+        fans = [make_user(f'fan{i}') for i in range(20)]
+        with self.captureOnCommitCallbacks() as callbacks:
+            for fan in fans:
+                emit(follow_event(fan, self.author.id))
+        self.assertEqual(len(callbacks), 1)
+        callbacks[0]()
+        self.assertEqual(Notification.objects.filter(recipient=self.author).count(), 20)
+
+    def test_rolled_back_savepoint_drops_its_events(self):
+        other = make_user('other')
+        with self.captureOnCommitCallbacks(execute=True):
+            emit(follow_event(self.fan, self.author.id))
+            try:
+                with transaction.atomic():
+                    emit(follow_event(self.fan, other.id))
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+        self.assertEqual(
+            list(Notification.objects.values_list('recipient_id', flat=True)), [self.author.id]
+        )
+
+
+class RealtimeDeliveryTests(TestCase):
+    def setUp(self):
+        self.author = make_user('author')
+        self.fans = [make_user(f'fan{i}') for i in range(3)]
+        with self.captureOnCommitCallbacks(execute=True):
+            for fan in self.fans:
+                Follow.objects.create(follower=fan, following=self.author)
+        self.transport = StubTransport()
+
+    def test_outbox_written_with_notifications(self):
+        self.assertEqual(NotificationOutbox.objects.count(), 3)
+        entry = NotificationOutbox.objects.first()
+        self.assertEqual(entry.payload['recipient_id'], self.author.id)
+        self.assertEqual(entry.payload['notification_type'], 'follow')
+
+    def test_drain_delivers_in_batches(self):
+        delivered, failed = drain_outbox(self.transport, batch_size=2)
+        self.assertEqual((delivered, failed), (3, 0))
+        self.assertEqual(len(self.transport.sent), 3)
+        self.assertFalse(NotificationOutbox.objects.exists())
+
+    def test_failed_batch_backs_off(self):
+        self.transport.fail_next = 1
+        self.assertEqual(drain_outbox(self.transport), (0, 1))
+        entry = NotificationOutbox.objects.first()
+        self.assertEqual(entry.attempts, 1)
+        self.assertIn('Stub transport failure', entry.last_error)
+
+        # Not due again until the backoff elapses
+        NotificationOutbox.objects.update(next_attempt_at=timezone.now() + timedelta(hours=1))
+        self.assertEqual(drain_outbox(self.transport), (0, 0))
+        NotificationOutbox.objects.update(next_attempt_at=timezone.now())
+        self.assertEqual(drain_outbox(self.transport), (3, 0))
+
+    @override_settings(NOTIFICATION_DELIVERY_MAX_ATTEMPTS=1)
+    def test_gives_up_after_max_attempts(self):
+        self.transport.fail_next = 1
+        drain_outbox(self.transport)
+        self.assertEqual(NotificationOutbox.objects.filter(failed=True).count(), 3)
+        NotificationOutbox.objects.update(next_attempt_at=timezone.now())
+        self.assertEqual(drain_outbox(self.transport), (0, 0))
+
+    def test_requeue_while_claimed_keeps_the_new_payload(self):
+        entries = claim_batch(10)
+        notification = Notification.objects.get(id=entries[0].notification_id)
+        notification.message = 'Updated while sending'
+        NotificationOutbox.enqueue([notification])
+
+        self.assertEqual(deliver_batch(entries, self.transport), 3)
+        entry = NotificationOutbox.objects.get()
+        self.assertEqual(entry.payload['message'], 'Updated while sending')
+        self.assertEqual(drain_outbox(self.transport), (1, 0))
+
+    @override_settings(NOTIFICATION_DELIVERY_MAX_ATTEMPTS=1)
+    def test_requeue_clears_failed_state(self):
+        self.transport.fail_next = 1
+        drain_outbox(self.transport)
+        NotificationOutbox.enqueue(Notification.objects.all())
+        self.assertFalse(NotificationOutbox.objects.filter(failed=True).exists())
+        self.assertEqual(drain_outbox(self.transport), (3, 0))
+
+    @override_settings(NOTIFICATION_REALTIME_TRANSPORT='notifications.delivery.StubTransport')
+    def test_command_drains_once(self):
+        out = StringIO()
+        call_command('deliver_notifications', '--once', stdout=out)
+        self.assertIn('Delivered 3 notification(s)', out.getvalue())
+        self.assertFalse(NotificationOutbox.objects.exists())
+
+
+class NotificationGroupingTests(TestCase):
+    def setUp(self):
+        self.author = make_user('author')
+        self.post = Post.objects.create(author=self.author, content='Hello')
+        self.fans = [make_user(f'fan{i}') for i in range(5)]
+
+    def like(self, fan):
+        with self.captureOnCommitCallbacks(execute=True):
+            Like.objects.create(user=fan, post=self.post)
+
+    def test_likes_collapse_into_one_row(self):
+        for fan in self.fans:
+            self.like(fan)
+        notification = Notification.objects.get(recipient=self.author)
+        self.assertEqual(notification.actor_count, 5)
+        self.assertEqual(
+            [actor['username'] for actor in notification.recent_actors],
+            ['fan4', 'fan3', 'fan2']
+        )
+        self.assertEqual(notification.sender, self.fans[4])
+        self.assertEqual(notification.message, '@fan4 and 4 others liked your post')
+
+    def test_new_activity_resurfaces_read_group(self):
+        self.like(self.fans[0])
+        Notification.objects.update(is_read=True)
+        self.like(self.fans[1])
+        notification = Notification.objects.get(recipient=self.author)
+        self.assertFalse(notification.is_read)
+        self.assertEqual(notification.message, '@fan1 and 1 other liked your post')
+
+    def test_types_and_window_are_separate_groups(self):
+        self.like(self.fans[0])
+        with self.captureOnCommitCallbacks(execute=True):
+            emit(comment_event(self.fans[0], self.post))
+        Notification.objects.update(created_at=timezone.now() - timedelta(days=2))
+        self.like(self.fans[1])
+        self.assertEqual(Notification.objects.filter(notification_type='like').count(), 2)
+        self.assertEqual(Notification.objects.filter(notification_type='comment').count(), 1)
+
+    def test_repeat_actor_not_counted_twice(self):
+        for _ in range(2):
+            with self.captureOnCommitCallbacks(execute=True):
+                emit(comment_event(self.fans[0], self.post))
+        notification = Notification.objects.get(recipient=self.author)
+        self.assertEqual(notification.actor_count, 1)
+        self.assertEqual(NotificationOutbox.objects.count(), 1)
+
+
+class UnreadCounterTests(TestCase):
+    def setUp(self):
+        self.author = make_user('author')
+        self.post = Post.objects.create(author=self.author, content='Hello')
+        self.fans = [make_user(f'fan{i}') for i in range(3)]
+        self.client = APIClient()
+        self.client.force_authenticate(self.author)
+        self.url = reverse('notifications:unread_notification_count')
+
+    def follow_all(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            for fan in self.fans:
+                Follow.objects.create(follower=fan, following=self.author)
+
+    def unread(self):
+        return self.client.get(self.url).data['unread_count']
+
+    def test_counter_tracks_writes_and_reads(self):
+        self.assertEqual(self.unread(), 0)
+        self.follow_all()
+        self.assertEqual(self.unread(), 3)
+
+        notification = Notification.objects.filter(recipient=self.author).first()
+        for _ in range(2):
+            self.client.post(reverse('notifications:mark_notification_read', args=[notification.id]))
+        self.assertEqual(self.unread(), 2)
+
+        self.client.post(reverse('notifications:mark_all_notifications_read'))
+        self.assertEqual(self.unread(), 0)
+
+    def test_resurfaced_group_counts_again(self):
+        self.unread()
+        with self.captureOnCommitCallbacks(execute=True):
+            Like.objects.create(user=self.fans[0], post=self.post)
+        with self.captureOnCommitCallbacks(execute=True):
+            Like.objects.create(user=self.fans[1], post=self.post)
+        self.assertEqual(self.unread(), 1)
+        self.client.post(reverse('notifications:mark_all_notifications_read'))
+        with self.captureOnCommitCallbacks(execute=True):
+            Like.objects.create(user=self.fans[2], post=self.post)
+        self.assertEqual(self.unread(), 1)
+
+    def test_endpoint_is_a_single_lookup(self):
+        self.follow_all()
+        self.unread()
+        with self.assertNumQueries(1):
+            self.assertEqual(self.unread(), 3)
+
+    def test_reconcile_fixes_drift(self):
+        self.follow_all()
+        self.unread()
+        Notification.objects.filter(recipient=self.author).first().delete()
+        UnreadNotificationCounter.objects.filter(user=self.author).update(unread_count=99)
+        call_command('reconcile_unread_counts', stdout=StringIO())
+        self.assertEqual(self.unread(), 2)
+
+
+class BatchMarkReadTests(TestCase):
+    def setUp(self):
+        self.author = make_user('author')
+        self.other = make_user('other')
+        self.fans = [make_user(f'fan{i}') for i in range(4)]
+        with self.captureOnCommitCallbacks(execute=True):
+            for fan in self.fans:
+                Follow.objects.create(follower=fan, following=self.author)
+            Follow.objects.create(follower=self.fans[0], following=self.other)
+        self.client = APIClient()
+        self.client.force_authenticate(self.author)
+        self.url = reverse('notifications:mark_notifications_read')
+        self.notifications = list(Notification.objects.filter(recipient=self.author).order_by('created_at', 'id'))
+
+    def test_marks_listed_ids_of_the_recipient_only(self):
+        foreign = Notification.objects.get(recipient=self.other)
+        ids = [self.notifications[0].id, self.notifications[1].id, foreign.id]
+        response = self.client.post(self.url, {'ids': ids}, format='json')
+
+        self.assertEqual(response.data['marked'], 2)
+        self.assertEqual(response.data['unread_count'], 2)
+        self.assertFalse(Notification.objects.get(id=foreign.id).is_read)
+
+        # Already-read notifications are not counted twice
+        response = self.client.post(self.url, {'ids': ids}, format='json')
+        self.assertEqual((response.data['marked'], response.data['unread_count']), (0, 2))
+
+    def test_marks_everything_up_to_the_watermark(self):
+        response = self.client.post(self.url, {'up_to_id': self.notifications[2].id}, format='json')
+        self.assertEqual((response.data['marked'], response.data['unread_count']), (3, 1))
+        self.assertEqual(
+            [n.is_read for n in Notification.objects.filter(recipient=self.author).order_by('created_at', 'id')],
+            [True, True, True, False]
+        )
+
+    def test_invalid_requests(self):
+        self.assertEqual(self.client.post(self.url, {}, format='json').status_code, 400)
+        both = {'ids': [self.notifications[0].id], 'up_to_id': self.notifications[0].id}
+        self.assertEqual(self.client.post(self.url, both, format='json').status_code, 400)
+        foreign = Notification.objects.get(recipient=self.other)
+        self.assertEqual(self.client.post(self.url, {'up_to_id': foreign.id}, format='json').status_code, 404)
+
+
+class BroadcastNotificationTests(TestCase):
+    def setUp(self):
+        self.admin = make_user('admin')
+        self.admin.is_staff = True
+        self.admin.save()
+        self.reader = make_user('reader')
+        self.fan = make_user('fan')
+        self.client = APIClient()
+
+    def broadcast(self, message):
+        self.client.force_authenticate(self.admin)
+        response = self.client.post(
+            reverse('notifications:send_global_notification'), {'message': message}
+        )
+        self.assertEqual(response.status_code, 201)
+        return response.data['details']['broadcast_id']
+
+    def test_broadcast_is_stored_once(self):
+        cache.clear()
+        notification_stats()
+        # One insert whatever the number of users; the recipient count comes
+        # from the cached dashboard statistics
+        with self.assertNumQueries(1):
+            self.broadcast('Maintenance tonight')
+        self.assertEqual(BroadcastNotification.objects.count(), 1)
+        self.assertFalse(Notification.objects.exists())
+
+    def test_merged_into_list_and_unread_count(self):
+        self.broadcast('First')
+        with self.captureOnCommitCallbacks(execute=True):
+            Follow.objects.create(follower=self.fan, following=self.reader)
+        latest = self.broadcast('Second')
+
+        self.client.force_authenticate(self.reader)
+        response = self.client.get(reverse('notifications:notification_list'))
+        rows = [(row['is_broadcast'], row['message']) for row in response.data['results']]
+        self.assertEqual(rows, [
+            (True, 'Second'), (False, '@fan started following you'), (True, 'First')
+        ])
+        unread_url = reverse('notifications:unread_notification_count')
+        self.assertEqual(self.client.get(unread_url).data['unread_count'], 3)
+
+        with self.assertNumQueries(1):
+            self.client.get(unread_url)
+
+        self.client.post(reverse('notifications:mark_broadcast_read', args=[latest]))
+        self.assertEqual(self.client.get(unread_url).data['unread_count'], 1)
+        response = self.client.get(reverse('notifications:notification_list'))
+        self.assertEqual([row['is_read'] for row in response.data['results']], [True, False, True])
+
+        self.client.post(reverse('notifications:mark_all_notifications_read'))
+        self.assertEqual(self.client.get(unread_url).data['unread_count'], 0)
+
+    def test_users_joining_later_do_not_see_old_broadcasts(self):
+        self.broadcast('Before you joined')
+        newcomer = make_user('newcomer')
+        self.client.force_authenticate(newcomer)
+        response = self.client.get(reverse('notifications:notification_list'))
+        self.assertEqual(response.data['results'], [])
+        self.assertEqual(
+            self.client.get(reverse('notifications:unread_notification_count')).data['unread_count'], 0
+        )
+
+
+class NotificationListQueryTests(TestCase):
+    def setUp(self):
+        self.author = make_user('author')
+        self.post = Post.objects.create(author=self.author, content='x' * 150)
+        self.client = APIClient()
+        self.client.force_authenticate(self.author)
+        self.url = reverse('notifications:notification_list')
+
+    def add_activity(self, count):
+        start = User.objects.count()
+        with self.captureOnCommitCallbacks(execute=True):
+            for i in range(start, start + count):
+                fan = make_user(f'fan{i}')
+                Follow.objects.create(follower=fan, following=self.author)
+                Post.objects.create(author=self.author, content=f'post {i}').likes.create(user=fan)
+
+    def test_query_count_does_not_grow_with_page_size(self):
+        self.add_activity(2)
+        with CaptureQueriesContext(connection) as small:
+            self.client.get(self.url, {'include': 'post'})
+        self.add_activity(8)
+        with CaptureQueriesContext(connection) as large:
+            response = self.client.get(self.url, {'include': 'post'})
+        self.assertEqual(len(response.data['results']), 20)
+        self.assertEqual(len(large), len(small))
+
+    def test_sender_card_and_optional_post_snippet(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Like.objects.create(user=make_user('fan'), post=self.post)
+
+        row = self.client.get(self.url).data['results'][0]
+        self.assertEqual(set(row['sender']), {'id', 'username', 'full_name', 'avatar_url', 'is_verified'})
+        self.assertNotIn('post_snippet', row)
+
+        row = self.client.get(self.url, {'include': 'post'}).data['results'][0]
+        self.assertEqual(row['post'], self.post.id)
+        self.assertEqual(row['post_snippet']['content'], 'x' * 100 + '...')
+
+
+class NotificationStreamTests(TestCase):
+    def setUp(self):
+        self.author = make_user('author')
+        self.fans = [make_user(f'fan{i}') for i in range(2)]
+        with self.captureOnCommitCallbacks(execute=True):
+            for fan in self.fans:
+                Follow.objects.create(follower=fan, following=self.author)
+        self.first, self.second = Notification.objects.order_by('id')
+        token = StreamToken.for_user(self.author)
+        self.url = f"{reverse('notifications:notification_stream')}?token={token}"
+        self.access_token = RefreshToken.for_user(self.author).access_token
+
+    async def read_events(self, response, count):
+        events = []
+        async for chunk in response.streaming_content:
+            chunk = chunk.decode()
+            if chunk.startswith('id: '):
+                events.append(json.loads(chunk.split('data: ', 1)[1]))
+                if len(events) == count:
+                    break
+        return events
+
+    async def test_requires_authentication(self):
+        response = await self.async_client.get(reverse('notifications:notification_stream'))
+        self.assertEqual(response.status_code, 401)
+
+    def test_wsgi_requests_are_sent_to_the_poll_endpoint(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 501)
+        self.assertEqual(response.json()['poll_url'], reverse('notifications:notification_poll'))
+
+    async def test_query_token_must_be_a_stream_token(self):
+        response = await self.async_client.get(
+            f"{reverse('notifications:notification_stream')}?token={self.access_token}"
+        )
+        self.assertEqual(response.status_code, 401)
+
+    def test_stream_token_is_issued_and_authenticates_nothing_else(self):
+        client = APIClient()
+        client.force_authenticate(self.author)
+        response = client.post(reverse('notifications:notification_stream_token'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['expires_in'], 60)
+        self.assertEqual(StreamToken(response.data['token'])['user_id'], self.author.id)
+
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['token']}")
+        self.assertEqual(client.get(reverse('notifications:unread_notification_count')).status_code, 401)
+
+    async def test_resumes_from_last_event_id(self):
+        response = await self.async_client.get(
+            self.url, headers={'Last-Event-ID': event_cursor(self.first.created_at, self.first.id)}
+        )
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        events = await asyncio.wait_for(self.read_events(response, 1), 5)
+        self.assertEqual(events[0]['id'], self.second.id)
+
+    async def test_receives_published_notifications(self):
+        response = await self.async_client.get(self.url)
+        stream = response.streaming_content
+        # The retry hint is sent once the subscription is registered
+        self.assertTrue((await anext(stream)).startswith(b'retry:'))
+        get_bus().publish(self.author.id, notification_event(self.second))
+        get_bus().publish(self.fans[0].id, notification_event(self.first))
+        events = await asyncio.wait_for(self.read_events(response, 1), 5)
+        self.assertEqual(events[0]['id'], self.second.id)
+        self.assertEqual(events[0]['recipient_id'], self.author.id)
+
+    async def test_bus_unsubscribe(self):
+        bus = InProcessBus()
+        queue = bus.subscribe(self.author.id)
+        bus.publish(self.author.id, {'id': 1})
+        self.assertEqual(await asyncio.wait_for(queue.get(), 1), {'id': 1})
+        bus.unsubscribe(self.author.id, queue)
+        bus.publish(self.author.id, {'id': 2})
+        await asyncio.sleep(0)
+        self.assertTrue(queue.empty())
+        self.assertEqual(bus.subscriber_count(), 0)
+
+    def test_write_path_publishes_after_commit(self):
+        post = Post.objects.create(author=self.author, content='Hello')
+        with mock.patch.object(InProcessBus, 'publish') as publish:
+            with self.captureOnCommitCallbacks() as callbacks:
+                Like.objects.create(user=self.fans[0], post=post)
+            self.assertFalse(publish.called)
+            with self.captureOnCommitCallbacks(execute=True):
+                for callback in callbacks:
+                    callback()
+        publish.assert_called_once()
+        self.assertEqual(publish.call_args.args[0], self.author.id)
+
+
+class NotificationPollTests(TestCase):
+    def setUp(self):
+        self.author = make_user('author')
+        self.fan = make_user('fan')
+        with self.captureOnCommitCallbacks(execute=True):
+            Follow.objects.create(follower=self.fan, following=self.author)
+        self.notification = Notification.objects.get()
+        self.token = RefreshToken.for_user(self.author).access_token
+        self.url = reverse('notifications:notification_poll')
+
+    def poll(self, **params):
+        return self.async_client.get(self.url, params, headers={'Authorization': f'Bearer {self.token}'})
+
+    async def test_returns_newer_notifications_immediately(self):
+        response = await self.poll(since_id=self.notification.id - 1)
+        data = response.json()
+        self.assertEqual([event['id'] for event in data['results']], [self.notification.id])
+        self.assertEqual(data['unread_count'], 1)
+
+        response = await self.poll(since_id=data['since_id'], timeout=0)
+        self.assertEqual(response.json()['results'], [])
+
+    async def test_parks_until_published(self):
+        request = asyncio.ensure_future(self.poll(timeout=5))
+        bus = get_bus()
+        while not bus.subscriber_count():
+            await asyncio.sleep(0.01)
+        bus.publish(self.author.id, notification_event(self.notification))
+        data = (await asyncio.wait_for(request, 5)).json()
+        self.assertEqual([event['id'] for event in data['results']], [self.notification.id])
+        self.assertEqual(data['since_id'], data['results'][0]['cursor'])
+
+    async def test_invalid_parameters(self):
+        self.assertEqual((await self.poll(timeout='soon')).status_code, 400)
+        self.assertEqual((await self.poll(since_id='abc')).status_code, 400)
+        response = await self.async_client.get(self.url)
+        self.assertEqual(response.status_code, 401)
+        # Query-string tokens are only accepted by the stream
+        response = await self.async_client.get(self.url, {'token': str(self.token)})
+        self.assertEqual(response.status_code, 401)
+
+
+@override_settings(NOTIFICATION_RETENTION_DAYS={'like': 30, 'default': 90})
+class NotificationRetentionTests(TestCase):
+    def setUp(self):
+        self.author = make_user('author')
+        self.fan = make_user('fan')
+        self.archive_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.archive_dir)
+
+    def notification(self, notification_type, days_old, is_read=True):
+        notification = Notification.objects.create(
+            recipient=self.author,
+            sender=self.fan,
+            notification_type=notification_type,
+            message='@fan did something',
+            is_read=is_read,
+        )
+        Notification.objects.filter(id=notification.id).update(
+            created_at=timezone.now() - timedelta(days=days_old)
+        )
+        return notification
+
+    def test_prunes_read_notifications_past_their_type_ttl(self):
+        expired_like = self.notification('like', 40)
+        kept_follow = self.notification('follow', 40)
+        expired_follow = self.notification('follow', 100)
+        unread_like = self.notification('like', 400, is_read=False)
+
+        moved = prune_notifications(chunk_size=1)
+
+        self.assertEqual(moved, {'follow': 1, 'like': 1, 'comment': 0})
+        self.assertQuerySetEqual(
+            Notification.objects.order_by('id'), [kept_follow, unread_like]
+        )
+        self.assertFalse(Notification.objects.filter(id__in=[expired_like.id, expired_follow.id]).exists())
+
+    def test_command_archives_before_deleting(self):
+        expired = self.notification('like', 40)
+        self.notification('like', 1)
+
+        out = StringIO()
+        call_command('prune_notifications', archive_dir=self.archive_dir, stdout=out)
+
+        self.assertIn('Pruned 1 notifications', out.getvalue())
+        self.assertIn('rows/s', out.getvalue())
+        [archive] = Path(self.archive_dir).iterdir()
+        with gzip.open(archive, 'rt') as f:
+            rows = [json.loads(line) for line in f]
+        self.assertEqual([row['id'] for row in rows], [expired.id])
+        self.assertEqual(rows[0]['notification_type'], 'like')
+        self.assertEqual(Notification.objects.count(), 1)
+
+    def test_dry_run_keeps_rows(self):
+        self.notification('comment', 100)
+        out = StringIO()
+        call_command('prune_notifications', dry_run=True, stdout=out)
+        self.assertIn('Would prune 1 notifications', out.getvalue())
+        self.assertEqual(Notification.objects.count(), 1)
+
+
+class AdminNotificationStatsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_user(
+            username='admin', email='admin@example.com', password='password123', is_staff=True
+        )
+        self.author = make_user('author')
+        self.post = Post.objects.create(author=self.author, content='Hello')
+        self.fans = [make_user(f'fan{i}') for i in range(3)]
+        with self.captureOnCommitCallbacks(execute=True):
+            for fan in self.fans:
+                Follow.objects.create(follower=fan, following=self.author)
+                Like.objects.create(user=fan, post=self.post)
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def stats(self):
+        cache.clear()
+        return self.client.get(reverse('notifications:admin_notification_stats')).data
+
+    def test_rollup_matches_table(self):
+        author_client = APIClient()
+        author_client.force_authenticate(self.author)
+        follow = Notification.objects.filter(notification_type='follow').first()
+        author_client.post(reverse('notifications:mark_notification_read', args=[follow.id]))
+
+        expected = {
+            'total_notifications': 4,
+            'unread_notifications': 3,
+            'read_notifications': 1,
+            'notification_types': {'follow': 3, 'like': 1},
+            'recent_24h': 4,
+            'total_users': 5,
+            'active_users_with_notifications': 1,
+        }
+        self.assertEqual(self.stats(), expected)
+
+        # Resurfacing a read group moves it between hours without double counting
+        author_client.post(reverse('notifications:mark_all_notifications_read'))
+        Notification.objects.filter(notification_type='like').update(
+            created_at=timezone.now() - timedelta(hours=3)
+        )
+        call_command('rebuild_notification_stats', stdout=StringIO())
+        with self.captureOnCommitCallbacks(execute=True):
+            Like.objects.create(user=self.admin, post=self.post)
+        stats = self.stats()
+        self.assertEqual((stats['total_notifications'], stats['unread_notifications']), (4, 1))
+        like_hours = (
+            NotificationHourlyStat.objects.filter(notification_type='like').values('hour')
+            .annotate(hour_total=Sum('total'), hour_unread=Sum('unread')).filter(hour_total__gt=0)
+        )
+        self.assertEqual([row['hour_unread'] for row in like_hours], [1])
+
+    def test_writers_spread_over_shards(self):
+        hour = timezone.now() - timedelta(days=30)
+        deltas = StatDeltas()
+        deltas.add(hour, 'follow', total=1, unread=1)
+        for shard in (3, 7):
+            with mock.patch('notifications.stats.random.randrange', return_value=shard):
+                adjust_notification_stats(deltas)
+        self.assertEqual(
+            list(
+                NotificationHourlyStat.objects.filter(hour=stat_hour(hour))
+                .order_by('shard').values_list('shard', 'total')
+            ),
+            [(3, 1), (7, 1)]
+        )
+        self.assertEqual(self.stats()['total_notifications'], 6)
+
+        # Closed hours are folded back into one row
+        self.assertEqual(compact_notification_stats(timezone.now()), 1)
+        self.assertEqual(
+            list(NotificationHourlyStat.objects.filter(hour=stat_hour(hour)).values_list('shard', 'total')),
+            [(0, 2)]
+        )
+        with mock.patch('notifications.stats.random.randrange', return_value=3):
+            adjust_notification_stats(deltas)
+        self.assertEqual(self.stats()['total_notifications'], 7)
+
+    def test_recipient_count_tracks_writes_and_pruning(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Follow.objects.create(follower=self.author, following=self.fans[0])
+        self.assertEqual(self.stats()['active_users_with_notifications'], 2)
+
+        with CaptureQueriesContext(connection) as queries:
+            with self.captureOnCommitCallbacks(execute=True):
+                Like.objects.create(user=self.admin, post=self.post)
+        # The recipient check rides on the group lookup
+        lookups = [q for q in queries if q['sql'].startswith('SELECT') and 'FROM "notifications"' in q['sql']]
+        self.assertEqual(len(lookups), 1)
+        self.assertEqual(self.stats()['active_users_with_notifications'], 2)
+
+        Notification.objects.filter(recipient=self.fans[0]).update(
+            is_read=True, created_at=timezone.now() - timedelta(days=365)
+        )
+        prune_notifications()
+        self.assertEqual(self.stats()['active_users_with_notifications'], 1)
+
+    def test_stats_are_cached_and_skip_the_notifications_table(self):
+        self.stats()
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('notifications:admin_notification_stats'))
+        self.assertFalse(any('"notifications"' in query['sql'] for query in queries))
+
+    def test_admin_list_uses_rollup_totals(self):
+        response = self.client.get(reverse('notifications:admin_notification_list'))
+        self.assertEqual(response.data['count'], 4)
+        self.assertEqual(response.data['_admin_metadata']['total_notifications'], 4)
+        self.assertEqual(sorted(response.data['_admin_metadata']['notification_types']), ['follow', 'like'])
+
+
+@unittest.skipUnless(connection.vendor == 'postgresql', 'Partitioning requires PostgreSQL')
+class NotificationPartitionTests(TestCase):
+    def test_convert_and_drop_old_months(self):
+        author, fan = make_user('author'), make_user('fan')
+        old = Notification.objects.create(recipient=author, sender=fan, notification_type='follow', message='old')
+        Notification.objects.filter(id=old.id).update(created_at=timezone.now() - timedelta(days=120))
+        recent = Notification.objects.create(recipient=author, sender=fan, notification_type='follow', message='new')
+
+        self.assertEqual(partitions.convert_to_partitioned(), 2)
+        self.assertTrue(partitions.is_partitioned())
+
+        dropped = partitions.drop_partitions_before(timezone.now() - timedelta(days=60))
+        self.assertEqual(sum(dropped.values()), 1)
+        self.assertQuerySetEqual(Notification.objects.all(), [recent])
+        newer = Notification.objects.create(recipient=author, sender=fan, notification_type='follow', message='next')
+        self.assertGreater(newer.id, recent.id)
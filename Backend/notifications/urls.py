@@ -1,13 +1,18 @@
 from django.urls import path
-from . import views
+from . import streaming, views
 
 app_name = 'notifications'
 
 urlpatterns = [
     path('', views.NotificationListView.as_view(), name='notification_list'),
     path('<int:notification_id>/read/', views.MarkNotificationReadView.as_view(), name='mark_notification_read'),
+    path('mark-read/', views.MarkNotificationsReadView.as_view(), name='mark_notifications_read'),
     path('mark-all-read/', views.MarkAllNotificationsReadView.as_view(), name='mark_all_notifications_read'),
+    path('broadcasts/<int:broadcast_id>/read/', views.MarkBroadcastReadView.as_view(), name='mark_broadcast_read'),
     path('unread-count/', views.unread_notification_count, name='unread_notification_count'),
+    path('stream/', streaming.notification_stream, name='notification_stream'),
+    path('stream/token/', views.notification_stream_token, name='notification_stream_token'),
+    path('poll/', streaming.notification_poll, name='notification_poll'),
     
     # Admin endpoints
     path('admin/all/', views.AdminNotificationListView.as_view(), name='admin_notification_list'),
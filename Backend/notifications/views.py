@@ -2,25 +2,68 @@ from rest_framework import status, generics, permissions
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.decorators import api_view, permission_classes
+from rest_framework.pagination import PageNumberPagination
+from django.core.paginator import Paginator
 from django.shortcuts import get_object_or_404
-from django.contrib.auth import get_user_model
+from django.utils.functional import cached_property
 from django.db import models
+from django.db.models import Q, Value
 
-from .models import Notification
-from .serializers import NotificationSerializer
-
-User = get_user_model()
+from .counters import get_unread_count, mark_broadcasts_read, mark_notifications_read
+from .models import BroadcastNotification, Notification, UnreadNotificationCounter
+from .serializers import (
+    BroadcastNotificationSerializer, MarkNotificationsReadSerializer, NotificationSerializer
+)
+from .stats import notification_stats
+from .streaming import StreamToken
 
 
 class NotificationListView(generics.ListAPIView):
-    """Get user's notifications."""
+    """Get user's notifications with admin broadcasts merged in by time."""
     serializer_class = NotificationSerializer
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
-        return Notification.objects.filter(
-            recipient=self.request.user
-        ).order_by('-created_at')
+        user = self.request.user
+        notifications = (
+            Notification.objects.filter(recipient=user).order_by()
+            .annotate(kind=Value('notification', output_field=models.CharField()))
+            .values_list('created_at', 'id', 'kind')
+        )
+        broadcasts = (
+            BroadcastNotification.visible_to(user).order_by()
+            .annotate(kind=Value('broadcast', output_field=models.CharField()))
+            .values_list('created_at', 'id', 'kind')
+        )
+        return notifications.union(broadcasts, all=True).order_by('-created_at', '-id')
+
+    def list(self, request, *args, **kwargs):
+        page = self.paginate_queryset(self.get_queryset())
+        ids = {'notification': [], 'broadcast': []}
+        for _, item_id, kind in page:
+            ids[kind].append(item_id)
+
+        # One query per kind however long the page: senders (and posts,
+        # when inlined) are joined rather than fetched per row
+        include_post = 'post' in request.query_params.get('include', '').split(',')
+        related = ('sender', 'post') if include_post else ('sender',)
+        notifications = Notification.objects.select_related(*related).in_bulk(ids['notification'])
+        broadcasts = BroadcastNotification.objects.select_related('sender').in_bulk(ids['broadcast'])
+        context = self.get_serializer_context()
+        context['include_post'] = include_post
+        if broadcasts:
+            context['broadcast_read_id'] = (
+                UnreadNotificationCounter.objects.filter(user_id=request.user.id)
+                .values_list('broadcast_read_id', flat=True).first() or 0
+            )
+
+        data = [
+            NotificationSerializer(notifications[item_id], context=context).data
+            if kind == 'notification' else
+            BroadcastNotificationSerializer(broadcasts[item_id], context=context).data
+            for _, item_id, kind in page
+        ]
+        return self.get_paginated_response(data)
 
 
 class MarkNotificationReadView(APIView):
@@ -29,13 +72,13 @@ class MarkNotificationReadView(APIView):
 
     def post(self, request, notification_id):
         try:
-            notification = get_object_or_404(
-                Notification,
+            get_object_or_404(
+                Notification.objects.only('id'),
                 id=notification_id,
                 recipient=request.user
             )
-            notification.is_read = True
-            notification.save()
+            # Only an unread -> read transition changes the counter
+            mark_notifications_read(Notification.objects.filter(id=notification_id))
 
             return Response({
                 'message': 'Notification marked as read.'
@@ -52,36 +95,104 @@ class MarkAllNotificationsReadView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def post(self, request):
-        notifications = Notification.objects.filter(
-            recipient=request.user,
-            is_read=False
-        )
-        
-        count = notifications.update(is_read=True)
+        # Subtracts what was marked rather than zeroing, so notifications
+        # arriving meanwhile stay counted
+        count = mark_notifications_read(Notification.objects.filter(recipient=request.user))
+        mark_broadcasts_read(request.user)
 
         return Response({
             'message': f'{count} notifications marked as read.'
         }, status=status.HTTP_200_OK)
 
 
+class MarkNotificationsReadView(APIView):
+    """
+    Mark several notifications read: the listed ``ids``, or everything up
+    to and including ``up_to_id`` in list order.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        serializer = MarkNotificationsReadSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        notifications = Notification.objects.filter(recipient=request.user)
+
+        if 'ids' in serializer.validated_data:
+            notifications = notifications.filter(id__in=serializer.validated_data['ids'])
+        else:
+            anchor = get_object_or_404(
+                notifications.only('id', 'created_at'),
+                id=serializer.validated_data['up_to_id']
+            )
+            # The list is ordered by (created_at, id), and grouped
+            # notifications move forward in time, so the watermark is the
+            # anchor's position rather than its id alone
+            notifications = notifications.filter(
+                Q(created_at__lt=anchor.created_at) |
+                Q(created_at=anchor.created_at, id__lte=anchor.id)
+            )
+
+        count = mark_notifications_read(notifications)
+        return Response({
+            'message': f'{count} notifications marked as read.',
+            'marked': count,
+            'unread_count': get_unread_count(request.user)
+        }, status=status.HTTP_200_OK)
+
+
+class MarkBroadcastReadView(APIView):
+    """Mark a broadcast, and every earlier broadcast, as read."""
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request, broadcast_id):
+        get_object_or_404(
+            BroadcastNotification.visible_to(request.user).only('id'),
+            id=broadcast_id
+        )
+        mark_broadcasts_read(request.user, broadcast_id)
+
+        return Response({
+            'message': 'Broadcast marked as read.'
+        }, status=status.HTTP_200_OK)
+
+
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
 def unread_notification_count(request):
     """Get count of unread notifications for the authenticated user."""
-    count = Notification.objects.filter(
-        recipient=request.user,
-        is_read=False
-    ).count()
-    
     return Response({
-        'unread_count': count
+        'unread_count': get_unread_count(request.user)
+    }, status=status.HTTP_200_OK)
+
+
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+def notification_stream_token(request):
+    """Issue a short-lived token for opening the notification stream with EventSource."""
+    token = StreamToken.for_user(request.user)
+    return Response({
+        'token': str(token),
+        'expires_in': int(StreamToken.lifetime.total_seconds())
     }, status=status.HTTP_200_OK)
 
 
+class RollupCountPaginator(Paginator):
+    """Paginator that takes the total from the stats rollup instead of COUNT(*)."""
+
+    @cached_property
+    def count(self):
+        return notification_stats()['total_notifications']
+
+
+class AdminNotificationPagination(PageNumberPagination):
+    django_paginator_class = RollupCountPaginator
+
+
 class AdminNotificationListView(generics.ListAPIView):
     """Admin-only view to get ALL notifications across all users."""
     serializer_class = NotificationSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = AdminNotificationPagination
 
     def get_queryset(self):
         # Check if user is admin
@@ -101,37 +212,19 @@ class AdminNotificationListView(generics.ListAPIView):
                 'detail': 'You do not have permission to view all system notifications.'
             }, status=status.HTTP_403_FORBIDDEN)
 
-        # Get queryset and apply pagination
-        queryset = self.get_queryset()
-        page = self.paginate_queryset(queryset)
-        
-        if page is not None:
-            serializer = self.get_serializer(page, many=True)
-            result = self.get_paginated_response(serializer.data)
-            
-            # Add admin metadata
-            result.data['_admin_metadata'] = {
-                'total_notifications': queryset.count(),
-                'is_admin_view': True,
-                'includes_all_users': True,
-                'user_count': User.objects.count(),
-                'notification_types': list(queryset.values_list('notification_type', flat=True).distinct())
-            }
-            
-            return result
-
-        serializer = self.get_serializer(queryset, many=True)
-        return Response({
-            'results': serializer.data,
-            'count': queryset.count(),
-            '_admin_metadata': {
-                'total_notifications': queryset.count(),
-                'is_admin_view': True,
-                'includes_all_users': True,
-                'user_count': User.objects.count(),
-                'notification_types': list(queryset.values_list('notification_type', flat=True).distinct())
-            }
-        })
+        # Totals come from the cached rollup rather than COUNT(*) queries
+        stats = notification_stats()
+        page = self.paginate_queryset(self.get_queryset())
+        serializer = self.get_serializer(page, many=True)
+        result = self.get_paginated_response(serializer.data)
+        result.data['_admin_metadata'] = {
+            'total_notifications': stats['total_notifications'],
+            'is_admin_view': True,
+            'includes_all_users': True,
+            'user_count': stats['total_users'],
+            'notification_types': list(stats['notification_types'])
+        }
+        return result
 
 
 @api_view(['GET'])
@@ -144,32 +237,7 @@ def admin_notification_stats(request):
             'error': 'Admin access required.'
         }, status=status.HTTP_403_FORBIDDEN)
 
-    # Get comprehensive notification statistics
-    total_notifications = Notification.objects.count()
-    unread_notifications = Notification.objects.filter(is_read=False).count()
-    read_notifications = Notification.objects.filter(is_read=True).count()
-    
-    # Notification types breakdown
-    notification_types = {}
-    for notif_type, count in Notification.objects.values_list('notification_type').annotate(count=models.Count('notification_type')):
-        notification_types[notif_type] = count
-    
-    # Recent notifications (last 24 hours)
-    from django.utils import timezone
-    from datetime import timedelta
-    recent_notifications = Notification.objects.filter(
-        created_at__gte=timezone.now() - timedelta(hours=24)
-    ).count()
-    
-    return Response({
-        'total_notifications': total_notifications,
-        'unread_notifications': unread_notifications,
-        'read_notifications': read_notifications,
-        'notification_types': notification_types,
-        'recent_24h': recent_notifications,
-        'total_users': User.objects.count(),
-        'active_users_with_notifications': Notification.objects.values('recipient').distinct().count(),
-    }, status=status.HTTP_200_OK)
+    return Response(notification_stats(), status=status.HTTP_200_OK)
 
 
 @api_view(['POST'])
@@ -201,31 +269,25 @@ def send_global_notification(request):
         }, status=status.HTTP_400_BAD_REQUEST)
     
     # Valid notification types
-    valid_types = ['announcement', 'system', 'update', 'warning', 'info']
+    valid_types = [value for value, _ in BroadcastNotification.BROADCAST_TYPES]
     if notification_type not in valid_types:
         notification_type = 'announcement'
     
     try:
-        # Get all users except the admin (optional - you might want to include admin too)
-        all_users = User.objects.all()
-        
-        # Create notifications for all users
-        notifications_created = []
-        for recipient in all_users:
-            notification = Notification.objects.create(
-                recipient=recipient,
-                sender=user,  # Admin who sent the global notification
-                notification_type=notification_type,
-                message=message,
-                is_read=False
-            )
-            notifications_created.append(notification)
-        
+        # Stored once; every user sees it through the broadcast merge
+        broadcast = BroadcastNotification.objects.create(
+            sender=user,
+            notification_type=notification_type,
+            message=message
+        )
+
         return Response({
             'success': True,
             'message': 'Global notification sent successfully.',
             'details': {
-                'recipients_count': len(notifications_created),
+                'broadcast_id': broadcast.id,
+                # From the cached dashboard figures, not a COUNT per broadcast
+                'recipients_count': notification_stats()['total_users'],
                 'notification_type': notification_type,
                 'sent_by': user.username,
                 'message_preview': message[:100] + '...' if len(message) > 100 else message
@@ -254,10 +316,7 @@ def admin_mark_notification_read(request, notification_id):
         notification = get_object_or_404(Notification, id=notification_id)
         
         # Store the previous state for logging
-        was_read = notification.is_read
-        
-        notification.is_read = True
-        notification.save()
+        was_read = not mark_notifications_read(Notification.objects.filter(id=notification_id))
 
         return Response({
             'success': True,
@@ -0,0 +1 @@
+# Management commands package
\ No newline at end of file
@@ -0,0 +1,182 @@
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count, Max, Min
+
+from posts.models import Post
+from social.models import Like, Comment
+
+
+class Command(BaseCommand):
+    help = (
+        'Recompute Post.like_count and Post.comment_count from the likes and '
+        'comments tables, writing only posts whose counters drifted'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=5000,
+            help='Number of post IDs covered by each chunk'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=4,
+            help='Number of chunks processed concurrently (1 runs inline)'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Report drifted counters without writing them'
+        )
+        parser.add_argument(
+            '--resume',
+            action='store_true',
+            help='Continue from the checkpoint left by an interrupted run'
+        )
+        parser.add_argument(
+            '--checkpoint',
+            type=str,
+            default=str(Path(settings.BASE_DIR) / '.reconcile_engagement.json'),
+            help='Checkpoint file used by --resume'
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        workers = options['workers']
+        dry_run = options['dry_run']
+        checkpoint = Path(options['checkpoint'])
+
+        if chunk_size < 1 or workers < 1:
+            raise CommandError('--chunk-size and --workers must be positive.')
+
+        bounds = Post.objects.aggregate(low=Min('id'), high=Max('id'))
+        if bounds['low'] is None:
+            self.stdout.write('No posts to reconcile.')
+            return
+
+        start = bounds['low']
+        if options['resume'] and checkpoint.exists():
+            start = max(start, json.loads(checkpoint.read_text())['next_id'])
+            self.stdout.write(f'Resuming from post ID {start}')
+
+        chunks = [
+            (low, min(low + chunk_size, bounds['high'] + 1))
+            for low in range(start, bounds['high'] + 1, chunk_size)
+        ]
+        if not chunks:
+            self.stdout.write('Nothing left to reconcile.')
+            return
+
+        mode = 'Dry run' if dry_run else 'Reconciling'
+        self.stdout.write(
+            f'{mode}: {len(chunks)} chunks of {chunk_size} IDs with {workers} worker(s)'
+        )
+
+        self.started = time.monotonic()
+        self.scanned = 0
+        self.fixed = 0
+        self.pending = {low for low, _ in chunks}
+        self.chunk_ends = dict(chunks)
+
+        if workers == 1:
+            for index, (low, high) in enumerate(chunks, 1):
+                self.record(index, len(chunks), self.reconcile_chunk(low, high, dry_run),
+                            dry_run, checkpoint)
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                futures = [
+                    pool.submit(self.run_in_thread, low, high, dry_run)
+                    for low, high in chunks
+                ]
+                for index, future in enumerate(as_completed(futures), 1):
+                    self.record(index, len(chunks), future.result(), dry_run, checkpoint)
+
+        if not dry_run and checkpoint.exists():
+            checkpoint.unlink()
+
+        elapsed = time.monotonic() - self.started
+        verb = 'would be updated' if dry_run else 'updated'
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Scanned {self.scanned} posts in {elapsed:.1f}s; '
+                f'{self.fixed} {verb}.'
+            )
+        )
+
+    def run_in_thread(self, low, high, dry_run):
+        """Worker entry point; each thread owns and closes its connection."""
+        try:
+            return self.reconcile_chunk(low, high, dry_run)
+        finally:
+            connection.close()
+
+    def reconcile_chunk(self, low, high, dry_run):
+        """Compare stored counters in [low, high) with grouped aggregates."""
+        id_range = {'post_id__gte': low, 'post_id__lt': high}
+        like_counts = dict(
+            Like.objects.filter(**id_range)
+            .values('post_id').annotate(total=Count('id'))
+            .values_list('post_id', 'total')
+        )
+        comment_counts = dict(
+            Comment.objects.filter(is_active=True, **id_range)
+            .values('post_id').annotate(total=Count('id'))
+            .values_list('post_id', 'total')
+        )
+
+        posts = Post.objects.filter(id__gte=low, id__lt=high).values_list(
+            'id', 'like_count', 'comment_count'
+        )
+        scanned = 0
+        changed = []
+        diffs = []
+        for post_id, like_count, comment_count in posts:
+            scanned += 1
+            actual_likes = like_counts.get(post_id, 0)
+            actual_comments = comment_counts.get(post_id, 0)
+            if (like_count, comment_count) != (actual_likes, actual_comments):
+                changed.append(Post(
+                    id=post_id,
+                    like_count=actual_likes,
+                    comment_count=actual_comments
+                ))
+                diffs.append(
+                    f'post {post_id}: like_count {like_count} -> {actual_likes}, '
+                    f'comment_count {comment_count} -> {actual_comments}'
+                )
+
+        if changed and not dry_run:
+            with transaction.atomic():
+                Post.objects.bulk_update(changed, ['like_count', 'comment_count'])
+
+        return low, scanned, diffs
+
+    def record(self, index, total, result, dry_run, checkpoint):
+        """Report progress and advance the contiguous checkpoint watermark."""
+        low, scanned, diffs = result
+        self.scanned += scanned
+        self.fixed += len(diffs)
+        if dry_run:
+            for diff in diffs:
+                self.stdout.write(f'  {diff}')
+
+        elapsed = max(time.monotonic() - self.started, 1e-6)
+        self.stdout.write(
+            f'[{index}/{total}] {self.scanned} posts scanned, {self.fixed} drifted '
+            f'({self.scanned / elapsed:.0f} posts/s)'
+        )
+
+        # Chunks finish out of order; only checkpoint below the lowest unfinished one
+        was_lowest = low == min(self.pending)
+        self.pending.discard(low)
+        if not dry_run and was_lowest:
+            next_id = min(self.pending) if self.pending else self.chunk_ends[low]
+            checkpoint.write_text(json.dumps({'next_id': next_id}))
@@ -2,6 +2,8 @@
 ASGI config for project project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Serve it with an ASGI server (e.g. ``uvicorn project.asgi:application``) so the
+async live notification endpoints hold connections without a thread each.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
@@ -30,6 +30,7 @@ DJANGO_APPS = [
 THIRD_PARTY_APPS = [
     'rest_framework',
     'rest_framework_simplejwt',
+    'rest_framework_simplejwt.token_blacklist',
     'corsheaders',
 ]
 
@@ -98,6 +99,25 @@ if not config('DB_PASSWORD', default=None):
     }
 
 
+# Cache Configuration
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'socialconnect',
+    }
+}
+
+# Share the cache across workers when Redis is configured
+REDIS_URL = config('REDIS_URL', default='')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -142,10 +162,21 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # Custom User Model
 AUTH_USER_MODEL = 'accounts.User'
 
+AUTHENTICATION_BACKENDS = [
+    'accounts.backends.UsernameOrEmailBackend',
+]
+
+# Login and registration hash passwords on a per-process worker pool (see accounts.hashing)
+# Workers per web process; 0 hashes on the request threads. Requests beyond workers + pending get a 503
+PASSWORD_HASHING_WORKERS = config('PASSWORD_HASHING_WORKERS', default=2, cast=int)
+PASSWORD_HASHING_MAX_PENDING = config('PASSWORD_HASHING_MAX_PENDING', default=16, cast=int)
+PASSWORD_HASHING_TIMEOUT_SECONDS = 10
+PASSWORD_HASHING_RETRY_AFTER_SECONDS = 2
+
 # Django REST Framework Configuration
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'accounts.authentication.CachedJWTAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
@@ -168,7 +199,8 @@ SIMPLE_JWT = {
     'REFRESH_TOKEN_LIFETIME': timedelta(days=config('JWT_REFRESH_TOKEN_LIFETIME', default=7, cast=int)),
     'ROTATE_REFRESH_TOKENS': True,
     'BLACKLIST_AFTER_ROTATION': True,
-    'UPDATE_LAST_LOGIN': True,
+    # UserLoginView records last_login itself, at most once a minute
+    'UPDATE_LAST_LOGIN': False,
     'ALGORITHM': 'HS256',
     'SIGNING_KEY': SECRET_KEY,
     'VERIFYING_KEY': None,
@@ -177,8 +209,28 @@ SIMPLE_JWT = {
     'USER_ID_CLAIM': 'user_id',
     'AUTH_TOKEN_CLASSES': ('rest_framework_simplejwt.tokens.AccessToken',),
     'TOKEN_TYPE_CLAIM': 'token_type',
+    'TOKEN_REFRESH_SERIALIZER': 'accounts.tokens.TokenRefreshSerializer',
 }
 
+# Refreshes consult an in-process Bloom filter before the blacklist table (see accounts.tokens)
+TOKEN_BLACKLIST_FILTER_CAPACITY = 100000
+TOKEN_BLACKLIST_FILTER_MAX_AGE_SECONDS = 5
+
+# Authenticated users are resolved from the cache for this long (see accounts.authentication)
+AUTH_USER_CACHE_SECONDS = 30
+
+# Follow Graph Index
+FOLLOW_GRAPH_PRELOAD = config('FOLLOW_GRAPH_PRELOAD', default=False, cast=bool)
+FOLLOW_GRAPH_MAX_CACHED_USERS = config('FOLLOW_GRAPH_MAX_CACHED_USERS', default=100000, cast=int)
+# None: check version stamps only when the cache is shared between workers
+FOLLOW_GRAPH_CHECK_VERSIONS = None
+# Local adjacency copies are reloaded after this long; stamps keep a shared-cache setup fresh sooner
+FOLLOW_GRAPH_MAX_AGE_SECONDS = 600 if REDIS_URL else 60
+
+# Follow Suggestions
+FOLLOW_SUGGESTIONS_PER_USER = 50
+FOLLOW_SUGGESTIONS_MAX_FANOUT = 1000
+
 # CORS Configuration
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:3000",
@@ -194,6 +246,43 @@ SUPABASE_URL = config('SUPABASE_URL', default='')
 SUPABASE_KEY = config('SUPABASE_KEY', default='')
 SUPABASE_SERVICE_KEY = config('SUPABASE_SERVICE_KEY', default='')
 SUPABASE_STORAGE_BUCKET = config('SUPABASE_STORAGE_BUCKET', default='socialconnect-media')
+# Supabase calls share one keep-alive connection pool per process (see utils.clients)
+SUPABASE_HTTP_POOL_SIZE = config('SUPABASE_HTTP_POOL_SIZE', default=10, cast=int)
+SUPABASE_HTTP_TIMEOUT_SECONDS = 10
+
+# Realtime Notification Delivery (see notifications.delivery)
+# Defaults to Supabase when configured, otherwise the in-memory stub
+NOTIFICATION_REALTIME_TRANSPORT = config('NOTIFICATION_REALTIME_TRANSPORT', default='')
+NOTIFICATION_DELIVERY_BATCH_SIZE = 100
+NOTIFICATION_DELIVERY_MAX_ATTEMPTS = 8
+NOTIFICATION_DELIVERY_BACKOFF_SECONDS = 2
+NOTIFICATION_DELIVERY_MAX_BACKOFF_SECONDS = 600
+
+# Likes and comments on the same post within this window share one notification
+NOTIFICATION_GROUP_WINDOW_HOURS = 24
+
+# Live notification streams (served from the ASGI app, see notifications.bus)
+# Defaults to Redis pub/sub when REDIS_URL is set, otherwise in-process
+NOTIFICATION_BUS = config('NOTIFICATION_BUS', default='')
+NOTIFICATION_STREAM_HEARTBEAT_SECONDS = 15
+NOTIFICATION_STREAM_REPLAY_LIMIT = 100
+NOTIFICATION_POLL_MAX_TIMEOUT_SECONDS = 30
+# Lifetime of the ?token= credential EventSource clients open the stream with
+NOTIFICATION_STREAM_TOKEN_SECONDS = 60
+
+# Read notifications older than this many days are pruned (see notifications.retention)
+NOTIFICATION_RETENTION_DAYS = {
+    'follow': 90,
+    'like': 30,
+    'comment': 90,
+    'default': 90,
+}
+NOTIFICATION_ARCHIVE_DIR = config('NOTIFICATION_ARCHIVE_DIR', default=str(BASE_DIR / 'archive' / 'notifications'))
+
+# Admin notification statistics are served from an hourly rollup, cached this long
+NOTIFICATION_STATS_CACHE_SECONDS = 30
+# Rollup rows per (hour, type) that concurrent writers spread their updates over
+NOTIFICATION_STATS_SHARDS = 16
 
 # Email Configuration
 EMAIL_BACKEND = config('EMAIL_BACKEND', default='django.core.mail.backends.console.EmailBackend')
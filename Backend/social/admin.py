@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Follow, Like, Comment
+from .models import Follow, FollowSuggestion, Like, Comment
 
 
 @admin.register(Follow)
@@ -13,6 +13,16 @@ class FollowAdmin(admin.ModelAdmin):
     readonly_fields = ('created_at',)
 
 
+@admin.register(FollowSuggestion)
+class FollowSuggestionAdmin(admin.ModelAdmin):
+    """Admin configuration for FollowSuggestion model."""
+    
+    list_display = ('user', 'candidate', 'mutual_count', 'score', 'computed_at')
+    search_fields = ('user__username', 'candidate__username')
+    ordering = ('user', '-score')
+    readonly_fields = ('computed_at',)
+
+
 @admin.register(Like)
 class LikeAdmin(admin.ModelAdmin):
     """Admin configuration for Like model."""
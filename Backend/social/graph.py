@@ -0,0 +1,398 @@
+"""
+In-process follow-graph index.
+
+Adjacency is kept as sorted integer arrays, either in a compact CSR layout
+(one ``nodes`` array, one ``offsets`` array and one ``targets`` array per
+direction) built by a full load, or as per-user arrays loaded lazily from the
+``follows`` table. Membership tests are binary searches and set operations are
+merges over sorted arrays, so nothing here allocates Python ints per edge.
+
+Follow/unfollow events are applied copy-on-write after commit. Every change
+also advances a global clock in the shared cache and stamps the user with
+it. Each local copy remembers the stamp it was loaded at (the CSR snapshot
+remembers the clock at load time); a newer stamp means another process
+changed that user, so the copy is dropped and reloaded from the database.
+Several workers therefore stay coherent without a broker, provided the cache
+is shared between them; with a per-process cache version checks are off.
+
+Either way every local copy is reloaded once it is older than
+``FOLLOW_GRAPH_MAX_AGE_SECONDS``, which bounds how stale an answer can be if
+a stamp is lost to cache eviction or never reaches this process. The index
+only serves reads that tolerate that (suggestions); feeds and privacy checks
+query the ``follows`` table.
+"""
+import logging
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+
+from utils.cache import is_shared_cache
+
+logger = logging.getLogger('socialconnect')
+
+FOLLOWING = 'following'
+FOLLOWERS = 'followers'
+
+VERSION_KEY = 'follow_graph:v:{}:{}'
+CLOCK_KEY = 'follow_graph:clock'
+
+
+def typecode_for(max_id):
+    """Smallest unsigned array typecode able to hold ``max_id``."""
+    return 'I' if max_id < 2 ** 32 else 'Q'
+
+
+def contains_sorted(values, item):
+    """Binary-search membership test on a sorted sequence."""
+    index = bisect_left(values, item)
+    return index < len(values) and values[index] == item
+
+
+def intersect_sorted(left, right):
+    """
+    Intersect two sorted sequences.
+
+    Uses a linear merge when the inputs are of similar size and switches to
+    binary-searching the larger input when one side is much smaller, giving
+    O(min(m, n) * log(max(m, n))) for skewed inputs such as a user following
+    ten accounts against a celebrity's follower list.
+    """
+    if len(left) > len(right):
+        left, right = right, left
+    if not left:
+        return []
+    if len(left) * 16 < len(right):
+        result = []
+        low = 0
+        for item in left:
+            low = bisect_left(right, item, low)
+            if low == len(right):
+                break
+            if right[low] == item:
+                result.append(item)
+        return result
+
+    result = []
+    i = j = 0
+    while i < len(left) and j < len(right):
+        a, b = left[i], right[j]
+        if a == b:
+            result.append(a)
+            i += 1
+            j += 1
+        elif a < b:
+            i += 1
+        else:
+            j += 1
+    return result
+
+
+class CSRAdjacency:
+    """Immutable compressed-sparse-row adjacency for one edge direction."""
+
+    def __init__(self, nodes, offsets, targets):
+        self.nodes = nodes
+        self.offsets = offsets
+        self.targets = targets
+        self._view = memoryview(targets)
+
+    @classmethod
+    def from_sorted_pairs(cls, pairs, typecode='Q'):
+        """Build from ``(source, target)`` pairs sorted by source then target."""
+        nodes = array(typecode)
+        offsets = array('Q', [0])
+        targets = array(typecode)
+        current = None
+        for source, target in pairs:
+            if source != current:
+                if current is not None:
+                    offsets.append(len(targets))
+                nodes.append(source)
+                current = source
+            targets.append(target)
+        if current is not None:
+            offsets.append(len(targets))
+        return cls(nodes, offsets, targets)
+
+    def transpose(self):
+        """Return the reverse direction using a counting sort over the arrays."""
+        typecode = self.targets.typecode
+        if not self.targets:
+            return CSRAdjacency(array(typecode), array('Q', [0]), array(typecode))
+
+        nodes = array(typecode, sorted(set(self.targets)))
+        position = {node: index for index, node in enumerate(nodes)}
+        counts = array('Q', bytes(8 * (len(nodes) + 1)))
+        for target in self.targets:
+            counts[position[target] + 1] += 1
+        for index in range(1, len(counts)):
+            counts[index] += counts[index - 1]
+
+        offsets = array('Q', counts)
+        cursor = array('Q', counts[:-1])
+        targets = array(typecode, bytes(self.targets.itemsize * len(self.targets)))
+        # Sources are visited in ascending order, so every bucket ends up sorted
+        for node_index, source in enumerate(self.nodes):
+            for edge in range(self.offsets[node_index], self.offsets[node_index + 1]):
+                bucket = position[self.targets[edge]]
+                targets[cursor[bucket]] = source
+                cursor[bucket] += 1
+        return CSRAdjacency(nodes, offsets, targets)
+
+    def neighbors(self, node):
+        """Sorted neighbours of ``node`` as a zero-copy view, or None."""
+        index = bisect_left(self.nodes, node)
+        if index == len(self.nodes) or self.nodes[index] != node:
+            return None
+        return self._view[self.offsets[index]:self.offsets[index + 1]]
+
+    @property
+    def edge_count(self):
+        return len(self.targets)
+
+    def nbytes(self):
+        return sum(
+            values.itemsize * len(values)
+            for values in (self.nodes, self.offsets, self.targets)
+        )
+
+
+class FollowGraphIndex:
+    """
+    Process-wide follow adjacency with lazy per-user loading.
+
+    Lookups prefer a per-user override array, then the CSR snapshot from a
+    full load, and finally load the user's row set from the database. The
+    number of lazily loaded users is bounded with an LRU policy.
+
+    ``check_versions`` defaults to whether the cache is shared between
+    processes; ``max_age`` (seconds, None for no limit) bounds the age of
+    any local copy.
+    """
+
+    def __init__(self, max_cached_users=100000, check_versions=None, max_age=None):
+        self.max_cached_users = max_cached_users
+        self.check_versions = is_shared_cache() if check_versions is None else check_versions
+        self.max_age = max_age
+        self._lock = threading.RLock()
+        self.clear()
+
+    def clear(self):
+        with self._lock:
+            self._csr = {FOLLOWING: None, FOLLOWERS: None}
+            self._stale = {FOLLOWING: set(), FOLLOWERS: set()}
+            self._cached = {FOLLOWING: OrderedDict(), FOLLOWERS: OrderedDict()}
+            self._versions = {}
+            self._loaded_at = {}
+            self._csr_clock = 0
+            self._csr_loaded_at = 0.0
+
+    # Loading
+
+    def load_all(self):
+        """Build CSR adjacency for both directions from the follows table."""
+        from .models import Follow
+
+        clock = self._clock()
+        max_id = max(
+            Follow.objects.order_by('-follower_id').values_list('follower_id', flat=True).first() or 0,
+            Follow.objects.order_by('-following_id').values_list('following_id', flat=True).first() or 0,
+        )
+        typecode = typecode_for(max_id)
+        pairs = Follow.objects.values_list('follower_id', 'following_id')
+        following = CSRAdjacency.from_sorted_pairs(
+            pairs.order_by('follower_id', 'following_id').iterator(chunk_size=10000), typecode
+        )
+        followers = CSRAdjacency.from_sorted_pairs(
+            pairs.order_by('following_id', 'follower_id')
+            .values_list('following_id', 'follower_id').iterator(chunk_size=10000),
+            typecode
+        )
+        self.install(following, followers, clock)
+        logger.info(
+            f"Follow graph loaded: {following.edge_count} edges, "
+            f"{following.nbytes() + followers.nbytes()} bytes"
+        )
+
+    def install(self, following, followers=None, clock=None):
+        """
+        Replace the CSR snapshot, e.g. with one read from an export.
+
+        ``clock`` is the graph clock the snapshot reflects; users changed
+        after it are reloaded from the database on first access.
+        """
+        with self._lock:
+            self.clear()
+            self._csr_clock = self._clock() if clock is None else clock
+            self._csr_loaded_at = time.monotonic()
+            self._csr[FOLLOWING] = following
+            self._csr[FOLLOWERS] = followers if followers is not None else following.transpose()
+
+    def _load_user(self, direction, user_id):
+        from .models import Follow
+
+        if direction == FOLLOWING:
+            ids = Follow.objects.filter(follower_id=user_id).order_by('following_id') \
+                .values_list('following_id', flat=True)
+        else:
+            ids = Follow.objects.filter(following_id=user_id).order_by('follower_id') \
+                .values_list('follower_id', flat=True)
+        return array('Q', ids)
+
+    # Versioning
+
+    def _shared_version(self, direction, user_id):
+        return cache.get(VERSION_KEY.format(direction, user_id), 0)
+
+    def _clock(self):
+        return cache.get(CLOCK_KEY, 0)
+
+    def _advance(self, direction, user_id):
+        """Advance the global clock and stamp ``user_id`` with it."""
+        # An evicted clock restarts from the wall clock, not zero, so new
+        # stamps still exceed the ones local copies were loaded at
+        start = int(time.time() * 1000)
+        cache.add(CLOCK_KEY, start, timeout=None)
+        try:
+            stamp = cache.incr(CLOCK_KEY)
+        except ValueError:
+            # Evicted between add() and incr()
+            cache.set(CLOCK_KEY, start, timeout=None)
+            stamp = start
+        cache.set(VERSION_KEY.format(direction, user_id), stamp, timeout=None)
+        return stamp
+
+    def _seen(self, direction, user_id):
+        if user_id in self._cached[direction]:
+            return self._versions.get((direction, user_id), 0)
+        return self._csr_clock
+
+    def _expired(self, loaded_at, now):
+        return self.max_age is not None and now - loaded_at >= self.max_age
+
+    def _local_copy(self, direction, user_id):
+        """The user's unexpired local row, None if it must be loaded. Call under the lock."""
+        now = time.monotonic()
+        cached = self._cached[direction]
+        if user_id in cached:
+            if not self._expired(self._loaded_at[(direction, user_id)], now):
+                cached.move_to_end(user_id)
+                return cached[user_id]
+            self._drop(direction, user_id)
+        csr = self._csr[direction]
+        if csr is None or user_id in self._stale[direction]:
+            return None
+        if self._expired(self._csr_loaded_at, now):
+            self._csr = {FOLLOWING: None, FOLLOWERS: None}
+            self._stale = {FOLLOWING: set(), FOLLOWERS: set()}
+            return None
+        values = csr.neighbors(user_id)
+        return values if values is not None else ()
+
+    def _drop(self, direction, user_id):
+        self._cached[direction].pop(user_id, None)
+        self._versions.pop((direction, user_id), None)
+        self._loaded_at.pop((direction, user_id), None)
+        self._stale[direction].add(user_id)
+
+    # Lookups
+
+    def _adjacency(self, direction, user_id):
+        if self._csr[FOLLOWING] is None and getattr(settings, 'FOLLOW_GRAPH_PRELOAD', False):
+            with self._lock:
+                if self._csr[FOLLOWING] is None:
+                    self.load_all()
+
+        stamp = self._shared_version(direction, user_id) if self.check_versions else 0
+        with self._lock:
+            if stamp <= self._seen(direction, user_id):
+                values = self._local_copy(direction, user_id)
+                if values is not None:
+                    return values
+
+        # Stamp read before the query: a change racing the load forces a reload
+        loaded_at = time.monotonic()
+        values = self._load_user(direction, user_id)
+        with self._lock:
+            self._store(direction, user_id, values, stamp, loaded_at)
+        return values
+
+    def _store(self, direction, user_id, values, version, loaded_at=None):
+        cached = self._cached[direction]
+        cached[user_id] = values
+        cached.move_to_end(user_id)
+        self._versions[(direction, user_id)] = version
+        self._loaded_at[(direction, user_id)] = time.monotonic() if loaded_at is None else loaded_at
+        self._stale[direction].discard(user_id)
+        while len(cached) > self.max_cached_users:
+            evicted, _ = cached.popitem(last=False)
+            self._versions.pop((direction, evicted), None)
+            self._loaded_at.pop((direction, evicted), None)
+            # Without its override, an edited CSR row would be out of date
+            self._stale[direction].add(evicted)
+
+    def following(self, user_id):
+        """Sorted IDs of the users ``user_id`` follows."""
+        return self._adjacency(FOLLOWING, user_id)
+
+    def followers(self, user_id):
+        """Sorted IDs of the users following ``user_id``."""
+        return self._adjacency(FOLLOWERS, user_id)
+
+    def is_following(self, follower_id, following_id):
+        return contains_sorted(self.following(follower_id), following_id)
+
+    def common_following(self, user_id, other_id):
+        """Users followed by both ``user_id`` and ``other_id``."""
+        return intersect_sorted(self.following(user_id), self.following(other_id))
+
+    def mutual_followers(self, user_id, other_id):
+        """Users following both ``user_id`` and ``other_id``."""
+        return intersect_sorted(self.followers(user_id), self.followers(other_id))
+
+    # Events
+
+    def apply(self, follower_id, following_id, created):
+        """Apply a committed follow (``created``) or unfollow event."""
+        for direction, user_id, other_id in (
+            (FOLLOWING, follower_id, following_id),
+            (FOLLOWERS, following_id, follower_id),
+        ):
+            if self.check_versions:
+                previous = self._shared_version(direction, user_id)
+                stamp = self._advance(direction, user_id)
+            else:
+                previous = stamp = 0
+            with self._lock:
+                if previous > self._seen(direction, user_id):
+                    # Another process changed this user since we loaded it
+                    self._drop(direction, user_id)
+                    continue
+
+                current = self._local_copy(direction, user_id)
+                if current is None:
+                    # Not held locally; the next lookup loads it fresh
+                    continue
+                # The edit does not make the rest of the row any fresher
+                loaded_at = self._loaded_at.get((direction, user_id), self._csr_loaded_at)
+
+                updated = array('Q', current)
+                index = bisect_left(updated, other_id)
+                present = index < len(updated) and updated[index] == other_id
+                if created and not present:
+                    updated.insert(index, other_id)
+                elif not created and present:
+                    del updated[index]
+                self._store(direction, user_id, updated, stamp, loaded_at)
+
+
+follow_graph = FollowGraphIndex(
+    max_cached_users=getattr(settings, 'FOLLOW_GRAPH_MAX_CACHED_USERS', 100000),
+    check_versions=getattr(settings, 'FOLLOW_GRAPH_CHECK_VERSIONS', None),
+    max_age=getattr(settings, 'FOLLOW_GRAPH_MAX_AGE_SECONDS', 60),
+)
@@ -0,0 +1,90 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from social.graph import CSRAdjacency, contains_sorted, intersect_sorted, typecode_for
+
+
+class Command(BaseCommand):
+    help = 'Measure memory and lookup speed of the CSR follow-graph index on a synthetic graph'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--edges',
+            type=int,
+            default=10_000_000,
+            help='Number of follow edges to generate'
+        )
+        parser.add_argument(
+            '--users',
+            type=int,
+            default=1_000_000,
+            help='Number of distinct users'
+        )
+        parser.add_argument(
+            '--lookups',
+            type=int,
+            default=100_000,
+            help='Number of membership tests to time'
+        )
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        edges = options['edges']
+        users = options['users']
+        rng = random.Random(options['seed'])
+        degree = max(1, edges // users)
+
+        self.stdout.write(f'Building {edges} edges over {users} users (degree ~{degree})...')
+        started = time.monotonic()
+        following = CSRAdjacency.from_sorted_pairs(
+            self.generate_pairs(rng, users, degree, edges), typecode_for(users)
+        )
+        followers = following.transpose()
+        build_seconds = time.monotonic() - started
+
+        total_edges = following.edge_count
+        resident = following.nbytes() + followers.nbytes()
+        self.stdout.write(f'Built in {build_seconds:.1f}s')
+        self.stdout.write(
+            f'Index size: {resident / 2**20:.1f} MiB for {total_edges} edges, '
+            f'{resident / max(total_edges, 1):.2f} bytes/edge (both directions)'
+        )
+
+        probes = [
+            (rng.randrange(1, users + 1), rng.randrange(1, users + 1))
+            for _ in range(options['lookups'])
+        ]
+        started = time.monotonic()
+        for source, target in probes:
+            contains_sorted(following.neighbors(source) or (), target)
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            f'Membership: {len(probes) / elapsed:,.0f} lookups/s '
+            f'({elapsed / len(probes) * 1e6:.2f} us each)'
+        )
+
+        started = time.monotonic()
+        for source, target in probes[:10_000]:
+            intersect_sorted(following.neighbors(source) or (), following.neighbors(target) or ())
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            f'Intersection of two following lists: '
+            f'{min(len(probes), 10_000) / elapsed:,.0f} pairs/s'
+        )
+
+    def generate_pairs(self, rng, users, degree, edges):
+        """Yield sorted (follower, following) pairs without materialising them."""
+        emitted = 0
+        for follower in range(1, users + 1):
+            remaining = edges - emitted
+            if remaining <= 0:
+                return
+            count = min(remaining, users - 1, max(1, int(rng.expovariate(1 / degree))))
+            targets = sorted(rng.sample(range(1, users + 1), count + 1))
+            for target in targets:
+                if target != follower and count:
+                    yield follower, target
+                    count -= 1
+                    emitted += 1
@@ -0,0 +1,68 @@
+import time
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Max
+
+from social.graph import CLOCK_KEY
+from social.models import Follow
+from social.snapshot import read_manifest, write_delta_snapshot, write_full_snapshot
+
+
+class Command(BaseCommand):
+    help = 'Export the follows table as a binary snapshot (or a delta) for offline analytics'
+
+    def add_arguments(self, parser):
+        parser.add_argument('output', type=str, help='Snapshot directory to create')
+        parser.add_argument(
+            '--since',
+            type=str,
+            help='Write a delta against this existing snapshot instead of a full export'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=20000,
+            help='Rows fetched per round trip from the server-side cursor'
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        started = time.monotonic()
+
+        # Read the high-water marks first; rows added during the export land in the next delta
+        graph_clock = cache.get(CLOCK_KEY, 0)
+        max_follow_id = Follow.objects.aggregate(top=Max('id'))['top'] or 0
+
+        edges = Follow.objects.filter(id__lte=max_follow_id).order_by(
+            'follower_id', 'following_id'
+        ).values_list('follower_id', 'following_id')
+
+        if options['since']:
+            try:
+                base = read_manifest(options['since'])
+            except FileNotFoundError:
+                raise CommandError(f'No snapshot found at {options["since"]}.')
+            base_max = base['max_follow_id']
+            current = edges.filter(id__lte=base_max).iterator(chunk_size=chunk_size)
+            added = edges.filter(id__gt=base_max).iterator(chunk_size=chunk_size)
+            added_count, removed_count = write_delta_snapshot(
+                options['output'], options['since'], current, added,
+                max_follow_id=max(max_follow_id, base_max), graph_clock=graph_clock
+            )
+            summary = f'{added_count} added and {removed_count} removed edges'
+            rows = added_count + removed_count
+        else:
+            rows = write_full_snapshot(
+                options['output'], edges.iterator(chunk_size=chunk_size),
+                max_follow_id=max_follow_id, graph_clock=graph_clock
+            )
+            summary = f'{rows} edges'
+
+        elapsed = max(time.monotonic() - started, 1e-6)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Wrote {summary} to {options["output"]} in {elapsed:.1f}s '
+                f'({rows / elapsed:.0f} rows/s)'
+            )
+        )
@@ -1,6 +1,7 @@
-from django.db import models
+from django.db import connection, models
 from django.conf import settings
 from django.core.exceptions import ValidationError
+from django.utils import timezone
 
 
 class Follow(models.Model):
@@ -25,6 +26,8 @@ class Follow(models.Model):
         indexes = [
             models.Index(fields=['follower']),
             models.Index(fields=['following']),
+            models.Index(fields=['follower', '-created_at']),
+            models.Index(fields=['following', '-created_at']),
         ]
 
     def __str__(self):
@@ -39,6 +42,82 @@ class Follow(models.Model):
         self.full_clean()
         super().save(*args, **kwargs)
 
+    @classmethod
+    def insert_new(cls, follower_id, following_ids, batch_size=500):
+        """
+        Insert the follows of ``following_ids`` that do not exist yet and
+        return the IDs this call inserted. ``bulk_create(ignore_conflicts=True)``
+        cannot tell which rows it skipped, so this uses
+        ``INSERT ... ON CONFLICT DO NOTHING RETURNING`` (PostgreSQL, SQLite 3.35+).
+        """
+        following_ids = list(following_ids)
+        table = connection.ops.quote_name(cls._meta.db_table)
+        created_at = cls._meta.get_field('created_at').get_db_prep_value(timezone.now(), connection)
+        inserted = []
+        with connection.cursor() as cursor:
+            for start in range(0, len(following_ids), batch_size):
+                batch = following_ids[start:start + batch_size]
+                cursor.execute(
+                    f'INSERT INTO {table} (follower_id, following_id, created_at) '
+                    f'VALUES {", ".join(["(%s, %s, %s)"] * len(batch))} '
+                    'ON CONFLICT (follower_id, following_id) DO NOTHING RETURNING following_id',
+                    [value for following_id in batch for value in (follower_id, following_id, created_at)]
+                )
+                inserted += [row[0] for row in cursor.fetchall()]
+        return inserted
+
+
+class FollowSuggestion(models.Model):
+    """
+    Precomputed friends-of-friends follow suggestion
+    """
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='follow_suggestions'
+    )
+    candidate = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    mutual_count = models.PositiveIntegerField(
+        help_text="Number of the user's followees who follow the candidate"
+    )
+    score = models.FloatField(
+        help_text="Mutual count normalized by the candidate's follower count"
+    )
+    computed_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        db_table = 'follow_suggestions'
+        unique_together = ('user', 'candidate')
+        indexes = [
+            models.Index(fields=['user', '-score']),
+        ]
+
+    def __str__(self):
+        return f"Suggest @{self.candidate.username} to @{self.user.username}"
+
+
+class SuggestionRefresh(models.Model):
+    """
+    Users whose follow set changed since their suggestions were computed
+    """
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='+'
+    )
+    queued_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'follow_suggestion_refresh'
+
+    def __str__(self):
+        return f"Refresh suggestions for user {self.user_id}"
+
 
 class Like(models.Model):
     """
@@ -62,6 +141,7 @@ class Like(models.Model):
         indexes = [
             models.Index(fields=['user']),
             models.Index(fields=['post']),
+            models.Index(fields=['post', '-created_at', '-id']),
         ]
 
     def __str__(self):
@@ -0,0 +1,69 @@
+"""
+Batched follow-relationship lookups between a viewer and a set of users.
+"""
+from django.db.models import Q
+
+from accounts.models import User
+from .models import Follow
+
+
+def get_follow_flags(viewer, user_ids):
+    """
+    Resolve the viewer's relationship to each of ``user_ids`` in one query.
+
+    Returns a dict with two sets:
+        followed_by_you: ids the viewer follows
+        follows_you: ids that follow the viewer
+    """
+    user_ids = set(user_ids)
+    flags = {'followed_by_you': set(), 'follows_you': set()}
+    if not user_ids or not viewer.is_authenticated:
+        return flags
+
+    rows = Follow.objects.filter(
+        Q(follower=viewer, following_id__in=user_ids) |
+        Q(follower_id__in=user_ids, following=viewer)
+    ).values_list('follower_id', 'following_id')
+
+    for follower_id, following_id in rows:
+        if follower_id == viewer.id:
+            flags['followed_by_you'].add(following_id)
+        if following_id == viewer.id:
+            flags['follows_you'].add(follower_id)
+    return flags
+
+
+def get_relationships(viewer, user_ids):
+    """
+    Describe the viewer's relationship to each active user in ``user_ids``.
+
+    Uses two indexed follows queries (one per direction) plus one users query
+    for privacy settings, whatever the number of IDs.
+    """
+    user_ids = set(user_ids)
+    privacy = dict(
+        User.objects.filter(id__in=user_ids, is_active=True)
+        .values_list('id', 'privacy_setting')
+    )
+    following = set(
+        Follow.objects.filter(follower=viewer, following_id__in=list(privacy))
+        .values_list('following_id', flat=True)
+    )
+    followed_by = set(
+        Follow.objects.filter(following=viewer, follower_id__in=list(privacy))
+        .values_list('follower_id', flat=True)
+    )
+
+    return {
+        user_id: {
+            'following': user_id in following,
+            'followed_by': user_id in followed_by,
+            'mutual': user_id in following and user_id in followed_by,
+            'can_view_profile': User.privacy_allows(
+                privacy_setting,
+                is_owner=user_id == viewer.id,
+                viewer_follows=user_id in following,
+            ),
+        }
+        for user_id, privacy_setting in privacy.items()
+    }
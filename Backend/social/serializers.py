@@ -1,6 +1,6 @@
 from rest_framework import serializers
-from .models import Follow, Like, Comment
-from accounts.serializers import UserProfileSerializer
+from .models import Follow, FollowSuggestion, Like, Comment
+from accounts.serializers import UserProfileSerializer, UserCardSerializer
 
 
 class FollowSerializer(serializers.ModelSerializer):
@@ -14,6 +14,27 @@ class FollowSerializer(serializers.ModelSerializer):
         read_only_fields = ('id', 'created_at')
 
 
+class FollowListSerializer(serializers.ModelSerializer):
+    """
+    One row of a followers/following list, showing only the other side.
+
+    The view passes ``side`` ('follower' or 'following') and batched
+    ``user_counts`` in the serializer context.
+    """
+    user = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Follow
+        fields = ('id', 'user', 'created_at')
+        read_only_fields = fields
+
+    def get_user(self, obj):
+        user = getattr(obj, self.context['side'])
+        data = UserCardSerializer(user).data
+        data.update(self.context['user_counts'].get(user.id, {}))
+        return data
+
+
 class FollowCreateSerializer(serializers.ModelSerializer):
     """Serializer for creating follow relationships."""
     
@@ -36,6 +57,38 @@ class FollowCreateSerializer(serializers.ModelSerializer):
         return value
 
 
+class FollowSuggestionSerializer(serializers.ModelSerializer):
+    """Serializer for precomputed follow suggestions."""
+    user = UserCardSerializer(source='candidate', read_only=True)
+
+    class Meta:
+        model = FollowSuggestion
+        fields = ('user', 'mutual_count', 'score')
+        read_only_fields = fields
+
+
+class BulkFollowSerializer(serializers.Serializer):
+    """Serializer for bulk follow requests."""
+    MAX_ACCOUNTS = 1000
+
+    user_ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), required=False, default=list
+    )
+    usernames = serializers.ListField(
+        child=serializers.CharField(max_length=30), required=False, default=list
+    )
+
+    def validate(self, attrs):
+        total = len(attrs['user_ids']) + len(attrs['usernames'])
+        if total == 0:
+            raise serializers.ValidationError('Provide "user_ids" and/or "usernames".')
+        if total > self.MAX_ACCOUNTS:
+            raise serializers.ValidationError(
+                f'At most {self.MAX_ACCOUNTS} accounts can be followed per request.'
+            )
+        return attrs
+
+
 class LikeSerializer(serializers.ModelSerializer):
     """Serializer for likes."""
     user = UserProfileSerializer(read_only=True)
@@ -46,6 +99,30 @@ class LikeSerializer(serializers.ModelSerializer):
         read_only_fields = ('id', 'user', 'created_at')
 
 
+class PostLikerSerializer(serializers.ModelSerializer):
+    """
+    Slim liker card for a post's likers list.
+
+    Relationship flags are read from the ``followed_by_you`` / ``follows_you``
+    id sets in the serializer context, which the view fills with one batched
+    query per page.
+    """
+    user = UserCardSerializer(read_only=True)
+    followed_by_you = serializers.SerializerMethodField()
+    follows_you = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Like
+        fields = ('user', 'followed_by_you', 'follows_you', 'created_at')
+        read_only_fields = fields
+
+    def get_followed_by_you(self, obj):
+        return obj.user_id in self.context.get('followed_by_you', ())
+
+    def get_follows_you(self, obj):
+        return obj.user_id in self.context.get('follows_you', ())
+
+
 class CommentCreateSerializer(serializers.ModelSerializer):
     """Serializer for creating comments."""
     
@@ -0,0 +1,31 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .graph import follow_graph
+from .models import Follow
+from .suggestions import follow_set_changed
+
+
+def follows_committed(follower_id, following_ids, created):
+    """Propagate committed follow changes to derived follow-graph state."""
+    for following_id in following_ids:
+        follow_graph.apply(follower_id, following_id, created)
+    follow_set_changed(follower_id, following_ids, created)
+
+
+@receiver(post_save, sender=Follow)
+def index_follow_created(sender, instance, created, **kwargs):
+    """Add the new edge to the follow graph and suggestions once committed."""
+    if created:
+        transaction.on_commit(
+            lambda: follows_committed(instance.follower_id, [instance.following_id], True)
+        )
+
+
+@receiver(post_delete, sender=Follow)
+def index_follow_deleted(sender, instance, **kwargs):
+    """Remove the edge from the follow graph and suggestions once committed."""
+    transaction.on_commit(
+        lambda: follows_committed(instance.follower_id, [instance.following_id], False)
+    )
@@ -0,0 +1,232 @@
+"""
+Binary follow-graph snapshots for offline analytics.
+
+A snapshot is a directory of little-endian flat arrays plus a JSON manifest,
+so it can be memory-mapped directly (e.g. ``numpy.memmap``) without parsing:
+
+    snapshot.json   manifest: kind, counts, dtypes, max_follow_id, base
+    ids.bin         int64, sorted user IDs; position in this array is the
+                    node index used by the edge arrays (the ID map)
+    src.bin         uint32 node index of the follower, edges sorted by (src, dst)
+    dst.bin         uint32 node index of the followed user
+
+A delta snapshot records changes relative to its ``base`` snapshot (full or
+another delta) as raw user-ID pairs, both sorted by (follower, following):
+
+    added.bin       int64 pairs followed since the base was taken
+    removed.bin     int64 pairs that existed in the base and are now gone
+
+Reading a NumPy view of a full snapshot::
+
+    ids = numpy.memmap(path / 'ids.bin', dtype='<i8', mode='r')
+    src = numpy.memmap(path / 'src.bin', dtype='<u4', mode='r')
+    dst = numpy.memmap(path / 'dst.bin', dtype='<u4', mode='r')
+    follower_ids, following_ids = ids[src], ids[dst]
+"""
+import heapq
+import json
+import shutil
+import sys
+from array import array
+from pathlib import Path
+
+from django.utils import timezone
+
+FORMAT_VERSION = 1
+MANIFEST = 'snapshot.json'
+ID_DTYPE = '<i8'
+INDEX_DTYPE = '<u4'
+CHUNK = 1 << 16
+
+
+def _write(handle, values):
+    if sys.byteorder != 'little':
+        values = array(values.typecode, values)
+        values.byteswap()
+    values.tofile(handle)
+
+
+def _read(path, typecode):
+    """Yield arrays of ``typecode`` from a little-endian file, chunk by chunk."""
+    with open(path, 'rb') as handle:
+        while True:
+            values = array(typecode)
+            try:
+                values.fromfile(handle, CHUNK)
+            except EOFError:
+                pass
+            if not values:
+                return
+            if sys.byteorder != 'little':
+                values.byteswap()
+            yield values
+
+
+def _read_pairs(path):
+    for values in _read(path, 'q'):
+        for index in range(0, len(values), 2):
+            yield values[index], values[index + 1]
+
+
+def read_manifest(path):
+    return json.loads((Path(path) / MANIFEST).read_text())
+
+
+def _publish(staging, target, manifest):
+    """Write the manifest last and move the directory into place."""
+    manifest.update({'format': FORMAT_VERSION, 'created_at': timezone.now().isoformat()})
+    (staging / MANIFEST).write_text(json.dumps(manifest, indent=2))
+    if target.exists():
+        shutil.rmtree(target)
+    staging.rename(target)
+
+
+def write_full_snapshot(target, edges, max_follow_id, graph_clock=0):
+    """
+    Write a full snapshot from ``(follower_id, following_id)`` pairs sorted
+    by follower then following. The pairs are spooled to disk as they
+    stream in, so memory use is bounded by the number of distinct users.
+    """
+    target = Path(target)
+    staging = target.with_name(target.name + '.partial')
+    if staging.exists():
+        shutil.rmtree(staging)
+    staging.mkdir(parents=True)
+
+    spool = staging / 'edges.tmp'
+    node_ids = set()
+    edge_count = 0
+    buffer = array('q')
+    with open(spool, 'wb') as handle:
+        for follower_id, following_id in edges:
+            buffer.append(follower_id)
+            buffer.append(following_id)
+            node_ids.add(follower_id)
+            node_ids.add(following_id)
+            edge_count += 1
+            if len(buffer) >= CHUNK:
+                _write(handle, buffer)
+                buffer = array('q')
+        _write(handle, buffer)
+
+    ids = array('q', sorted(node_ids))
+    if len(ids) >= 2 ** 32:
+        raise ValueError('Too many users for 32-bit node indexes.')
+    position = {user_id: index for index, user_id in enumerate(ids)}
+    with open(staging / 'ids.bin', 'wb') as handle:
+        _write(handle, ids)
+    del node_ids
+
+    with open(staging / 'src.bin', 'wb') as src, open(staging / 'dst.bin', 'wb') as dst:
+        for values in _read(spool, 'q'):
+            _write(src, array('I', (position[user_id] for user_id in values[0::2])))
+            _write(dst, array('I', (position[user_id] for user_id in values[1::2])))
+    spool.unlink()
+
+    _publish(staging, target, {
+        'kind': 'full',
+        'edges': edge_count,
+        'nodes': len(ids),
+        'id_dtype': ID_DTYPE,
+        'index_dtype': INDEX_DTYPE,
+        'max_follow_id': max_follow_id,
+        'graph_clock': graph_clock,
+        'base': None,
+    })
+    return edge_count
+
+
+def write_delta_snapshot(target, base, current_edges, added_edges, max_follow_id, graph_clock=0):
+    """
+    Write a delta against ``base``.
+
+    ``current_edges`` are the follows that existed when the base was taken
+    and still exist (IDs up to the base's ``max_follow_id``), sorted by
+    follower then following; anything in the base but missing from this
+    stream was removed. ``added_edges`` are follows created since.
+    """
+    target = Path(target)
+    staging = target.with_name(target.name + '.partial')
+    if staging.exists():
+        shutil.rmtree(staging)
+    staging.mkdir(parents=True)
+
+    removed = 0
+    with open(staging / 'removed.bin', 'wb') as handle:
+        buffer = array('q')
+        current = iter(current_edges)
+        pending = next(current, None)
+        for pair in iter_edges(base):
+            # Both streams are sorted, so a merge finds the vanished pairs
+            while pending is not None and pending < pair:
+                pending = next(current, None)
+            if pending == pair:
+                pending = next(current, None)
+                continue
+            buffer.extend(pair)
+            removed += 1
+            if len(buffer) >= CHUNK:
+                _write(handle, buffer)
+                buffer = array('q')
+        _write(handle, buffer)
+
+    added = sorted(added_edges)
+    with open(staging / 'added.bin', 'wb') as handle:
+        _write(handle, array('q', (user_id for pair in added for user_id in pair)))
+
+    _publish(staging, target, {
+        'kind': 'delta',
+        'added': len(added),
+        'removed': removed,
+        'id_dtype': ID_DTYPE,
+        'max_follow_id': max_follow_id,
+        'graph_clock': graph_clock,
+        'base': str(Path(base).resolve()),
+    })
+    return len(added), removed
+
+
+def iter_edges(path):
+    """Yield ``(follower_id, following_id)`` pairs of a snapshot chain in order."""
+    path = Path(path)
+    manifest = read_manifest(path)
+    if manifest['kind'] == 'full':
+        ids = array('q')
+        for values in _read(path / 'ids.bin', 'q'):
+            ids.extend(values)
+        sources = _read(path / 'src.bin', 'I')
+        targets = _read(path / 'dst.bin', 'I')
+        for src_chunk, dst_chunk in zip(sources, targets):
+            for src, dst in zip(src_chunk, dst_chunk):
+                yield ids[src], ids[dst]
+        return
+
+    removed = _read_pairs(path / 'removed.bin')
+    next_removed = next(removed, None)
+    merged = heapq.merge(iter_edges(manifest['base']), _read_pairs(path / 'added.bin'))
+    previous = None
+    for pair in merged:
+        while next_removed is not None and next_removed < pair:
+            next_removed = next(removed, None)
+        if pair == next_removed:
+            next_removed = next(removed, None)
+            continue
+        if pair != previous:
+            yield pair
+        previous = pair
+
+
+def load_follow_graph(path, index=None):
+    """
+    Build follow-graph adjacency from a snapshot without touching the
+    database. Installs it into ``index`` (a ``FollowGraphIndex``) when given,
+    and returns the ``(following, followers)`` CSR pair.
+    """
+    from .graph import CSRAdjacency
+
+    manifest = read_manifest(path)
+    following = CSRAdjacency.from_sorted_pairs(iter_edges(path), 'Q')
+    followers = following.transpose()
+    if index is not None:
+        index.install(following, followers, manifest.get('graph_clock', 0))
+    return following, followers
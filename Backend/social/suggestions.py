@@ -0,0 +1,93 @@
+"""
+Friends-of-friends follow suggestions.
+
+Candidates are second-degree neighbours in the follow graph: accounts followed
+by the people a user follows. Each candidate is scored by its mutual count
+(how many of the user's followees follow it) divided by the square root of
+its follower count, so that a handful of shared connections to a niche
+account outranks the same number of connections to a celebrity everyone
+follows. Scoring runs offline against the in-memory follow graph and the
+results are stored per user; the API only reads the stored rows.
+"""
+import math
+from collections import Counter
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from accounts.models import User
+from .graph import contains_sorted, follow_graph
+from .models import FollowSuggestion, SuggestionRefresh
+
+
+def score_candidates(user_id, graph, inactive_ids=frozenset(), limit=None, max_fanout=None):
+    """
+    Return ``[(candidate_id, mutual_count, score)]`` best first.
+
+    ``max_fanout`` caps how many followees are expanded, which bounds the
+    work for users who follow thousands of accounts.
+    """
+    limit = limit or getattr(settings, 'FOLLOW_SUGGESTIONS_PER_USER', 50)
+    max_fanout = max_fanout or getattr(settings, 'FOLLOW_SUGGESTIONS_MAX_FANOUT', 1000)
+
+    following = graph.following(user_id)
+    mutuals = Counter()
+    for followee in following[:max_fanout]:
+        mutuals.update(graph.following(followee))
+
+    scored = []
+    for candidate, mutual_count in mutuals.items():
+        if candidate == user_id or candidate in inactive_ids:
+            continue
+        if contains_sorted(following, candidate):
+            continue
+        degree = max(len(graph.followers(candidate)), mutual_count)
+        scored.append((candidate, mutual_count, mutual_count / math.sqrt(degree)))
+
+    scored.sort(key=lambda row: (-row[2], -row[1], row[0]))
+    return scored[:limit]
+
+
+def refresh_suggestions(user_ids, graph=None, inactive_ids=None, graph_as_of=None):
+    """
+    Recompute and store suggestions for a batch of users.
+
+    ``graph_as_of`` is when ``graph`` was read from the database (default:
+    now); refresh markers queued after it are kept, since the graph may
+    not include the follow changes behind them.
+    """
+    graph = graph or follow_graph
+    if inactive_ids is None:
+        inactive_ids = set(User.objects.filter(is_active=False).values_list('id', flat=True))
+
+    started = timezone.now()
+    graph_as_of = graph_as_of or started
+    rows = [
+        FollowSuggestion(
+            user_id=user_id,
+            candidate_id=candidate_id,
+            mutual_count=mutual_count,
+            score=score,
+            computed_at=started,
+        )
+        for user_id in user_ids
+        for candidate_id, mutual_count, score in score_candidates(user_id, graph, inactive_ids)
+    ]
+
+    with transaction.atomic():
+        FollowSuggestion.objects.filter(user_id__in=user_ids).delete()
+        FollowSuggestion.objects.bulk_create(rows, batch_size=1000)
+        # Keep users re-queued since the graph was read
+        SuggestionRefresh.objects.filter(user_id__in=user_ids, queued_at__lte=graph_as_of).delete()
+    return len(rows)
+
+
+def follow_set_changed(follower_id, following_ids, created):
+    """Keep stored suggestions consistent after committed follow changes."""
+    if created:
+        # Never suggest someone the user now follows, even before the refresh
+        FollowSuggestion.objects.filter(
+            user_id=follower_id, candidate_id__in=list(following_ids)
+        ).delete()
+    SuggestionRefresh.objects.update_or_create(user_id=follower_id)
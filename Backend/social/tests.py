@@ -1,3 +1,393 @@
+import json
+import tempfile
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from notifications.models import Notification
+from posts.models import Post
+from .graph import CSRAdjacency, FollowGraphIndex, follow_graph, intersect_sorted
+from .suggestions import refresh_suggestions
+from .snapshot import iter_edges, load_follow_graph, read_manifest
+from .models import Follow, FollowSuggestion, Like, SuggestionRefresh
+
+
+def make_user(username, **extra):
+    return User.objects.create_user(
+        username=username,
+        email=f'{username}@example.com',
+        password='password123',
+        first_name=username.title(),
+        last_name='Test',
+        **extra
+    )
+
+
+class PostLikersViewTests(TestCase):
+    def setUp(self):
+        self.viewer = make_user('viewer')
+        self.author = make_user('author')
+        self.post = Post.objects.create(author=self.author, content='Hello')
+        self.likers = [make_user(f'liker{i}') for i in range(5)]
+        for liker in self.likers:
+            Like.objects.create(user=liker, post=self.post)
+        self.client = APIClient()
+        self.client.force_authenticate(self.viewer)
+        self.url = reverse('social:post_likers', args=[self.post.id])
+
+    def test_pages_through_all_likers_newest_first(self):
+        seen = []
+        url = f'{self.url}?page_size=2'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            seen.extend(item['user']['id'] for item in response.data['results'])
+            url = response.data['next']
+        self.assertEqual(seen, [u.id for u in reversed(self.likers)])
+
+    def test_relationship_flags(self):
+        Follow.objects.create(follower=self.viewer, following=self.likers[0])
+        Follow.objects.create(follower=self.likers[1], following=self.viewer)
+
+        response = self.client.get(self.url)
+        flags = {
+            item['user']['id']: (item['followed_by_you'], item['follows_you'])
+            for item in response.data['results']
+        }
+        self.assertEqual(flags[self.likers[0].id], (True, False))
+        self.assertEqual(flags[self.likers[1].id], (False, True))
+        self.assertEqual(flags[self.likers[2].id], (False, False))
+
+    def test_constant_queries_per_page(self):
+        # post lookup + likes page + batched follow flags
+        with self.assertNumQueries(3):
+            self.client.get(self.url)
+
+    def test_invalid_cursor(self):
+        response = self.client.get(f'{self.url}?cursor=garbage')
+        self.assertEqual(response.status_code, 404)
+
+    def test_hides_inactive_likers_and_private_posts(self):
+        self.likers[0].is_active = False
+        self.likers[0].save()
+        response = self.client.get(self.url)
+        self.assertNotIn(self.likers[0].id, [item['user']['id'] for item in response.data['results']])
+
+        self.author.privacy_setting = 'followers_only'
+        self.author.save()
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+        follow = Follow.objects.create(follower=self.viewer, following=self.author)
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+        # Unfollowing revokes access at once, whatever the follow-graph cache holds
+        follow.delete()
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+
+class FollowGraphIndexTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.graph = FollowGraphIndex()
+        self.users = [make_user(f'member{i}') for i in range(4)]
+        a, b, c, d = self.users
+        for follower, following in ((a, b), (a, c), (b, c), (d, c)):
+            Follow.objects.create(follower=follower, following=following)
+
+    def test_lazy_lookups(self):
+        a, b, c, d = self.users
+        self.assertTrue(self.graph.is_following(a.id, b.id))
+        self.assertFalse(self.graph.is_following(b.id, a.id))
+        self.assertEqual(list(self.graph.followers(c.id)), sorted([a.id, b.id, d.id]))
+        with self.assertNumQueries(0):
+            self.assertTrue(self.graph.is_following(a.id, c.id))
+
+    def test_full_load_matches_database(self):
+        a, b, c, d = self.users
+        self.graph.load_all()
+        with self.assertNumQueries(0):
+            self.assertEqual(list(self.graph.following(a.id)), sorted([b.id, c.id]))
+            self.assertEqual(self.graph.mutual_followers(b.id, c.id), [a.id])
+            self.assertEqual(list(self.graph.following(c.id)), [])
+
+    def test_events_update_local_copy(self):
+        a, b, c, d = self.users
+        self.graph.load_all()
+        self.graph.apply(d.id, a.id, True)
+        self.graph.apply(a.id, b.id, False)
+        with self.assertNumQueries(0):
+            self.assertTrue(self.graph.is_following(d.id, a.id))
+            self.assertFalse(self.graph.is_following(a.id, b.id))
+            self.assertEqual(list(self.graph.followers(a.id)), [d.id])
+
+    def test_change_from_another_process_forces_reload(self):
+        a, b, c, d = self.users
+        # The test cache is shared by every index in this process
+        self.graph = FollowGraphIndex(check_versions=True)
+        self.assertFalse(self.graph.is_following(c.id, d.id))
+        with mock.patch.object(follow_graph, 'check_versions', True):
+            with self.captureOnCommitCallbacks(execute=True):
+                Follow.objects.create(follower=c, following=d)
+        # The signal updated the module-level index; this one must notice
+        self.assertTrue(self.graph.is_following(c.id, d.id))
+
+    def test_per_process_cache_bounds_staleness_by_age(self):
+        a, b, c, d = self.users
+        graph = FollowGraphIndex(max_age=60)
+        self.assertFalse(graph.check_versions)
+        with mock.patch('social.graph.time.monotonic', return_value=1000.0):
+            graph.load_all()
+            self.assertTrue(graph.is_following(a.id, b.id))
+        # An unfollow handled by another process, which this one never hears of
+        Follow.objects.filter(follower=a, following=b).delete()
+        with mock.patch('social.graph.time.monotonic', return_value=1059.0):
+            with self.assertNumQueries(0):
+                self.assertTrue(graph.is_following(a.id, b.id))
+        with mock.patch('social.graph.time.monotonic', return_value=1060.0):
+            self.assertFalse(graph.is_following(a.id, b.id))
+
+    def test_csr_transpose_and_intersection(self):
+        following = CSRAdjacency.from_sorted_pairs([(1, 2), (1, 3), (2, 3), (4, 3)], 'I')
+        followers = following.transpose()
+        self.assertEqual(list(followers.neighbors(3)), [1, 2, 4])
+        self.assertIsNone(followers.neighbors(1))
+        self.assertEqual(intersect_sorted(list(range(0, 1000, 3)), [3, 4, 999]), [3, 999])
+        self.assertEqual(intersect_sorted([1, 5, 9], [2, 5, 9, 10]), [5, 9])
+
+
+class FollowSuggestionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.me, self.friend, self.pal, self.niche, self.star, self.gone = [
+            make_user(name) for name in ('me', 'friend', 'pal', 'niche', 'star', 'gone')
+        ]
+        self.gone.is_active = False
+        self.gone.save()
+        edges = [
+            (self.me, self.friend), (self.me, self.pal),
+            (self.friend, self.niche), (self.pal, self.niche),
+            (self.friend, self.star), (self.pal, self.star),
+            (self.friend, self.gone), (self.friend, self.me),
+        ]
+        # Make "star" popular so its score is normalized down
+        for i in range(6):
+            edges.append((make_user(f'fan{i}'), self.star))
+        for follower, following in edges:
+            Follow.objects.create(follower=follower, following=following)
+        self.client = APIClient()
+        self.client.force_authenticate(self.me)
+        self.url = reverse('social:follow_suggestions')
+
+    def test_ranks_by_degree_normalized_mutuals(self):
+        call_command('compute_follow_suggestions', stdout=StringIO())
+        response = self.client.get(self.url)
+        ids = [row['user']['id'] for row in response.data['results']]
+        self.assertEqual(ids, [self.niche.id, self.star.id])
+        self.assertEqual(response.data['results'][0]['mutual_count'], 2)
+
+    def test_endpoint_is_a_single_query(self):
+        call_command('compute_follow_suggestions', stdout=StringIO())
+        with self.assertNumQueries(1):
+            self.client.get(self.url)
+
+    def test_follow_change_refreshes_incrementally(self):
+        call_command('compute_follow_suggestions', stdout=StringIO())
+        with self.captureOnCommitCallbacks(execute=True):
+            Follow.objects.create(follower=self.me, following=self.niche)
+        self.assertFalse(
+            FollowSuggestion.objects.filter(user=self.me, candidate=self.niche).exists()
+        )
+        self.assertTrue(SuggestionRefresh.objects.filter(user=self.me).exists())
+
+        call_command('compute_follow_suggestions', '--stale-only', stdout=StringIO())
+        self.assertFalse(SuggestionRefresh.objects.exists())
+        self.assertEqual(
+            list(FollowSuggestion.objects.filter(user=self.me).values_list('candidate', flat=True)),
+            [self.star.id]
+        )
+
+
+    def test_keeps_markers_queued_after_the_graph_was_read(self):
+        graph = FollowGraphIndex(check_versions=False)
+        graph_as_of = timezone.now()
+        graph.load_all()
+        # A follow committed after the load, which the graph does not include
+        with self.captureOnCommitCallbacks(execute=True):
+            Follow.objects.create(follower=self.me, following=self.niche)
+        with CaptureQueriesContext(connection) as queries:
+            refresh_suggestions([self.me.id], graph, set(), graph_as_of)
+        # Scored from the snapshot alone
+        self.assertFalse([q for q in queries if 'FROM "follows"' in q['sql']])
+        self.assertTrue(SuggestionRefresh.objects.filter(user=self.me).exists())
+
+
+class UserRelationshipsViewTests(TestCase):
+    def setUp(self):
+        self.me = make_user('me')
+        self.mutual = make_user('mutual', privacy_setting='followers_only')
+        self.fan = make_user('fan', privacy_setting='followers_only')
+        self.hermit = make_user('hermit', privacy_setting='private')
+        Follow.objects.create(follower=self.me, following=self.mutual)
+        Follow.objects.create(follower=self.mutual, following=self.me)
+        Follow.objects.create(follower=self.fan, following=self.me)
+        self.client = APIClient()
+        self.client.force_authenticate(self.me)
+        self.url = reverse('social:user_relationships')
+
+    def test_reports_flags_and_visibility(self):
+        ids = [self.me.id, self.mutual.id, self.fan.id, self.hermit.id, 999999]
+        with self.assertNumQueries(3):
+            response = self.client.get(self.url, {'ids': ','.join(map(str, ids))})
+        results = response.data['results']
+        self.assertEqual(results[str(self.mutual.id)], {
+            'following': True, 'followed_by': True, 'mutual': True, 'can_view_profile': True,
+        })
+        self.assertEqual(results[str(self.fan.id)], {
+            'following': False, 'followed_by': True, 'mutual': False, 'can_view_profile': False,
+        })
+        self.assertFalse(results[str(self.hermit.id)]['can_view_profile'])
+        self.assertTrue(results[str(self.me.id)]['can_view_profile'])
+        self.assertEqual(response.data['not_found'], [999999])
+
+    def test_rejects_too_many_ids(self):
+        response = self.client.get(self.url, {'ids': ','.join(str(i) for i in range(1, 202))})
+        self.assertEqual(response.status_code, 400)
+
+
+class FollowListViewTests(TestCase):
+    def setUp(self):
+        self.celebrity = make_user('celebrity')
+        self.client = APIClient()
+        self.client.force_authenticate(self.celebrity)
+
+    def add_followers(self, count, start=0):
+        for i in range(start, start + count):
+            fan = make_user(f'fan{i}')
+            Follow.objects.create(follower=fan, following=self.celebrity)
+            Post.objects.create(author=fan, content='Hi')
+
+    def test_rows_show_other_side_with_counters(self):
+        self.add_followers(1)
+        url = reverse('social:user_followers', args=[self.celebrity.id])
+        row = self.client.get(url).data['results'][0]
+        self.assertEqual(row['user']['username'], 'fan0')
+        self.assertEqual(row['user']['following_count'], 1)
+        self.assertEqual(row['user']['posts_count'], 1)
+        self.assertNotIn('follower', row)
+
+        following_url = reverse('social:user_following', args=[row['user']['id']])
+        row = self.client.get(following_url).data['results'][0]
+        self.assertEqual(row['user']['username'], 'celebrity')
+        self.assertEqual(row['user']['followers_count'], 1)
+
+    def test_constant_queries_per_page(self):
+        url = reverse('social:user_followers', args=[self.celebrity.id])
+        self.add_followers(2)
+        # user lookup + page count + page rows + three grouped counters
+        with self.assertNumQueries(6):
+            self.client.get(url)
+        self.add_followers(18, start=2)
+        with self.assertNumQueries(6):
+            response = self.client.get(url)
+        self.assertEqual(len(response.data['results']), 20)
+
+
+class BulkFollowTests(TestCase):
+    def setUp(self):
+        self.me = make_user('me')
+        self.others = [make_user(f'other{i}') for i in range(3)]
+        Follow.objects.create(follower=self.me, following=self.others[0])
+        self.client = APIClient()
+        self.client.force_authenticate(self.me)
+
+    def test_bulk_follow_by_id_and_username(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('social:bulk_follow'), {
+                'user_ids': [self.others[0].id, self.others[1].id, 999999],
+                'usernames': ['other2', 'nobody'],
+            }, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['followed'], 2)
+        self.assertEqual(response.data['already_following'], 1)
+        self.assertEqual(response.data['not_found'], [999999, 'nobody'])
+        self.assertEqual(Follow.objects.filter(follower=self.me).count(), 3)
+        self.assertEqual(
+            Notification.objects.filter(sender=self.me, notification_type='follow')
+            .exclude(recipient=self.others[0]).count(),
+            2
+        )
+        self.assertTrue(SuggestionRefresh.objects.filter(user=self.me).exists())
+
+    def test_bulk_follow_emits_only_for_rows_it_inserted(self):
+        # Inserted by a concurrent request after this one decided what to follow
+        real_insert = Follow.insert_new
+
+        def racing_insert(follower_id, following_ids, **kwargs):
+            Follow.objects.create(follower=self.me, following=self.others[1])
+            return real_insert(follower_id, following_ids, **kwargs)
+
+        with mock.patch.object(Follow, 'insert_new', side_effect=racing_insert):
+            with mock.patch('social.views.emit') as emit:
+                response = self.client.post(reverse('social:bulk_follow'), {
+                    'user_ids': [self.others[1].id, self.others[2].id],
+                }, format='json')
+        self.assertEqual((response.data['followed'], response.data['already_following']), (1, 1))
+        self.assertEqual([call.args[0].recipient_id for call in emit.call_args_list], [self.others[2].id])
+
+    def test_export_streams_ndjson(self):
+        response = self.client.get(reverse('social:export_following'))
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        self.assertEqual([json.loads(line)['username'] for line in lines], ['other0'])
+
+
+class FollowGraphSnapshotTests(TestCase):
+    def setUp(self):
+        self.users = [make_user(f'node{i}') for i in range(4)]
+        a, b, c, d = self.users
+        self.follows = {
+            (a, b): Follow.objects.create(follower=a, following=b),
+            (b, c): Follow.objects.create(follower=b, following=c),
+            (c, a): Follow.objects.create(follower=c, following=a),
+        }
+        self.directory = Path(tempfile.mkdtemp())
+
+    def export(self, name, *args):
+        call_command('export_follow_graph', str(self.directory / name), *args, stdout=StringIO())
+        return self.directory / name
+
+    def expected_edges(self):
+        return sorted(Follow.objects.values_list('follower_id', 'following_id'))
+
+    def test_full_snapshot_round_trip(self):
+        path = self.export('full')
+        manifest = read_manifest(path)
+        self.assertEqual((manifest['edges'], manifest['nodes']), (3, 3))
+        self.assertEqual(list(iter_edges(path)), self.expected_edges())
+
+    def test_delta_chain_matches_database(self):
+        a, b, c, d = self.users
+        full = self.export('full')
+        self.follows[(b, c)].delete()
+        Follow.objects.create(follower=d, following=a)
+        first = self.export('delta1', f'--since={full}')
+        Follow.objects.create(follower=b, following=c)
+        second = self.export('delta2', f'--since={first}')
+
+        self.assertEqual(read_manifest(first)['removed'], 1)
+        self.assertEqual(list(iter_edges(second)), self.expected_edges())
 
-# Create your tests here.
+        index = FollowGraphIndex(check_versions=False)
+        with self.assertNumQueries(0):
+            load_follow_graph(second, index)
+            self.assertEqual(list(index.followers(a.id)), sorted([c.id, d.id]))
+            self.assertTrue(index.is_following(b.id, c.id))
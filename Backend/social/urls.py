@@ -9,11 +9,16 @@ urlpatterns = [
     path('users/<int:user_id>/unfollow/', views.UnfollowUserView.as_view(), name='unfollow_user'),
     path('users/<int:user_id>/followers/', views.UserFollowersView.as_view(), name='user_followers'),
     path('users/<int:user_id>/following/', views.UserFollowingView.as_view(), name='user_following'),
+    path('users/me/following/bulk/', views.BulkFollowView.as_view(), name='bulk_follow'),
+    path('users/me/following/export/', views.FollowExportView.as_view(), name='export_following'),
+    path('users/relationships/', views.UserRelationshipsView.as_view(), name='user_relationships'),
+    path('users/suggestions/', views.FollowSuggestionsView.as_view(), name='follow_suggestions'),
     
     # Like System
     path('posts/<int:post_id>/like/', views.LikePostView.as_view(), name='like_post'),
     path('posts/<int:post_id>/unlike/', views.UnlikePostView.as_view(), name='unlike_post'),
     path('posts/<int:post_id>/like-status/', views.PostLikeStatusView.as_view(), name='post_like_status'),
+    path('posts/<int:post_id>/likers/', views.PostLikersView.as_view(), name='post_likers'),
     
     # Comment System
     path('posts/<int:post_id>/comments/', views.PostCommentsView.as_view(), name='post_comments'),
@@ -2,18 +2,28 @@ from rest_framework import status, generics, permissions
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.decorators import api_view, permission_classes
+from rest_framework.exceptions import PermissionDenied
 from django.shortcuts import get_object_or_404
-from django.db import IntegrityError
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.http import StreamingHttpResponse
+from django.core.serializers.json import DjangoJSONEncoder
+import json
 
-from .models import Follow, Like, Comment
+from .models import Follow, FollowSuggestion, Like, Comment
 from posts.models import Post
 from accounts.models import User
+from accounts.counters import get_user_counts
 from .serializers import (
     FollowSerializer, FollowCreateSerializer, LikeSerializer,
-    CommentCreateSerializer, CommentSerializer
+    CommentCreateSerializer, CommentSerializer, PostLikerSerializer,
+    FollowSuggestionSerializer, FollowListSerializer, BulkFollowSerializer
 )
+from .relationships import get_follow_flags, get_relationships
+from .signals import follows_committed
 from accounts.permissions import IsOwnerOrReadOnly
-from notifications.models import Notification
+from utils.pagination import KeysetPagination
+from notifications.dispatch import emit, follow_event
 
 
 # Follow Views
@@ -36,9 +46,6 @@ class FollowUserView(APIView):
             )
 
             if created:
-                # Create notification
-                Notification.create_follow_notification(request.user, user_to_follow)
-                
                 return Response({
                     'message': f'You are now following @{user_to_follow.username}.'
                 }, status=status.HTTP_201_CREATED)
@@ -77,26 +84,174 @@ class UnfollowUserView(APIView):
             }, status=status.HTTP_400_BAD_REQUEST)
 
 
-class UserFollowersView(generics.ListAPIView):
-    """Get user's followers."""
-    serializer_class = FollowSerializer
+class BulkFollowView(APIView):
+    """Follow many users at once by ID and/or username."""
     permission_classes = [permissions.IsAuthenticated]
 
+    def post(self, request):
+        serializer = BulkFollowSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        user_ids = set(serializer.validated_data['user_ids'])
+        usernames = set(serializer.validated_data['usernames'])
+
+        # Resolve every identifier in one query
+        targets = dict(
+            User.objects.filter(
+                Q(id__in=user_ids) | Q(username__in=usernames),
+                is_active=True
+            ).exclude(id=request.user.id).values_list('id', 'username')
+        )
+        with transaction.atomic():
+            # Existing follows, including any a concurrent request inserts
+            # first, are skipped; only rows inserted here get events
+            new_ids = sorted(Follow.insert_new(request.user.id, sorted(targets)))
+            already_following = set(targets) - set(new_ids)
+            # Raw inserts skip post_save, so emit events and update derived
+            # state explicitly
+            for user_id in new_ids:
+                emit(follow_event(request.user, user_id))
+            transaction.on_commit(
+                lambda: follows_committed(request.user.id, new_ids, True)
+            )
+
+        resolved_usernames = set(targets.values())
+        not_found = (
+            sorted(user_id for user_id in user_ids if user_id not in targets) +
+            sorted(name for name in usernames if name not in resolved_usernames)
+        )
+        return Response({
+            'message': f'You are now following {len(new_ids)} new accounts.',
+            'followed': len(new_ids),
+            'already_following': len(already_following),
+            'not_found': not_found,
+        }, status=status.HTTP_200_OK)
+
+
+class FollowExportView(APIView):
+    """Stream the authenticated user's following list as NDJSON."""
+    permission_classes = [permissions.IsAuthenticated]
+    chunk_size = 2000
+
+    def get(self, request):
+        rows = Follow.objects.filter(follower=request.user).order_by('id').values_list(
+            'following_id', 'following__username', 'created_at'
+        ).iterator(chunk_size=self.chunk_size)
+
+        def lines():
+            for user_id, username, created_at in rows:
+                yield json.dumps({
+                    'user_id': user_id,
+                    'username': username,
+                    'followed_at': created_at,
+                }, cls=DjangoJSONEncoder) + '\n'
+
+        response = StreamingHttpResponse(lines(), content_type='application/x-ndjson')
+        response['Content-Disposition'] = (
+            f'attachment; filename="{request.user.username}-following.ndjson"'
+        )
+        return response
+
+
+class FollowListView(generics.ListAPIView):
+    """
+    Base view for follower/following lists.
+
+    Serves a page with one select_related query and batched counters, so
+    the query count does not grow with the page size.
+    """
+    serializer_class = FollowListSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    filter_field = None
+    side = None
+
     def get_queryset(self):
         user_id = self.kwargs['user_id']
-        user = get_object_or_404(User, id=user_id, is_active=True)
-        return Follow.objects.filter(following=user).order_by('-created_at')
+        user = get_object_or_404(User.objects.only('id'), id=user_id, is_active=True)
+        return Follow.objects.filter(
+            **{self.filter_field: user}
+        ).select_related(self.side).order_by('-created_at', '-id')
+
+    def list(self, request, *args, **kwargs):
+        page = self.paginate_queryset(self.get_queryset())
+
+        context = self.get_serializer_context()
+        context['side'] = self.side
+        context['user_counts'] = get_user_counts(
+            getattr(follow, f'{self.side}_id') for follow in page
+        )
 
+        serializer = self.get_serializer_class()(page, many=True, context=context)
+        return self.get_paginated_response(serializer.data)
 
-class UserFollowingView(generics.ListAPIView):
+
+class UserFollowersView(FollowListView):
+    """Get user's followers."""
+    filter_field = 'following'
+    side = 'follower'
+
+
+class UserFollowingView(FollowListView):
     """Get users that a user is following."""
-    serializer_class = FollowSerializer
+    filter_field = 'follower'
+    side = 'following'
+
+
+class UserRelationshipsView(APIView):
+    """Get the authenticated user's relationship to up to 200 users at once."""
     permission_classes = [permissions.IsAuthenticated]
+    max_ids = 200
+
+    def get(self, request):
+        raw_ids = [
+            value
+            for param in request.query_params.getlist('ids')
+            for value in param.split(',')
+            if value.strip()
+        ]
+        try:
+            user_ids = {int(value) for value in raw_ids}
+        except ValueError:
+            return Response({
+                'error': 'ids must be a comma-separated list of user IDs.'
+            }, status=status.HTTP_400_BAD_REQUEST)
 
-    def get_queryset(self):
-        user_id = self.kwargs['user_id']
-        user = get_object_or_404(User, id=user_id, is_active=True)
-        return Follow.objects.filter(follower=user).order_by('-created_at')
+        if not user_ids:
+            return Response({
+                'error': 'At least one user ID is required.'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        if len(user_ids) > self.max_ids:
+            return Response({
+                'error': f'At most {self.max_ids} user IDs can be requested at once.'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        relationships = get_relationships(request.user, user_ids)
+        return Response({
+            'results': {str(user_id): data for user_id, data in relationships.items()},
+            'not_found': sorted(user_ids - relationships.keys()),
+        }, status=status.HTTP_200_OK)
+
+
+class FollowSuggestionsView(APIView):
+    """Get precomputed follow suggestions for the authenticated user."""
+    permission_classes = [permissions.IsAuthenticated]
+    max_limit = 50
+
+    def get(self, request):
+        try:
+            limit = min(int(request.query_params.get('limit', 20)), self.max_limit)
+        except ValueError:
+            limit = 20
+
+        suggestions = FollowSuggestion.objects.filter(
+            user=request.user,
+            candidate__is_active=True
+        ).select_related('candidate').order_by('-score')[:max(limit, 1)]
+
+        serializer = FollowSuggestionSerializer(suggestions, many=True)
+        return Response({
+            'results': serializer.data
+        }, status=status.HTTP_200_OK)
 
 
 # Like Views
@@ -116,10 +271,7 @@ class LikePostView(APIView):
             if created:
                 # Update post like count
                 post.update_like_count()
-                
-                # Create notification (if not own post)
-                Notification.create_like_notification(request.user, post)
-                
+
                 return Response({
                     'message': 'Post liked successfully.',
                     'like_count': post.like_count
@@ -175,6 +327,31 @@ class PostLikeStatusView(APIView):
         }, status=status.HTTP_200_OK)
 
 
+class PostLikersView(generics.ListAPIView):
+    """List users who liked a post, newest like first."""
+    serializer_class = PostLikerSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
+
+    def get_queryset(self):
+        post_id = self.kwargs['post_id']
+        post = get_object_or_404(Post.objects.select_related('author'), id=post_id, is_active=True)
+        # Likers are as private as the author's profile
+        if not post.author.can_view_profile(self.request.user):
+            raise PermissionDenied("You don't have permission to view this post.")
+        return Like.objects.filter(post_id=post_id, user__is_active=True).select_related('user')
+
+    def list(self, request, *args, **kwargs):
+        page = self.paginate_queryset(self.get_queryset())
+
+        # One follows query for the whole page instead of two per row
+        context = self.get_serializer_context()
+        context.update(get_follow_flags(request.user, [like.user_id for like in page]))
+
+        serializer = self.get_serializer_class()(page, many=True, context=context)
+        return self.get_paginated_response(serializer.data)
+
+
 # Comment Views
 class PostCommentsView(generics.ListCreateAPIView):
     """Get comments for a post or add a new comment."""
@@ -203,13 +380,6 @@ class PostCommentsView(generics.ListCreateAPIView):
         
         # Update post comment count
         post.update_comment_count()
-        
-        # Create notification (if not own post)
-        Notification.create_comment_notification(
-            self.request.user, 
-            post, 
-            comment.content
-        )
 
 
 class CommentDeleteView(generics.DestroyAPIView):
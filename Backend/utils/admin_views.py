@@ -9,6 +9,7 @@ from posts.models import Post
 from social.models import Follow, Like, Comment
 from notifications.models import Notification
 from accounts.permissions import IsAdminUser
+from .clients import client_metrics
 
 
 @api_view(['GET'])
@@ -110,7 +111,8 @@ def admin_stats(request):
                 'created_at': post.created_at,
             }
             for post in top_posts_by_likes
-        ]
+        ],
+        'http_clients': client_metrics(),
     }
     
     return Response(stats)
\ No newline at end of file
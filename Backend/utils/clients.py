@@ -0,0 +1,160 @@
+"""
+Process-wide pooled HTTP clients for external services.
+
+Each client wraps one ``requests.Session`` with a keep-alive connection pool,
+is created lazily on first use and is shared by every thread in the
+process, so uploads and realtime deliveries reuse warm TLS connections
+instead of building a new client (and handshake) per call.
+
+Pre-forking servers may import the app, and even make requests, before
+forking workers. Sockets must not be shared between processes, so the
+registry forgets its clients in a forked child and each worker builds its
+own on first use.
+"""
+import logging
+import os
+import threading
+from urllib.parse import quote
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger('socialconnect')
+
+
+class PooledClient:
+    """HTTP client for one service with a pooled, keep-alive session."""
+
+    def __init__(self, base_url, headers=None, pool_size=10, timeout=10, retries=2):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers.update(headers or {})
+        # Only connection failures are retried; uploads are not idempotent
+        self.adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=pool_size,
+            max_retries=Retry(total=retries, connect=retries, read=0, status=0, redirect=0, backoff_factor=0.1),
+        )
+        self.session.mount('http://', self.adapter)
+        self.session.mount('https://', self.adapter)
+
+    def request(self, method, path, **kwargs):
+        kwargs.setdefault('timeout', self.timeout)
+        response = self.session.request(method, f"{self.base_url}/{path.lstrip('/')}", **kwargs)
+        response.raise_for_status()
+        return response
+
+    def metrics(self):
+        """Requests sent and connections opened, summed over the pool."""
+        pools = self.adapter.poolmanager.pools
+        requests_sent = connections = 0
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is not None:
+                requests_sent += pool.num_requests
+                connections += pool.num_connections
+        return {
+            'requests': requests_sent,
+            'connections_opened': connections,
+            'connections_reused': max(requests_sent - connections, 0),
+        }
+
+    def close(self):
+        self.session.close()
+
+
+class SupabaseClient(PooledClient):
+    """Supabase Storage and REST calls over a pooled session."""
+
+    def __init__(self, url, key, **kwargs):
+        super().__init__(url, headers={'apikey': key, 'Authorization': f'Bearer {key}'}, **kwargs)
+
+    def upload(self, bucket, path, content, content_type, cache_control=None):
+        headers = {'Content-Type': content_type}
+        if cache_control:
+            headers['Cache-Control'] = cache_control
+        self.request('POST', f'storage/v1/object/{bucket}/{quote(path)}', data=content, headers=headers)
+        return self.public_url(bucket, path)
+
+    def remove(self, bucket, paths):
+        self.request('DELETE', f'storage/v1/object/{bucket}', json={'prefixes': list(paths)})
+
+    def public_url(self, bucket, path):
+        return f'{self.base_url}/storage/v1/object/public/{bucket}/{quote(path)}'
+
+    def insert(self, table, rows):
+        self.request('POST', f'rest/v1/{table}', json=rows, headers={'Prefer': 'return=minimal'})
+
+
+class ClientRegistry:
+    """Thread-safe, fork-aware cache of named clients."""
+
+    def __init__(self):
+        self._clients = {}
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+
+    def get(self, name, factory, config=None):
+        """
+        Return the client registered as ``name``, creating it with
+        ``factory`` on first use or when ``config`` has changed.
+        """
+        if self._pid != os.getpid():
+            self._after_fork()
+        entry = self._clients.get(name)
+        if entry is None or entry[0] != config:
+            with self._lock:
+                entry = self._clients.get(name)
+                if entry is None or entry[0] != config:
+                    if entry is not None:
+                        entry[1].close()
+                    entry = self._clients[name] = (config, factory())
+                    logger.info(f"Created pooled HTTP client {name!r}")
+        return entry[1]
+
+    def _after_fork(self):
+        # The parent's lock may have been held mid-fork, and its sockets
+        # belong to the parent; start over without touching either
+        self._lock = threading.Lock()
+        self._clients = {}
+        self._pid = os.getpid()
+
+    def metrics(self):
+        return {name: client.metrics() for name, (_, client) in list(self._clients.items())}
+
+    def close(self):
+        with self._lock:
+            clients, self._clients = self._clients, {}
+        for _, client in clients.values():
+            client.close()
+
+
+registry = ClientRegistry()
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=registry._after_fork)
+
+
+def supabase_client(service=False):
+    """
+    Return the shared Supabase client, using the service key when
+    ``service`` is set and one is configured.
+    """
+    key = (service and settings.SUPABASE_SERVICE_KEY) or settings.SUPABASE_KEY
+    return registry.get(
+        'supabase-service' if key != settings.SUPABASE_KEY else 'supabase',
+        lambda: SupabaseClient(
+            settings.SUPABASE_URL,
+            key,
+            pool_size=getattr(settings, 'SUPABASE_HTTP_POOL_SIZE', 10),
+            timeout=getattr(settings, 'SUPABASE_HTTP_TIMEOUT_SECONDS', 10),
+        ),
+        config=(settings.SUPABASE_URL, key),
+    )
+
+
+def client_metrics():
+    """Connection reuse per pooled client in this process."""
+    return registry.metrics()
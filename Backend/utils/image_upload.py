@@ -11,6 +11,8 @@ from django.core.files.storage import default_storage
 from django.core.files.base import ContentFile
 import logging
 
+from .clients import supabase_client
+
 logger = logging.getLogger(__name__)
 
 def process_base64_image(base64_data: str) -> tuple[bytes, str]:
@@ -109,24 +111,15 @@ def upload_image_to_supabase(image_bytes: bytes, file_extension: str, user_id: i
         str: Public URL of the uploaded image
     """
     try:
-        from supabase import create_client
-        
-        supabase = create_client(settings.SUPABASE_URL, settings.SUPABASE_SERVICE_KEY)
-        
         # Generate unique filename
         filename = f"posts/{user_id}/{uuid.uuid4().hex}.{file_extension}"
         
-        # Upload to Supabase storage
-        response = supabase.storage.from_(settings.SUPABASE_STORAGE_BUCKET).upload(
-            filename, image_bytes, file_options={"content-type": f"image/{file_extension}"}
+        # Upload to Supabase storage over the shared connection pool
+        public_url = supabase_client(service=True).upload(
+            settings.SUPABASE_STORAGE_BUCKET, filename, image_bytes,
+            content_type=f"image/{file_extension}"
         )
         
-        if response.status_code != 200:
-            raise Exception(f"Upload failed: {response.json()}")
-        
-        # Get public URL
-        public_url = supabase.storage.from_(settings.SUPABASE_STORAGE_BUCKET).get_public_url(filename)
-        
         logger.info(f"Image uploaded successfully to Supabase: {public_url}")
         return public_url
         
@@ -5,6 +5,8 @@ from django.core.files.storage import default_storage
 from django.core.files.base import ContentFile
 import logging
 
+from .clients import supabase_client
+
 logger = logging.getLogger('socialconnect')
 
 
@@ -34,35 +36,22 @@ class SupabaseStorageService:
                 logger.warning("Supabase not configured, using local storage")
                 return self._save_locally(file, folder)
             
-            # Import Supabase client here to avoid import errors if not configured
-            from supabase import create_client
-            
-            supabase = create_client(self.supabase_url, self.supabase_key)
-            
             # Generate unique filename
             file_extension = os.path.splitext(file.name)[1]
             unique_filename = f"{uuid.uuid4()}{file_extension}"
             file_path = f"{folder}/{unique_filename}"
             
-            # Upload to Supabase Storage
+            # Upload to Supabase Storage over the shared connection pool
             file_content = file.read()
             
-            result = supabase.storage.from_(self.storage_bucket).upload(
-                file_path, 
+            public_url = supabase_client().upload(
+                self.storage_bucket,
+                file_path,
                 file_content,
-                file_options={
-                    'content-type': file.content_type
-                }
+                content_type=file.content_type
             )
-            
-            if result:
-                # Get public URL
-                public_url = supabase.storage.from_(self.storage_bucket).get_public_url(file_path)
-                logger.info(f"File uploaded successfully: {public_url}")
-                return public_url
-            else:
-                logger.error("Failed to upload file to Supabase")
-                return None
+            logger.info(f"File uploaded successfully: {public_url}")
+            return public_url
                 
         except Exception as e:
             logger.error(f"Error uploading to Supabase Storage: {e}")
@@ -98,23 +87,14 @@ class SupabaseStorageService:
                 logger.warning("Supabase not configured")
                 return False
             
-            from supabase import create_client
-            
-            supabase = create_client(self.supabase_url, self.supabase_key)
-            
             # Extract file path from URL
             # This assumes the URL format: https://project.supabase.co/storage/v1/object/public/bucket/path
             if f"/{self.storage_bucket}/" in file_url:
                 file_path = file_url.split(f"/{self.storage_bucket}/")[1]
                 
-                result = supabase.storage.from_(self.storage_bucket).remove([file_path])
-                
-                if result:
-                    logger.info(f"File deleted successfully: {file_path}")
-                    return True
-                else:
-                    logger.error(f"Failed to delete file: {file_path}")
-                    return False
+                supabase_client().remove(self.storage_bucket, [file_path])
+                logger.info(f"File deleted successfully: {file_path}")
+                return True
             else:
                 logger.warning(f"Invalid file URL format: {file_url}")
                 return False
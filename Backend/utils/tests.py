@@ -0,0 +1,123 @@
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, override_settings
+
+from notifications.delivery import SupabaseTransport
+from .clients import ClientRegistry, PooledClient, registry, supabase_client
+from .storage import SupabaseStorageService
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """Records requests and answers 200 over keep-alive connections."""
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        super().setup()
+        # One handler instance serves one connection
+        with self.server.lock:
+            self.server.connections += 1
+
+    def handle_request(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        with self.server.lock:
+            self.server.requests.append((self.command, self.path, dict(self.headers), body))
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', '2')
+        self.end_headers()
+        self.wfile.write(b'{}')
+
+    do_GET = do_POST = do_DELETE = handle_request
+
+    def log_message(self, *args):
+        pass
+
+
+class StandInServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), StandInHandler)
+        self.lock = threading.Lock()
+        self.connections = 0
+        self.requests = []
+
+    @property
+    def url(self):
+        return f'http://127.0.0.1:{self.server_address[1]}'
+
+
+class PooledClientTests(SimpleTestCase):
+    def setUp(self):
+        self.server = StandInServer()
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.addCleanup(registry.close)
+
+    def test_requests_reuse_one_connection(self):
+        client = PooledClient(self.server.url)
+        self.addCleanup(client.close)
+        for _ in range(5):
+            client.request('GET', '/ping')
+
+        self.assertEqual(self.server.connections, 1)
+        self.assertEqual(
+            client.metrics(),
+            {'requests': 5, 'connections_opened': 1, 'connections_reused': 4}
+        )
+
+    def test_concurrent_threads_share_a_bounded_pool(self):
+        client = PooledClient(self.server.url, pool_size=4)
+        self.addCleanup(client.close)
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            list(pool.map(lambda _: client.request('GET', '/ping'), range(40)))
+
+        self.assertEqual(len(self.server.requests), 40)
+        self.assertLessEqual(self.server.connections, 4)
+
+    def test_registry_creates_each_client_once(self):
+        clients = ClientRegistry()
+        self.addCleanup(clients.close)
+        created = []
+
+        def factory():
+            created.append(PooledClient(self.server.url))
+            return created[-1]
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(lambda _: clients.get('stand-in', factory), range(8)))
+        self.assertEqual(len(created), 1)
+        self.assertTrue(all(client is created[0] for client in results))
+
+        # A forked worker must not inherit the parent's sockets
+        clients._pid = -1
+        self.assertIsNot(clients.get('stand-in', factory), created[0])
+
+    def test_storage_and_realtime_calls_share_the_supabase_client(self):
+        with override_settings(SUPABASE_URL=self.server.url, SUPABASE_KEY='anon-key', SUPABASE_SERVICE_KEY=''):
+            service = SupabaseStorageService()
+            upload = SimpleUploadedFile('photo.png', b'image-bytes', content_type='image/png')
+            url = service.upload_image(upload)
+            self.assertTrue(service.delete_file(url))
+            SupabaseTransport().send([{'recipient_id': 1}])
+
+            self.assertIs(supabase_client(), supabase_client(service=True))
+            metrics = registry.metrics()['supabase']
+
+        method, path, headers, body = self.server.requests[0]
+        self.assertEqual(method, 'POST')
+        self.assertTrue(path.startswith('/storage/v1/object/socialconnect-media/images/'))
+        self.assertEqual(headers['Authorization'], 'Bearer anon-key')
+        self.assertEqual(body, b'image-bytes')
+        self.assertEqual(url, self.server.url + path.replace('/object/', '/object/public/', 1))
+
+        self.assertEqual(self.server.requests[1][0], 'DELETE')
+        self.assertEqual(self.server.requests[2][1], '/rest/v1/realtime_notifications')
+        self.assertEqual(json.loads(self.server.requests[2][3]), [{'recipient_id': 1}])
+        self.assertEqual(self.server.connections, 1)
+        self.assertEqual(metrics['connections_reused'], 2)
@@ -21,7 +21,7 @@ import {
   DialogTrigger,
 } from "@/components/ui/dialog";
 import { authService, postsAPI, usersAPI, notificationsAPI } from "@/lib/api";
-import { User, Post, Comment, Notification } from "@/types";
+import { User, UserCard, Post, Comment, Notification } from "@/types";
 import {
   storage,
   getDefaultMockPosts,
@@ -54,7 +54,8 @@ export default function Home() {
   const [newComment, setNewComment] = useState<{ [postId: number]: string }>(
     {}
   );
-  const [searchUsers, setSearchUsers] = useState<User[]>([]);
+  // Search returns compact cards; the full profile is loaded on "View Profile"
+  const [searchUsers, setSearchUsers] = useState<UserCard[]>([]);
   const [searchQuery, setSearchQuery] = useState("");
   const [notifications, setNotifications] = useState<Notification[]>([]);
   const [loading, setLoading] = useState<{ [key: string]: boolean }>({});
@@ -1239,7 +1240,23 @@ export default function Home() {
   };
 
   // View Profile functions
-  const handleViewProfile = async (user: User) => {
+  const handleViewProfile = async (profile: User | UserCard) => {
+    let user: User;
+    if ("bio" in profile) {
+      user = profile;
+    } else {
+      // Search results are compact cards; load the full profile first
+      try {
+        user = (await usersAPI.getProfile(profile.id)).data;
+      } catch (error) {
+        console.error("Error fetching user profile:", error);
+        setErrors((prev) => ({
+          ...prev,
+          search: "Could not load this profile.",
+        }));
+        return;
+      }
+    }
     setViewingUser(user);
     setIsViewingProfile(true);
     setLoading({ ...loading, viewProfile: true });
@@ -1591,7 +1608,7 @@ export default function Home() {
 
       // Try to search users from backend API first
       const response = await usersAPI.search(searchQuery.trim());
-      const backendUsers = response.data.results || response.data || [];
+      const backendUsers = response.data.results || [];
 
       console.log(
         "✅ User search successful via backend:",
@@ -1626,12 +1643,15 @@ export default function Home() {
             user.email.toLowerCase().includes(query) ||
             user.bio.toLowerCase().includes(query)
         )
-        .map((user) => ({
-          ...user,
-          // Get real-time follower/following counts
-          followers_count: storage.loadFollowers(user.id).length,
-          following_count: storage.loadFollowing(user.id).length,
-        }));
+        .map(
+          (user): UserCard => ({
+            id: user.id,
+            username: user.username,
+            full_name: user.full_name,
+            avatar_url: user.avatar_url,
+            is_verified: user.is_verified,
+          })
+        );
 
       console.log("📱 Local search results:", filteredUsers.length);
       setSearchUsers(filteredUsers);
@@ -1675,19 +1695,6 @@ export default function Home() {
         setFollowing(newFollowing);
         console.log(`📊 Updated following list:`, newFollowing);
 
-        // When backend succeeds, update the follower count optimistically
-        // instead of relying on local storage
-        setSearchUsers(
-          searchUsers.map((searchUser) =>
-            searchUser.id === targetUserId
-              ? {
-                  ...searchUser,
-                  followers_count: searchUser.followers_count + 1,
-                }
-              : searchUser
-          )
-        );
-
         console.log(`📊 Target user ${targetUserId} followers increased by 1`);
 
         // Update all users list
@@ -1721,8 +1728,11 @@ export default function Home() {
           sender: user,
           notification_type: "follow",
           message: `${user.full_name} started following you`,
+          actor_count: 1,
+          recent_actors: [{ id: user.id, username: user.username }],
           is_read: false,
           created_at: new Date().toISOString(),
+          is_broadcast: false,
         };
 
         const currentNotifications = storage.loadNotifications();
@@ -1777,18 +1787,6 @@ export default function Home() {
         const newFollowing = following.filter((id) => id !== targetUserId);
         setFollowing(newFollowing);
 
-        // When backend succeeds, update the follower count optimistically
-        setSearchUsers(
-          searchUsers.map((searchUser) =>
-            searchUser.id === targetUserId
-              ? {
-                  ...searchUser,
-                  followers_count: Math.max(0, searchUser.followers_count - 1),
-                }
-              : searchUser
-          )
-        );
-
         // Update all users list
         setAllUsers(
           allUsers.map((allUser) =>
@@ -1890,17 +1888,29 @@ export default function Home() {
     }
   };
 
-  const markNotificationAsRead = async (notificationId: number) => {
+  const markNotificationAsRead = async (notification: Notification) => {
+    const notificationId = notification.id;
     setLoading({ ...loading, [`notification_${notificationId}`]: true });
     try {
       // Make API call to mark notification as read
-      await notificationsAPI.markAsRead(notificationId);
+      if (notification.is_broadcast) {
+        await notificationsAPI.markBroadcastAsRead(notificationId);
+      } else {
+        await notificationsAPI.markAsRead(notificationId);
+      }
       console.log(`✅ Notification ${notificationId} marked as read`);
 
-      // Update local state to reflect the change immediately
+      // Update local state to reflect the change immediately; a broadcast
+      // read marks every earlier broadcast as well
       setNotifications(
         notifications.map((notif) =>
-          notif.id === notificationId ? { ...notif, is_read: true } : notif
+          notification.is_broadcast
+            ? notif.is_broadcast && notif.id <= notificationId
+              ? { ...notif, is_read: true }
+              : notif
+            : !notif.is_broadcast && notif.id === notificationId
+            ? { ...notif, is_read: true }
+            : notif
         )
       );
     } catch (error: any) {
@@ -2817,11 +2827,6 @@ export default function Home() {
                             <p className="text-sm text-gray-500">
                               {user.full_name}
                             </p>
-                            <div className="flex space-x-3 text-xs text-gray-500">
-                              <span>{user.followers_count} followers</span>
-                              <span>{user.following_count} following</span>
-                              <span>{user.posts_count} posts</span>
-                            </div>
                           </div>
                         </div>
                         <div className="flex space-x-2">
@@ -3041,7 +3046,7 @@ export default function Home() {
                             variant="ghost"
                             size="sm"
                             onClick={() =>
-                              markNotificationAsRead(notification.id)
+                              markNotificationAsRead(notification)
                             }
                             disabled={
                               loading[`notification_${notification.id}`]
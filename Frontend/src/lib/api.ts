@@ -1,4 +1,5 @@
 import axios from "axios";
+import { CursorPage, Follow, PaginatedResponse, User, UserCard } from "@/types";
 
 const API_BASE_URL =
   process.env.NEXT_PUBLIC_API_BASE_URL || "https://socialconnect.pythonanywhere.com/api";
@@ -242,7 +243,7 @@ export const postsAPI = {
 
 // Users API
 export const usersAPI = {
-  getProfile: (id: number) => api.get(`/users/${id}/`),
+  getProfile: (id: number) => api.get<User>(`/users/${id}/`),
 
   updateProfile: (data: Record<string, unknown>) =>
     api.put(`/users/me/update/`, data), // Update current user profile
@@ -265,8 +266,11 @@ export const usersAPI = {
     }
   },
 
-  search: (query: string) =>
-    api.get(`/users/?search=${encodeURIComponent(query)}`),
+  // Compact cards, best matches first
+  search: (query: string, cursor?: string) =>
+    api.get<CursorPage<UserCard>>("/users/search/", {
+      params: { q: query, cursor },
+    }),
 
   getAllUsers: () => api.get("/users/"),
 
@@ -274,9 +278,11 @@ export const usersAPI = {
 
   unfollow: (id: number) => api.delete(`/users/${id}/unfollow/`),
 
-  getFollowers: (id: number) => api.get(`/users/${id}/followers/`),
+  getFollowers: (id: number) =>
+    api.get<PaginatedResponse<Follow>>(`/users/${id}/followers/`),
 
-  getFollowing: (id: number) => api.get(`/users/${id}/following/`),
+  getFollowing: (id: number) =>
+    api.get<PaginatedResponse<Follow>>(`/users/${id}/following/`),
 };
 
 // Notifications API
@@ -285,10 +291,26 @@ export const notificationsAPI = {
 
   markAsRead: (id: number) => api.post(`/notifications/${id}/read/`),
 
+  // Broadcasts are read up to a watermark, so earlier ones are marked too
+  markBroadcastAsRead: (id: number) =>
+    api.post(`/notifications/broadcasts/${id}/read/`),
+
+  // Batch mark-read: pass { ids } or { up_to_id }; returns the new unread_count
+  markManyAsRead: (params: { ids: number[] } | { up_to_id: number }) =>
+    api.post("/notifications/mark-read/", params),
+
   markAllAsRead: () => api.post("/notifications/mark-all-read/"),
 
   getUnreadCount: () => api.get("/notifications/unread-count/"),
 
+  // Long-poll: resolves when a notification newer than sinceId arrives or
+  // after ~25s; pass the returned since_id to the next call
+  pollNotifications: (sinceId?: string) =>
+    api.get("/notifications/poll/", {
+      params: { since_id: sinceId, timeout: 25 },
+      timeout: 35000,
+    }),
+
   // Admin-specific function to attempt to get all system notifications
   getAllSystemNotifications: async () => {
     try {
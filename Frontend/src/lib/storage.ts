@@ -467,73 +467,55 @@ export const getDefaultMockNotifications = (): Notification[] => [
     sender: {
       id: 3,
       username: "coffeelov3r",
-      email: "coffee@example.com",
-      first_name: "Jane",
-      last_name: "Smith",
       full_name: "Jane Smith",
-      bio: "Coffee enthusiast & morning person",
       avatar_url:
         "https://ui-avatars.com/api/?name=Jane+Smith&background=10b981&color=fff",
-      privacy_setting: "public" as const,
-      followers_count: 150,
-      following_count: 200,
-      posts_count: 75,
-      created_at: "2025-08-20T12:00:00Z",
       is_verified: false,
     },
     notification_type: "like" as const,
     post: 2,
     message: "Jane Smith liked your post",
+    actor_count: 1,
+    recent_actors: [],
     is_read: false,
     created_at: "2025-08-29T08:15:00Z",
+    is_broadcast: false,
   },
   {
     id: 2,
     sender: {
       id: 4,
       username: "bookworm92",
-      email: "books@example.com",
-      first_name: "Alex",
-      last_name: "Johnson",
       full_name: "Alex Johnson",
-      bio: "Avid reader & book reviewer",
       avatar_url:
         "https://ui-avatars.com/api/?name=Alex+Johnson&background=f59e0b&color=fff",
-      privacy_setting: "public" as const,
-      followers_count: 300,
-      following_count: 250,
-      posts_count: 120,
-      created_at: "2025-08-15T09:00:00Z",
       is_verified: false,
     },
     notification_type: "follow" as const,
     message: "Alex Johnson started following you",
+    actor_count: 1,
+    recent_actors: [],
     is_read: false,
     created_at: "2025-08-29T07:45:00Z",
+    is_broadcast: false,
   },
   {
     id: 3,
     sender: {
       id: 5,
       username: "techie_dev",
-      email: "dev@example.com",
-      first_name: "Sam",
-      last_name: "Wilson",
       full_name: "Sam Wilson",
-      bio: "Full-stack developer & tech enthusiast",
       avatar_url:
         "https://ui-avatars.com/api/?name=Sam+Wilson&background=8b5cf6&color=fff",
-      privacy_setting: "public" as const,
-      followers_count: 450,
-      following_count: 320,
-      posts_count: 200,
-      created_at: "2025-08-10T14:00:00Z",
       is_verified: true,
     },
     notification_type: "comment" as const,
     post: 1,
     message: "Sam Wilson commented on your post",
+    actor_count: 1,
+    recent_actors: [],
     is_read: true,
     created_at: "2025-08-29T06:30:00Z",
+    is_broadcast: false,
   },
 ];
@@ -40,24 +40,47 @@ export interface Comment {
   is_active: boolean;
 }
 
+export interface UserCard {
+  id: number;
+  username: string;
+  full_name: string;
+  avatar_url?: string;
+  is_verified: boolean;
+}
+
 export interface Follow {
   id: number;
-  follower: User;
-  following: User;
+  // The other side of the relationship: the follower in a followers list,
+  // the followed account in a following list
+  user: UserCard & {
+    followers_count: number;
+    following_count: number;
+    posts_count: number;
+  };
   created_at: string;
 }
 
+export interface NotificationPostSnippet {
+  id: number;
+  content: string; // Truncated
+  image_url?: string;
+}
+
 export interface Notification {
   id: number;
   actor?: User; // User who performed the action
-  sender?: User; // Keep for backward compatibility
+  sender?: UserCard; // Compact card of the latest actor
   notification_type: "follow" | "like" | "comment" | "mention";
   post?: number;
+  post_snippet?: NotificationPostSnippet | null; // With ?include=post
   target_object_id?: number; // ID of the related object
   content_type?: string; // Type of the related object (post, comment, etc.)
   message: string;
+  actor_count: number; // Interactions grouped into this notification
+  recent_actors: { id: number; username: string }[]; // Newest first
   is_read: boolean;
   created_at: string;
+  is_broadcast: boolean; // Admin broadcast; ids are separate from notifications
 }
 
 export interface LoginResponse {
@@ -95,3 +118,9 @@ export interface PaginatedResponse<T> {
   previous: string | null;
   results: T[];
 }
+
+// Keyset-paginated lists (search, likers): follow `next` until it is null
+export interface CursorPage<T> {
+  next: string | null;
+  results: T[];
+}